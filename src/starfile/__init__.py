@@ -1 +1,48 @@
-from .functions import read, write, to_string
+"""Read and write STAR files as pandas or polars dataframes."""
+
+from .aio import aiter_chunks, aread, awrite
+from .cache import cache_clear, cache_info, set_cache_size
+from .comparison import diff
+from .concatenation import concat
+from .fixed_width import update_columns
+from .follow import afollow, follow
+from .functions import read, to_string, write, write_many
+from .grouping import iter_groups
+from .hashing import content_hash
+from .optics import join_optics, split_optics
+from .row_index import build_row_index, read_rows, sample
+from .shared import share
+from .statistics import describe
+from .streaming import iter_chunks, transform
+from .value_index import build_value_index, lookup
+
+__all__ = [
+    "afollow",
+    "aiter_chunks",
+    "aread",
+    "awrite",
+    "build_row_index",
+    "build_value_index",
+    "cache_clear",
+    "cache_info",
+    "concat",
+    "content_hash",
+    "describe",
+    "diff",
+    "follow",
+    "iter_chunks",
+    "iter_groups",
+    "join_optics",
+    "lookup",
+    "read",
+    "read_rows",
+    "sample",
+    "set_cache_size",
+    "share",
+    "split_optics",
+    "to_string",
+    "transform",
+    "update_columns",
+    "write",
+    "write_many",
+]
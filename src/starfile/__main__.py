@@ -1,5 +1,4 @@
 try:
-    from IPython.terminal.embed import InteractiveShellEmbed
     import click
 except ImportError:
     deps = False
@@ -8,6 +7,10 @@ else:
 
 
 if deps:
+    @click.group()
+    def main():
+        """Command line tools for STAR files."""
+
     @click.command()
     @click.argument('path', type=click.Path(exists=True, dir_okay=False, readable=True))
     @click.option('--read_n_blocks', type=int)
@@ -16,6 +19,14 @@ if deps:
         """
         Read a star file and open an ipython console to interactively inspect its contents
         """
+        try:
+            from IPython.terminal.embed import InteractiveShellEmbed
+        except ImportError as err:
+            raise click.ClickException(
+                'To inspect files interactively, '
+                'install with `pip install starfile[cli]`'
+            ) from err
+
         # imports here will be available in the embedded shell
         from .functions import read, write
 
@@ -30,6 +41,70 @@ if deps:
         # https://github.com/ipython/ipython/issues/13966#issuecomment-1696137868
         sh = InteractiveShellEmbed.instance(banner2=banner)
         sh()
+
+    main.add_command(cli, name='inspect')
+
+    @main.command()
+    @click.argument('path', type=click.Path(exists=True, dir_okay=False, readable=True))
+    @click.option('--block', help='Name of the loop block.')
+    @click.option(
+        '--columns', help='Comma separated column names, defaults to all columns.'
+    )
+    @click.option('--top_k', type=int, default=5, show_default=True)
+    @click.option('--chunksize', type=int, default=100_000, show_default=True)
+    def describe(path, block, columns, top_k, chunksize):
+        """
+        Print summary statistics of the columns of a loop block in one pass
+        """
+        import pandas as pd
+
+        from .statistics import describe
+
+        if columns is not None:
+            columns = [col.strip() for col in columns.split(',')]
+        statistics = describe(
+            path, block, columns=columns, top_k=top_k, chunksize=chunksize
+        )
+        with pd.option_context('display.max_rows', None, 'display.max_columns', None,
+                               'display.width', None, 'display.max_colwidth', 80):
+            click.echo(statistics.to_string())
+
+    @main.command()
+    @click.argument('a', type=click.Path(exists=True, dir_okay=False, readable=True))
+    @click.argument('b', type=click.Path(exists=True, dir_okay=False, readable=True))
+    @click.option('--tolerance', type=float, default=0.0, show_default=True,
+                  help='Absolute tolerance for numeric values.')
+    @click.option('--relative_tolerance', type=float, default=0.0, show_default=True,
+                  help='Relative tolerance for numeric values.')
+    @click.option('--max_rows', type=int, default=10, show_default=True,
+                  help='Number of mismatching rows per block to show.')
+    @click.option('--chunksize', type=int, default=100_000, show_default=True)
+    def diff(a, b, tolerance, relative_tolerance, max_rows, chunksize):
+        """
+        Compare two star files block by block, exits with status 1 if they differ
+        """
+        import pandas as pd
+
+        from .comparison import diff
+
+        result = diff(
+            a, b,
+            tolerance=tolerance,
+            relative_tolerance=relative_tolerance,
+            max_rows=max_rows,
+            chunksize=chunksize,
+        )
+        with pd.option_context('display.max_rows', None, 'display.max_columns', None,
+                               'display.width', None, 'display.max_colwidth', 80):
+            click.echo(result.report())
+        if not result.identical:
+            raise SystemExit(1)
 else:
     def cli():
         print('To use the command line utility, install with `pip install starfile[cli]`')
+
+    main = cli
+
+
+if __name__ == '__main__':
+    main()
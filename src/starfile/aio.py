@@ -0,0 +1,114 @@
+"""Asynchronous reading and writing of STAR files."""
+
+from __future__ import annotations
+
+import asyncio
+from functools import partial
+from typing import TYPE_CHECKING, AsyncGenerator, Sequence
+
+from .functions import read, write
+from .streaming import iter_chunks
+
+if TYPE_CHECKING:
+    from concurrent.futures import Executor
+    from os import PathLike
+
+    import pandas as pd
+
+    from .typing import DataBlock
+
+_EXHAUSTED = object()
+
+
+async def aread(
+    filename: PathLike,
+    executor: Executor | None = None,
+    **kwargs,
+) -> DataBlock | dict[DataBlock]:
+    """Read data from a STAR file without blocking the event loop.
+
+    Reading and parsing run in `executor`, keyword arguments are passed to
+    `starfile.read`.
+
+    Parameters
+    ----------
+    filename: PathLike
+        File from which to read data.
+    executor: concurrent.futures.Executor | None
+        Executor in which to read the file, defaults to the event loop's
+        default executor. A `ProcessPoolExecutor` moves parsing off the event
+        loop's process entirely.
+    **kwargs
+        Passed to `starfile.read`, e.g. `always_dict`, `parse_as_string`,
+        `n_threads` or `keep_source`.
+    """
+    loop = asyncio.get_running_loop()
+    return await loop.run_in_executor(executor, partial(read, filename, **kwargs))
+
+
+async def awrite(
+    data: DataBlock | dict[str, DataBlock] | list[DataBlock],
+    filename: PathLike,
+    executor: Executor | None = None,
+    **kwargs,
+):
+    """Write data to disk in the STAR format without blocking the event loop.
+
+    Formatting and writing run in `executor`, keyword arguments are passed to
+    `starfile.write`.
+
+    Parameters
+    ----------
+    data: DataBlock | dict[str, DataBlock] | list[DataBlock]
+        Data to be saved to file.
+    filename: PathLike
+        Path where the file will be saved.
+    executor: concurrent.futures.Executor | None
+        Executor in which to write the file, defaults to the event loop's
+        default executor.
+    **kwargs
+        Passed to `starfile.write`.
+    """
+    loop = asyncio.get_running_loop()
+    await loop.run_in_executor(executor, partial(write, data, filename, **kwargs))
+
+
+async def aiter_chunks(
+    filename: PathLike,
+    block: str | None = None,
+    chunksize: int = 100_000,
+    parse_as_string: Sequence[str] = (),
+    executor: Executor | None = None,
+) -> AsyncGenerator[pd.DataFrame, None]:
+    """Asynchronously iterate over the rows of a loop block in chunks of dataframes.
+
+    Each chunk is read and parsed in `executor`, see `starfile.iter_chunks`.
+
+    Parameters
+    ----------
+    filename: PathLike
+        File from which to read data.
+    block: str | None
+        Name of the loop block, may be omitted if the file contains a single
+        loop block.
+    chunksize: int
+        Maximum number of rows in each chunk.
+    parse_as_string: list[str]
+        A list of column names which will not be coerced to numeric values.
+    executor: concurrent.futures.Executor | None
+        Executor in which chunks are read, defaults to the event loop's default
+        executor. Must share memory with the event loop, e.g. a
+        `ThreadPoolExecutor`.
+    """
+    loop = asyncio.get_running_loop()
+    chunks = iter_chunks(
+        filename, block=block, chunksize=chunksize, parse_as_string=parse_as_string
+    )
+    try:
+        while True:
+            df = await loop.run_in_executor(executor, next, chunks, _EXHAUSTED)
+            if df is _EXHAUSTED:
+                break
+            yield df
+    finally:
+        chunks.close()
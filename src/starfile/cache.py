@@ -0,0 +1,162 @@
+"""Process wide cache of parsed data blocks."""
+
+from __future__ import annotations
+
+import sys
+import threading
+from collections import OrderedDict
+from typing import TYPE_CHECKING, Callable, Hashable, NamedTuple
+
+import pandas as pd
+
+from .utils import file_identity, is_polars_dataframe
+
+if TYPE_CHECKING:
+    from os import PathLike
+
+    from .typing import DataBlock
+
+DEFAULT_MAX_BYTES = 2 ** 30
+
+
+class CacheInfo(NamedTuple):
+    """Statistics of the block cache, see `starfile.cache_info`."""
+
+    hits: int
+    misses: int
+    evictions: int
+    n_entries: int
+    n_bytes: int
+    max_bytes: int
+
+
+class BlockCache:
+    """LRU cache of parsed data blocks bounded by their size in memory.
+
+    Entries are keyed on the identity of a file (path, inode, size and
+    modification time) together with the options it was parsed with, a file
+    which changes on disk is therefore never served from the cache. Blocks are
+    copied on the way in and on the way out so callers never share dataframes
+    with the cache.
+    """
+
+    def __init__(self, max_bytes: int = DEFAULT_MAX_BYTES):
+        self.max_bytes = max_bytes
+        self._entries: OrderedDict[Hashable, tuple[dict[str, DataBlock], int]] = (
+            OrderedDict()
+        )
+        self._n_bytes = 0
+        self._hits = 0
+        self._misses = 0
+        self._evictions = 0
+        self._lock = threading.Lock()
+
+    def get_or_parse(
+        self,
+        filename: PathLike,
+        options: Hashable,
+        parse: Callable[[], dict[str, DataBlock]],
+    ) -> dict[str, DataBlock]:
+        """Data blocks of a file from the cache, parsing the file on a miss."""
+        key = (file_identity(filename), options)
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                self._entries.move_to_end(key)
+                self._hits += 1
+                return copy_blocks(entry[0])
+            self._misses += 1
+
+        data_blocks = parse()
+        if file_identity(filename) != key[0]:  # modified while parsing
+            return data_blocks
+        n_bytes = blocks_nbytes(data_blocks)
+        if n_bytes <= self.max_bytes:
+            with self._lock:
+                if key not in self._entries:
+                    self._entries[key] = (copy_blocks(data_blocks), n_bytes)
+                    self._n_bytes += n_bytes
+                    self._evict()
+        return data_blocks
+
+    def clear(self):
+        """Drop all entries and reset the statistics."""
+        with self._lock:
+            self._entries.clear()
+            self._n_bytes = 0
+            self._hits = self._misses = self._evictions = 0
+
+    def resize(self, max_bytes: int):
+        """Set the maximum size, evicting entries which no longer fit."""
+        with self._lock:
+            self.max_bytes = max_bytes
+            self._evict()
+
+    def info(self) -> CacheInfo:
+        """Current statistics of the cache."""
+        with self._lock:
+            return CacheInfo(
+                hits=self._hits,
+                misses=self._misses,
+                evictions=self._evictions,
+                n_entries=len(self._entries),
+                n_bytes=self._n_bytes,
+                max_bytes=self.max_bytes,
+            )
+
+    def _evict(self):
+        while self._n_bytes > self.max_bytes and self._entries:
+            _, (_, n_bytes) = self._entries.popitem(last=False)
+            self._n_bytes -= n_bytes
+            self._evictions += 1
+
+
+def copy_blocks(data_blocks: dict[str, DataBlock]) -> dict[str, DataBlock]:
+    """Copy data blocks so that cached blocks cannot be modified by callers."""
+    return {
+        name: block.copy(deep=True) if isinstance(block, pd.DataFrame)
+        else block.clone() if is_polars_dataframe(block)
+        else dict(block)
+        for name, block in data_blocks.items()
+    }
+
+
+def blocks_nbytes(data_blocks: dict[str, DataBlock]) -> int:
+    """Approximate memory used by data blocks."""
+    n_bytes = 0
+    for block in data_blocks.values():
+        if isinstance(block, pd.DataFrame):
+            n_bytes += int(block.memory_usage(index=True, deep=True).sum())
+        elif is_polars_dataframe(block):
+            n_bytes += int(block.estimated_size())
+        else:
+            n_bytes += sys.getsizeof(block)
+            n_bytes += sum(sys.getsizeof(v) for v in block.values())
+    return n_bytes
+
+
+_block_cache = BlockCache()
+
+
+def cache_info() -> CacheInfo:
+    """Hit and miss counts and size of the cache of `starfile.read(..., cache=True)`."""
+    return _block_cache.info()
+
+
+def cache_clear():
+    """Empty the cache of `starfile.read(..., cache=True)`, reset its statistics."""
+    _block_cache.clear()
+
+
+def set_cache_size(max_bytes: int):
+    """Limit the memory held by the cache used by `starfile.read(..., cache=True)`.
+
+    Least recently used files are evicted first. Files whose parsed blocks are
+    larger than `max_bytes` are never cached.
+
+    Parameters
+    ----------
+    max_bytes: int
+        Maximum size of cached data blocks in bytes, defaults to 1 GiB.
+    """
+    _block_cache.resize(max_bytes)
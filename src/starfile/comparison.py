@@ -0,0 +1,330 @@
+"""Comparison of two STAR files within numeric tolerances."""
+
+from __future__ import annotations
+
+from itertools import chain
+from pathlib import Path
+from typing import TYPE_CHECKING, Iterator, Sequence
+
+import numpy as np
+import pandas as pd
+
+from .parser import parse_simple_block
+from .streaming import BlockInfo, _parse_lines, iter_loop_lines, scan_blocks
+
+if TYPE_CHECKING:
+    from os import PathLike
+
+
+class ColumnDiff:
+    """Running comparison of one column, updated one chunk at a time."""
+
+    def __init__(self):
+        self.n_compared = 0
+        self.n_mismatched = 0
+        self.max_abs_diff = np.nan
+        self.max_rel_diff = np.nan
+
+    def update(
+        self,
+        a: pd.Series,
+        b: pd.Series,
+        tolerance: float,
+        relative_tolerance: float,
+    ) -> np.ndarray:
+        """Compare a chunk of values, returning the mask of mismatching rows."""
+        self.n_compared += len(a)
+        if _is_numeric(a) and _is_numeric(b):
+            mismatched = self._update_numeric(
+                a.to_numpy(dtype=np.float64, na_value=np.nan),
+                b.to_numpy(dtype=np.float64, na_value=np.nan),
+                tolerance,
+                relative_tolerance,
+            )
+        else:
+            mismatched = a.astype(str).to_numpy() != b.astype(str).to_numpy()
+        self.n_mismatched += int(mismatched.sum())
+        return mismatched
+
+    def _update_numeric(
+        self,
+        x: np.ndarray,
+        y: np.ndarray,
+        tolerance: float,
+        relative_tolerance: float,
+    ) -> np.ndarray:
+        both_nan = np.isnan(x) & np.isnan(y)
+        with np.errstate(invalid='ignore', divide='ignore'):
+            abs_diff = np.abs(x - y)
+            abs_diff[both_nan] = 0
+            rel_diff = abs_diff / np.abs(y)
+            rel_diff[abs_diff == 0] = 0
+            within = abs_diff <= tolerance + relative_tolerance * np.abs(y)
+        # nan in only one of the two never compares within tolerance
+        compared = ~np.isnan(abs_diff)
+        if compared.any():
+            self.max_abs_diff = np.fmax(self.max_abs_diff, abs_diff[compared].max())
+            self.max_rel_diff = np.fmax(self.max_rel_diff, rel_diff[compared].max())
+        return ~within
+
+    def summary(self) -> dict[str, object]:
+        """Comparison of the column as a row of `StarDiff.columns`."""
+        return {
+            'n_compared': self.n_compared,
+            'n_mismatched': self.n_mismatched,
+            'max_abs_diff': self.max_abs_diff,
+            'max_rel_diff': self.max_rel_diff,
+        }
+
+
+class StarDiff:
+    """Differences between two STAR files.
+
+    `header` describes structural differences: blocks, block types and column
+    names which are not shared. `row_counts` maps loop blocks to their number
+    of rows in `a` and `b` where these differ. `columns` holds the comparison
+    of every shared column, indexed by block and column. `mismatches` lists the
+    values of the first mismatching rows of each block, one row per value.
+    """
+
+    header: list[str]
+    row_counts: dict[str, tuple[int, int]]
+    columns: pd.DataFrame
+    mismatches: pd.DataFrame
+
+    def __init__(self, header, row_counts, columns, mismatches):
+        self.header = header
+        self.row_counts = row_counts
+        self.columns = columns
+        self.mismatches = mismatches
+
+    @property
+    def identical(self) -> bool:
+        """Whether the files match within tolerance."""
+        return (
+            len(self.header) == 0
+            and len(self.row_counts) == 0
+            and (self.columns['n_mismatched'] == 0).all()
+        )
+
+    def report(self) -> str:
+        """Human readable summary of the differences."""
+        if self.identical:
+            return 'files are identical'
+        sections = []
+        if len(self.header) > 0:
+            lines = [f'  {line}' for line in self.header]
+            sections.append('\n'.join(['header:', *lines]))
+        if len(self.row_counts) > 0:
+            lines = [
+                f'  {name}: {n_a} != {n_b}'
+                for name, (n_a, n_b) in self.row_counts.items()
+            ]
+            sections.append('\n'.join(['row counts:', *lines]))
+        mismatched = self.columns[self.columns['n_mismatched'] > 0]
+        if len(mismatched) > 0:
+            sections.append(f'columns:\n{mismatched.to_string()}')
+        if len(self.mismatches) > 0:
+            rows = self.mismatches.to_string(index=False)
+            sections.append(f'first mismatching rows:\n{rows}')
+        return '\n\n'.join(sections)
+
+    def __repr__(self) -> str:
+        """Same as `report`."""
+        return self.report()
+
+
+def diff(
+    a: PathLike,
+    b: PathLike,
+    tolerance: float = 0.0,
+    relative_tolerance: float = 0.0,
+    max_rows: int = 10,
+    chunksize: int = 100_000,
+    parse_as_string: Sequence[str] = (),
+) -> StarDiff:
+    """Compare two STAR files block by block in a single streaming pass.
+
+    Loop blocks are read `chunksize` rows at a time from both files so memory
+    use does not depend on file size. Rows are compared by position. Numeric
+    values match if `|a - b| <= tolerance + relative_tolerance * |b|`, other
+    values match if their string representations are equal. Null values
+    match each other.
+
+    Parameters
+    ----------
+    a: PathLike
+        First file.
+    b: PathLike
+        Second file, relative differences are relative to its values.
+    tolerance: float
+        Absolute tolerance for numeric values.
+    relative_tolerance: float
+        Relative tolerance for numeric values.
+    max_rows: int
+        Number of mismatching rows per block to report.
+    chunksize: int
+        Maximum number of rows per file held in memory at a time.
+    parse_as_string: list[str]
+        A list of column names which will not be coerced to numeric values.
+
+    Returns
+    -------
+    diff: StarDiff
+        Header differences, row count differences, per column maximum absolute
+        and relative differences and the first mismatching rows.
+    """
+    a, b = Path(a), Path(b)
+    blocks_a, blocks_b = scan_blocks(a), scan_blocks(b)
+    header = [f'block {name!r} only in a' for name in blocks_a if name not in blocks_b]
+    header += [f'block {name!r} only in b' for name in blocks_b if name not in blocks_a]
+
+    row_counts = {}
+    column_diffs: dict[tuple[str, str], ColumnDiff] = {}
+    mismatches = []
+    with open(a, 'rb') as f_a, open(b, 'rb') as f_b:
+        for name, info_a in blocks_a.items():
+            if name not in blocks_b:
+                continue
+            info_b = blocks_b[name]
+            if info_a.is_loop != info_b.is_loop:
+                kind_a, kind_b = (
+                    'loop' if info.is_loop else 'simple' for info in (info_a, info_b)
+                )
+                header.append(
+                    f'block {name!r} is a {kind_a} block in a, {kind_b} block in b'
+                )
+                continue
+            if info_a.is_loop:
+                names_a, names_b = info_a.column_names, info_b.column_names
+                chunks_a = _iter_loop_chunks(f_a, info_a, chunksize, parse_as_string)
+                chunks_b = _iter_loop_chunks(f_b, info_b, chunksize, parse_as_string)
+            else:
+                simple_a = _read_simple_block(f_a, info_a, parse_as_string)
+                simple_b = _read_simple_block(f_b, info_b, parse_as_string)
+                names_a, names_b = list(simple_a), list(simple_b)
+                chunks_a, chunks_b = iter([simple_a]), iter([simple_b])
+            header += _column_differences(name, names_a, names_b)
+            columns = [col for col in names_a if col in names_b]
+            for col in columns:
+                column_diffs[name, col] = ColumnDiff()
+
+            n_a = n_b = 0
+            n_reported = 0
+            for chunk_a, chunk_b in _aligned_chunks(chunks_a, chunks_b):
+                if chunk_a is None or chunk_b is None:  # rows without a counterpart
+                    n_a += len(chunk_a) if chunk_a is not None else 0
+                    n_b += len(chunk_b) if chunk_b is not None else 0
+                    continue
+                mismatched = {
+                    col: column_diffs[name, col].update(
+                        chunk_a[col], chunk_b[col], tolerance, relative_tolerance
+                    )
+                    for col in columns
+                }
+                if n_reported < max_rows and len(columns) > 0:
+                    any_mismatched = np.logical_or.reduce(list(mismatched.values()))
+                    rows = np.flatnonzero(any_mismatched)[:max_rows - n_reported]
+                    mismatches += _mismatched_values(
+                        name, n_a, chunk_a, chunk_b, mismatched, rows
+                    )
+                    n_reported += len(rows)
+                n_a += len(chunk_a)
+                n_b += len(chunk_b)
+            if n_a != n_b:
+                row_counts[name] = (n_a, n_b)
+
+    columns = pd.DataFrame(
+        [column_diff.summary() for column_diff in column_diffs.values()],
+        index=pd.MultiIndex.from_tuples(list(column_diffs), names=['block', 'column']),
+        columns=['n_compared', 'n_mismatched', 'max_abs_diff', 'max_rel_diff'],
+    )
+    mismatches = pd.DataFrame(mismatches, columns=['block', 'row', 'column', 'a', 'b'])
+    return StarDiff(header, row_counts, columns, mismatches)
+
+
+def _is_numeric(values: pd.Series) -> bool:
+    return (
+        pd.api.types.is_numeric_dtype(values.dtype)
+        and not pd.api.types.is_bool_dtype(values)
+    )
+
+
+def _mismatched_values(
+    block: str,
+    offset: int,
+    chunk_a: pd.DataFrame,
+    chunk_b: pd.DataFrame,
+    mismatched: dict[str, np.ndarray],
+    rows: np.ndarray,
+) -> list[tuple]:
+    """(block, row, column, a, b) for each mismatching value in `rows` of a chunk."""
+    return [
+        (block, offset + int(row), col, chunk_a[col].iloc[row], chunk_b[col].iloc[row])
+        for row in rows
+        for col, mask in mismatched.items()
+        if mask[row]
+    ]
+
+
+def _column_differences(
+    block: str, names_a: list[str], names_b: list[str]
+) -> list[str]:
+    differences = [
+        f'column {col!r} of block {block!r} only in a'
+        for col in names_a if col not in names_b
+    ]
+    differences += [
+        f'column {col!r} of block {block!r} only in b'
+        for col in names_b if col not in names_a
+    ]
+    shared_a = [col for col in names_a if col in names_b]
+    shared_b = [col for col in names_b if col in names_a]
+    if shared_a != shared_b:
+        differences.append(f'columns of block {block!r} are in a different order')
+    return differences
+
+
+def _iter_loop_chunks(
+    file, info: BlockInfo, chunksize: int, parse_as_string: list[str]
+) -> Iterator[pd.DataFrame]:
+    for lines in iter_loop_lines(file, info, chunksize):
+        df = _parse_lines(lines, info.column_names, parse_as_string)
+        if df is not None:
+            yield df.reset_index(drop=True)
+
+
+def _read_simple_block(
+    file, info: BlockInfo, parse_as_string: Sequence[str]
+) -> pd.DataFrame:
+    """A simple block as a dataframe with a single row."""
+    file.seek(info.start)
+    text = file.read(info.end - info.start).decode()
+    return pd.DataFrame([parse_simple_block(text, parse_as_string)])
+
+
+def _aligned_chunks(
+    chunks_a: Iterator[pd.DataFrame],
+    chunks_b: Iterator[pd.DataFrame],
+) -> Iterator[tuple[pd.DataFrame | None, pd.DataFrame | None]]:
+    """Pairs of chunks with the same number of rows.
+
+    Once either side runs out the remaining rows of the other side are
+    yielded unpaired, with `None` in place of the exhausted side.
+    """
+    chunk_a, chunk_b = next(chunks_a, None), next(chunks_b, None)
+    while chunk_a is not None and chunk_b is not None:
+        n = min(len(chunk_a), len(chunk_b))
+        yield chunk_a.iloc[:n], chunk_b.iloc[:n]
+        chunk_a = _rest(chunk_a, n) if len(chunk_a) > n else next(chunks_a, None)
+        chunk_b = _rest(chunk_b, n) if len(chunk_b) > n else next(chunks_b, None)
+    if chunk_a is not None:
+        for chunk in chain([chunk_a], chunks_a):
+            yield chunk, None
+    if chunk_b is not None:
+        for chunk in chain([chunk_b], chunks_b):
+            yield None, chunk
+
+
+def _rest(chunk: pd.DataFrame, n: int) -> pd.DataFrame:
+    return chunk.iloc[n:].reset_index(drop=True)
@@ -0,0 +1,251 @@
+"""Streaming concatenation of a loop block from many STAR files."""
+
+from __future__ import annotations
+
+import mmap
+from pathlib import Path
+from typing import TYPE_CHECKING, BinaryIO, Sequence
+
+import numpy as np
+import pandas as pd
+
+from .parser import empty_loop_dataframe, parse_loop_data
+from .streaming import (
+    BlockInfo,
+    _parse_lines,
+    copy_byte_range,
+    iter_loop_lines,
+    resolve_loop_block,
+    scan_blocks,
+    write_lines,
+)
+from .writer import loop_block_data, loop_block_header
+
+if TYPE_CHECKING:
+    from os import PathLike
+
+_WHITESPACE = b' \t\r\n'
+
+
+def concat(
+    inputs: Sequence[PathLike],
+    output: PathLike,
+    block: str = 'particles',
+    optics_block: str | None = 'optics',
+    on: str = 'rlnOpticsGroup',
+    chunksize: int = 100_000,
+    parse_as_string: Sequence[str] = (),
+    float_format: str = '%.6f',
+    sep: str = '\t',
+    na_rep: str = '<NA>',
+    quote_character: str = '"',
+    quote_all_strings: bool = False,
+):
+    """Concatenate a loop block from many STAR files, streaming into one file.
+
+    Every input must contain `block` with the same set of columns, columns are
+    written in the order of the first input. If the inputs contain an optics
+    block, optics groups with identical values are merged and groups which
+    clash with a different group of an earlier input are renumbered, `on` is
+    updated in the rows of `block` to match.
+
+    Rows are streamed `chunksize` at a time so memory use does not grow with
+    the number of inputs. Rows which need no change (same column order, no
+    renumbered optics groups) are copied byte for byte. Other blocks of the
+    first input are copied verbatim.
+
+    Parameters
+    ----------
+    inputs: list[PathLike]
+        STAR files to concatenate, in order.
+    output: PathLike
+        Path where the concatenated file will be saved, must not be one of `inputs`.
+    block: str
+        Name of the loop block to concatenate.
+    optics_block: str | None
+        Name of the optics block, `None` to treat all other blocks as opaque.
+    on: str
+        Column containing the optics group in `block` and `optics_block`.
+    chunksize: int
+        Maximum number of rows held in memory at a time.
+    parse_as_string: list[str]
+        A list of column names which will not be coerced to numeric values.
+    float_format: str
+        Float format string for rows which are reformatted.
+    sep: str
+        Separator between values.
+    na_rep: str
+        Representation of null values.
+    quote_character: str
+        Quote character used for strings which need quoting.
+    quote_all_strings: bool
+        Quote all strings, not only those which need quoting.
+    """
+    inputs = [Path(filename) for filename in inputs]
+    output = Path(output)
+    if len(inputs) == 0:
+        raise ValueError('no input files')
+    if output.exists() and any(output.resolve() == src.resolve() for src in inputs):
+        raise ValueError('output must not be one of the inputs')
+
+    all_blocks = [scan_blocks(src) for src in inputs]
+    infos = [resolve_loop_block(blocks, block) for blocks in all_blocks]
+    column_names = infos[0].column_names
+    for src, info in zip(inputs, infos):
+        if sorted(info.column_names) != sorted(column_names):
+            raise ValueError(
+                f'columns of {block!r} in {src} do not match {inputs[0]}: '
+                f'{info.column_names} != {column_names}'
+            )
+
+    has_optics = optics_block is not None and all(
+        optics_block in blocks and blocks[optics_block].is_loop for blocks in all_blocks
+    )
+    if has_optics:
+        optics, group_maps = merge_optics_groups(
+            [
+                _read_loop_block(src, blocks[optics_block], parse_as_string)
+                for src, blocks in zip(inputs, all_blocks)
+            ],
+            on=on,
+        )
+    else:
+        optics, group_maps = None, [{} for _ in inputs]
+    if on not in column_names:
+        group_maps = [{} for _ in inputs]
+
+    def format_rows(df: pd.DataFrame):
+        return loop_block_data(
+            df,
+            float_format=float_format,
+            separator=sep,
+            na_rep=na_rep,
+            quote_character=quote_character,
+            quote_all_strings=quote_all_strings,
+        )
+
+    first_blocks = all_blocks[0]
+    with open(inputs[0], 'rb') as f_first, open(output, 'wb') as f_dst:
+        first_start = min((info.start for info in first_blocks.values()), default=0)
+        copy_byte_range(f_first, f_dst, 0, first_start)
+        for info in first_blocks.values():
+            if has_optics and info.name == optics_block:
+                write_lines(f_dst, loop_block_header(info.name, optics.columns))
+                write_lines(f_dst, format_rows(optics))
+                write_lines(f_dst, ['', ''])
+            elif info.name == block:
+                write_lines(f_dst, loop_block_header(info.name, column_names))
+                for src, src_info, group_map in zip(inputs, infos, group_maps):
+                    _copy_rows(
+                        src, f_dst, src_info, column_names, group_map, on,
+                        chunksize, parse_as_string, format_rows,
+                    )
+                write_lines(f_dst, ['', ''])
+            else:
+                copy_byte_range(f_first, f_dst, info.start, info.end)
+
+
+def merge_optics_groups(
+    tables: Sequence[pd.DataFrame],
+    on: str = 'rlnOpticsGroup',
+) -> tuple[pd.DataFrame, list[dict[int, int]]]:
+    """Merge optics tables, returning the merged table and a group mapping per table.
+
+    Groups are identified by their values in all columns other than `on`. A group
+    of a later table which matches an earlier group is mapped onto it, a group
+    whose number is already taken by a different group is given the next free number.
+    Mappings only contain groups whose number changed.
+    """
+    columns = list(tables[0].columns)
+    for table in tables[1:]:
+        if sorted(table.columns) != sorted(columns):
+            raise ValueError(
+                f'optics columns do not match: {list(table.columns)} != {columns}'
+            )
+    value_columns = [col for col in columns if col != on]
+
+    merged: list[pd.DataFrame] = []
+    groups: dict[tuple, int] = {}  # optics values -> group number
+    taken = set()
+    group_maps = []
+    for table in tables:
+        table = table[columns]
+        group_map = {}
+        keep = np.zeros(len(table), dtype=bool)
+        new_groups = table[on].to_numpy().copy()
+        for idx, (group, *values) in enumerate(
+            table[[on, *value_columns]].itertuples(index=False, name=None)
+        ):
+            key = tuple(values)
+            if key in groups:
+                new_group = groups[key]
+            else:
+                new_group = group if group not in taken else max(taken) + 1
+                groups[key] = new_group
+                taken.add(new_group)
+                keep[idx] = True
+            if new_group != group:
+                group_map[group] = new_group
+            new_groups[idx] = new_group
+        merged.append(table[keep].assign(**{on: new_groups[keep]}))
+        group_maps.append(group_map)
+    optics = pd.concat(merged, ignore_index=True)
+    return optics, group_maps
+
+
+def _read_loop_block(
+    filename: Path,
+    info: BlockInfo,
+    parse_as_string: list[str],
+) -> pd.DataFrame:
+    with open(filename, 'rb') as f:
+        f.seek(info.data_start)
+        loop_data = f.read(info.end - info.data_start).lstrip()
+    if loop_data == b'':
+        return empty_loop_dataframe(info.column_names)
+    return parse_loop_data(loop_data, info.column_names, parse_as_string)
+
+
+def _copy_rows(
+    src: Path,
+    dst: BinaryIO,
+    info: BlockInfo,
+    column_names: list[str],
+    group_map: dict[int, int],
+    on: str,
+    chunksize: int,
+    parse_as_string: list[str],
+    format_rows,
+):
+    if info.column_names == column_names and len(group_map) == 0:
+        with open(src, 'rb') as f:
+            start, end = _loop_data_range(f, info)
+            if end > start:
+                copy_byte_range(f, dst, start, end)
+                dst.write(b'\n')
+        return
+    with open(src, 'rb') as f:
+        for lines in iter_loop_lines(f, info, chunksize):
+            df = _parse_lines(lines, info.column_names, parse_as_string)
+            if df is None:
+                continue
+            df = df[column_names]
+            if len(group_map) > 0:
+                df[on] = df[on].replace(group_map)
+            write_lines(dst, format_rows(df))
+
+
+def _loop_data_range(file: BinaryIO, info: BlockInfo) -> tuple[int, int]:
+    """Byte range of the rows of a loop block without surrounding blank lines."""
+    if info.end == info.data_start:
+        return info.data_start, info.data_start
+    with mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+        start, end = info.data_start, info.end
+        while start < end:
+            newline = mm.find(b'\n', start, end)
+            if newline == -1 or mm[start:newline].strip() != b'':
+                break
+            start = newline + 1
+        while end > start and mm[end - 1] in _WHITESPACE:
+            end -= 1
+    return start, end
@@ -0,0 +1,280 @@
+"""In place updates of columns in fixed width loop blocks."""
+
+from __future__ import annotations
+
+import mmap
+from contextlib import nullcontext
+from pathlib import Path
+from typing import TYPE_CHECKING
+
+import numpy as np
+import pandas as pd
+import pyarrow as pa
+import pyarrow.compute as pc
+
+from .functions import read, write
+from .streaming import BlockInfo, resolve_loop_block, scan_buffer
+from .utils import file_lock
+from .writer import column_float_format, format_column
+
+if TYPE_CHECKING:
+    from os import PathLike
+
+    from numpy.typing import ArrayLike
+
+    from .typing import FloatFormat
+
+_WHITESPACE = b' \t\r\n'
+
+
+class FixedWidthLayout:
+    """Byte layout of a loop block in which every row has the same length.
+
+    Column `i` of row `j` occupies bytes
+    `data_start + j * row_length + field_starts[i]` up to (not including)
+    `data_start + j * row_length + field_ends[i]`, right aligned.
+    """
+
+    data_start: int
+    n_rows: int
+    row_length: int
+    field_starts: list[int]
+    field_ends: list[int]
+
+    def __init__(self, data_start, n_rows, row_length, field_starts, field_ends):
+        self.data_start = data_start
+        self.n_rows = n_rows
+        self.row_length = row_length
+        self.field_starts = field_starts
+        self.field_ends = field_ends
+
+    def rows(self, buffer) -> np.ndarray:
+        """View the rows of a loop block as a 2D array of bytes."""
+        return np.frombuffer(
+            buffer,
+            dtype=np.uint8,
+            count=self.n_rows * self.row_length,
+            offset=self.data_start,
+        ).reshape(self.n_rows, self.row_length)
+
+
+def fixed_width_layout(buffer, info: BlockInfo) -> FixedWidthLayout | None:
+    """Find the layout of a fixed width loop block, `None` if it isn't fixed width."""
+    data_end = info.end
+    while data_end > info.data_start and buffer[data_end - 1] in _WHITESPACE:
+        data_end -= 1
+    if data_end == info.data_start:  # no rows
+        return None
+    first_newline = buffer.find(b'\n', info.data_start, info.end)
+    if first_newline == -1:
+        return None
+    row_length = first_newline + 1 - info.data_start
+    n_rows, remainder = divmod(data_end + 1 - info.data_start, row_length)
+    if remainder != 0:
+        return None
+
+    field_ends = _token_ends(buffer[info.data_start:first_newline])
+    if len(field_ends) != len(info.column_names):
+        return None
+    field_starts = [0] + [end + 1 for end in field_ends[:-1]]
+    layout = FixedWidthLayout(
+        info.data_start, n_rows, row_length, field_starts, field_ends
+    )
+
+    # every row must end in a newline and have its values right aligned to the
+    # same field ends, with whitespace separating fields
+    rows = layout.rows(buffer)
+    is_whitespace = np.isin(rows[:, field_ends], np.frombuffer(_WHITESPACE, np.uint8))
+    ends_in_value = ~np.isin(
+        rows[:, [end - 1 for end in field_ends]], np.frombuffer(_WHITESPACE, np.uint8)
+    )
+    ends_in_newline = rows[:, -1] == ord('\n')
+    if not (ends_in_newline.all() and is_whitespace.all() and ends_in_value.all()):
+        return None
+    return layout
+
+
+def _token_ends(line: bytes) -> list[int]:
+    """End offset of each whitespace separated, possibly quoted, value in a line."""
+    ends = []
+    position = 0
+    while position < len(line):
+        character = line[position:position + 1]
+        if character in (b' ', b'\t', b'\r'):
+            position += 1
+            continue
+        if character in (b'"', b"'"):
+            end = line.find(character, position + 1) + 1
+            if end == 0:
+                end = len(line)
+        else:
+            end = position
+            while end < len(line) and line[end:end + 1] not in (b' ', b'\t', b'\r'):
+                end += 1
+        ends.append(end)
+        position = end
+    return ends
+
+
+def update_columns(
+    filename: PathLike,
+    block: str | None,
+    columns: dict[str, ArrayLike],
+    float_format: FloatFormat = '%.6f',
+    na_rep: str = '<NA>',
+    quote_character: str = '"',
+    lock: bool = False,
+) -> bool:
+    """Replace the values of columns in a loop block, in place where possible.
+
+    For files written with `starfile.write(..., fixed_width=True)` the new values
+    are written directly over the old ones in a memory mapped file, the rest of
+    the file is not read or rewritten. If the file is not fixed width, a column
+    is missing or a new value is wider than its column the whole file is read,
+    updated and rewritten with `fixed_width=True`.
+
+    Parameters
+    ----------
+    filename: PathLike
+        STAR file to update.
+    block: str | None
+        Name of the loop block, may be `None` if the file contains a single loop block.
+    columns: dict[str, ArrayLike]
+        New values for each column, one per row of the loop block.
+    float_format: str | dict[str, str]
+        Float format string for new values, or a dictionary of format strings
+        per column name.
+    na_rep: str
+        Representation of null values.
+    quote_character: str
+        Quote character for strings containing whitespace.
+    lock: bool
+        Hold an exclusive advisory lock on `filename` while updating.
+
+    Returns
+    -------
+    in_place: bool
+        Whether the file was updated in place.
+    """
+    filename = Path(filename)
+    if not filename.exists():
+        raise FileNotFoundError(filename)
+    with file_lock(filename) if lock else nullcontext():
+        in_place = _update_in_place(
+            filename, block, columns, float_format, na_rep, quote_character
+        )
+        if not in_place:
+            _update_by_rewrite(
+                filename, block, columns, float_format, na_rep, quote_character
+            )
+    return in_place
+
+
+def _update_in_place(
+    filename: Path,
+    block: str | None,
+    columns: dict[str, ArrayLike],
+    float_format: FloatFormat,
+    na_rep: str,
+    quote_character: str,
+) -> bool:
+    with open(filename, 'r+b') as f, mmap.mmap(f.fileno(), 0) as mm:
+        info = resolve_loop_block(scan_buffer(mm, 0, len(mm)), block)
+        layout = fixed_width_layout(mm, info)
+        if layout is None or any(col not in info.column_names for col in columns):
+            return False
+
+        # format everything before modifying the file
+        new_fields: list[tuple[int, int, np.ndarray]] = []
+        for column_name, values in columns.items():
+            values = pd.Series(np.asarray(values))
+            if len(values) != layout.n_rows:
+                raise ValueError(
+                    f'expected {layout.n_rows} values for {column_name!r}, '
+                    f'got {len(values)}'
+                )
+            idx = info.column_names.index(column_name)
+            start, end = layout.field_starts[idx], layout.field_ends[idx]
+            field = _format_field(
+                values,
+                end - start,
+                column_float_format(float_format, column_name),
+                na_rep,
+                quote_character,
+            )
+            if field is None:
+                return False
+            new_fields.append((start, end, field))
+
+        rows = layout.rows(mm)
+        for start, end, field in new_fields:
+            rows[:, start:end] = field
+        del rows  # release the exported buffer before the mmap is closed
+        mm.flush()
+    return True
+
+
+def _format_field(
+    values: pd.Series,
+    width: int,
+    float_format: str,
+    na_rep: str,
+    quote_character: str,
+) -> np.ndarray | None:
+    """Format values right aligned as an (n, width) byte array, `None` if too wide."""
+    formatted = format_column(
+        values,
+        float_format=float_format,
+        na_rep=na_rep,
+        quote_character=quote_character,
+    )
+    if len(formatted) == 0:
+        return np.zeros((0, width), dtype=np.uint8)
+    if pc.max(pc.binary_length(formatted)).as_py() > width:
+        return None
+    if not pc.all(pc.string_is_ascii(formatted)).as_py():
+        return None
+    padded = pc.utf8_lpad(formatted, width, ' ')
+    text = pc.binary_join(
+        pa.LargeListArray.from_arrays([0, len(padded)], padded),
+        pa.scalar('', pa.large_string()),
+    )[0].as_py()
+    rows = np.frombuffer(text.encode('ascii'), dtype=np.uint8)
+    return rows.reshape(len(padded), width)
+
+
+def _update_by_rewrite(
+    filename: Path,
+    block: str | None,
+    columns: dict[str, ArrayLike],
+    float_format: FloatFormat,
+    na_rep: str,
+    quote_character: str,
+):
+    data = read(filename, always_dict=True)
+    if block is None:
+        loop_blocks = [
+            name for name, value in data.items() if isinstance(value, pd.DataFrame)
+        ]
+        if len(loop_blocks) != 1:
+            raise ValueError(
+                f'block must be specified, file contains {len(loop_blocks)} loop blocks'
+            )
+        block = loop_blocks[0]
+    df = data[block]
+    for column_name, values in columns.items():
+        values = np.asarray(values)
+        if len(values) != len(df):
+            raise ValueError(
+                f'expected {len(df)} values for {column_name!r}, got {len(values)}'
+            )
+        df[column_name] = values
+    write(
+        data,
+        filename,
+        float_format=float_format,
+        na_rep=na_rep,
+        quote_character=quote_character,
+        atomic=True,
+        fixed_width=True,
+    )
@@ -0,0 +1,203 @@
+"""Reading rows appended to a loop block while a file is written."""
+
+from __future__ import annotations
+
+import asyncio
+import hashlib
+import os
+import time
+from pathlib import Path
+from typing import TYPE_CHECKING, AsyncGenerator, Generator, Sequence
+
+from .parser import block_starts
+from .streaming import _parse_lines, resolve_loop_block, scan_blocks
+
+if TYPE_CHECKING:
+    from os import PathLike
+
+    import pandas as pd
+
+
+TAIL_SIZE = 4096
+
+
+class Follower:
+    """Incrementally read the rows appended to a loop block of a growing file.
+
+    The byte offset after the last complete row is remembered between polls,
+    each poll reads from there to the end of the file. A partially written
+    last line is left for the next poll. If the file is replaced, truncated,
+    its content before the rows changes or the bytes just before the offset,
+    i.e. the last rows read, change, the whole block is read again.
+    """
+
+    filename: Path
+    block: str | None
+    parse_as_string: Sequence[str]
+    offset: int | None
+
+    def __init__(
+        self,
+        filename: PathLike,
+        block: str | None = None,
+        parse_as_string: Sequence[str] = (),
+    ):
+        self.filename = Path(filename)
+        self.block = block
+        self.parse_as_string = parse_as_string
+        self.offset = None
+        self._inode = None
+        self._column_names = None
+        self._header_length = 0
+        self._header_digest = None
+        self._tail_digest = None
+
+    def poll(self) -> pd.DataFrame | None:
+        """Rows added since the last poll, `None` if there are none.
+
+        The first dataframe after the file was rewritten contains all rows of
+        the block and has `df.attrs['reset'] = True`.
+        """
+        try:
+            stat = os.stat(self.filename)
+        except FileNotFoundError:
+            return None
+        reset = False
+        if self.offset is not None and (
+            stat.st_ino != self._inode
+            or stat.st_size < self.offset
+            or not self._header_unchanged()
+            or not self._tail_unchanged()
+        ):
+            self.offset = None
+            reset = True
+        if self.offset is None and not self._locate_block(stat):
+            return None
+
+        with open(self.filename, 'rb') as f:
+            f.seek(self.offset)
+            new_data = f.read(stat.st_size - self.offset)
+        next_blocks = block_starts(new_data, 0, len(new_data))
+        if len(next_blocks) > 0:
+            new_data = new_data[:next_blocks[0]]
+        complete = new_data[:new_data.rfind(b'\n') + 1]
+        self.offset += len(complete)
+        self._tail_digest = self._digest_tail()
+
+        df = _parse_lines([complete], self._column_names, self.parse_as_string)
+        if df is None:
+            return None
+        df.attrs['reset'] = reset
+        return df
+
+    def _locate_block(self, stat: os.stat_result) -> bool:
+        try:
+            info = resolve_loop_block(scan_blocks(self.filename), self.block)
+        except (KeyError, ValueError):  # block not written yet
+            return False
+        if info.data_start == info.end:  # header may still be incomplete
+            return False
+        self.offset = info.data_start
+        self._inode = stat.st_ino
+        self._column_names = info.column_names
+        self._header_length = info.data_start
+        self._header_digest = self._digest()
+        self._tail_digest = self._digest_tail()
+        return True
+
+    def _header_unchanged(self) -> bool:
+        return self._digest() == self._header_digest
+
+    def _tail_unchanged(self) -> bool:
+        return self._digest_tail() == self._tail_digest
+
+    def _digest(self) -> bytes:
+        """Digest of the file up to the first row of the block."""
+        with open(self.filename, 'rb') as f:
+            return hashlib.sha1(f.read(self._header_length)).digest()
+
+    def _digest_tail(self) -> bytes:
+        """Digest of the last rows read, up to `TAIL_SIZE` bytes before the offset."""
+        start = max(self._header_length, self.offset - TAIL_SIZE)
+        with open(self.filename, 'rb') as f:
+            f.seek(start)
+            return hashlib.sha1(f.read(self.offset - start)).digest()
+
+
+def follow(
+    filename: PathLike,
+    block: str | None = None,
+    interval: float = 1.0,
+    timeout: float | None = None,
+    parse_as_string: Sequence[str] = (),
+) -> Generator[pd.DataFrame, None, None]:
+    """Yield rows as they are appended to a loop block of a growing STAR file.
+
+    The first dataframe contains the rows present when following starts,
+    later dataframes only the rows appended since. The file is polled every
+    `interval` seconds and only new bytes are read, so the cost of a poll does
+    not grow with the size of the file. Rows must each be on a single line.
+
+    If the file is replaced, truncated or rewritten, the block is read again
+    from the start, the first dataframe after this has `df.attrs['reset'] = True`.
+
+    Parameters
+    ----------
+    filename: PathLike
+        File to follow, need not exist yet.
+    block: str | None
+        Name of the loop block, may be omitted if the file contains a single loop block.
+    interval: float
+        Seconds between polls.
+    timeout: float | None
+        Stop after this many seconds without new rows, `None` follows forever.
+    parse_as_string: list[str]
+        A list of column names which will not be coerced to numeric values.
+    """
+    follower = Follower(filename, block=block, parse_as_string=parse_as_string)
+    last_rows = time.monotonic()
+    while True:
+        df = follower.poll()
+        if df is not None:
+            last_rows = time.monotonic()
+            yield df
+            continue
+        if timeout is not None and time.monotonic() - last_rows >= timeout:
+            return
+        time.sleep(interval)
+
+
+async def afollow(
+    filename: PathLike,
+    block: str | None = None,
+    interval: float = 1.0,
+    timeout: float | None = None,
+    parse_as_string: Sequence[str] = (),
+) -> AsyncGenerator[pd.DataFrame, None]:
+    """Asynchronous `starfile.follow`, polls run in the event loop's default executor.
+
+    Parameters
+    ----------
+    filename: PathLike
+        File to follow, need not exist yet.
+    block: str | None
+        Name of the loop block, may be omitted if the file contains a single loop block.
+    interval: float
+        Seconds between polls.
+    timeout: float | None
+        Stop after this many seconds without new rows, `None` follows forever.
+    parse_as_string: list[str]
+        A list of column names which will not be coerced to numeric values.
+    """
+    loop = asyncio.get_running_loop()
+    follower = Follower(filename, block=block, parse_as_string=parse_as_string)
+    last_rows = loop.time()
+    while True:
+        df = await loop.run_in_executor(None, follower.poll)
+        if df is not None:
+            last_rows = loop.time()
+            yield df
+            continue
+        if timeout is not None and loop.time() - last_rows >= timeout:
+            return
+        await asyncio.sleep(interval)
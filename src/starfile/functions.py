@@ -1,25 +1,41 @@
 from __future__ import annotations
 
-from typing import TYPE_CHECKING, Dict, List, Union, Optional
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import nullcontext
+from typing import TYPE_CHECKING, Dict, List, Optional, Sequence, Union
 
-if TYPE_CHECKING:
-    import pandas as pd
-    from os import PathLike
-
-from .parser import StarParser
-from .writer import StarWriter
-from .typing import DataBlock
+from .cache import _block_cache
+from .parser import (
+    StarParser,
+    empty_loop_dataframe,
+    parse_loop_data,
+    parse_loop_data_arrow,
+    parse_loop_data_parallel,
+    parse_simple_block,
+)
+from .passthrough import BlockSource, SourcedBlocks
+from .stacks import split_stack_columns
+from .streaming import scan_blocks
+from .utils import atomic_open, file_lock, import_polars, is_loop_block
+from .writer import StarWriter, format_many
 
 if TYPE_CHECKING:
-    import pandas as pd
     from os import PathLike
 
+    from .typing import DataBlock, FloatFormat, Header
+
 
 def read(
     filename: PathLike,
     read_n_blocks: Optional[int] = None,
     always_dict: bool = False,
-    parse_as_string: List[str] = []
+    parse_as_string: Sequence[str] = (),
+    lock: bool = False,
+    cache: bool = False,
+    n_threads: int = 1,
+    backend: str = 'pandas',
+    split_stacks: bool | list[str] = False,
+    keep_source: bool = False,
 ) -> Union[DataBlock, Dict[DataBlock]]:
     """Read data from a STAR file.
 
@@ -39,22 +55,138 @@ def read(
         Always return a dictionary, even when only a single data block is present.
     parse_as_string: list[str]
         A list of keys or column names which will not be coerced to numeric values.
+    lock: bool
+        Hold a shared advisory lock while reading, waits for writers using `lock=True`.
+    cache: bool
+        Serve repeated reads of an unchanged file from a process wide cache of
+        parsed data blocks. Each call returns its own copy of the data.
+        See `starfile.cache_info` and `starfile.set_cache_size`.
+    n_threads: int
+        Number of threads used to parse each large loop block, the rows are split
+        into ranges of lines which are parsed concurrently. The result is
+        identical for any number of threads.
+    backend: str
+        `'pandas'` or `'polars'`, the type of dataframe returned for loop blocks.
+        The polars backend requires the optional polars dependency, simple blocks
+        are returned as dictionaries for either backend. Loop blocks with a single
+        tab or space between values, such as those written by `starfile.write`,
+        are parsed straight into arrow memory for polars. Other loop blocks, e.g.
+        with aligned columns or quoted values, are parsed with pandas and
+        converted.
+    split_stacks: bool | list[str]
+        Split columns of `index@stack` image references, such as `rlnImageName`,
+        into an integer `<name>@index` column and a categorical `<name>@stack`
+        column. `True` splits every column in which all values are such
+        references, a list names the columns to split. Columns are split after
+        the block has been parsed, so parsing needs as much memory as without
+        splitting. For pandas the split is recorded in `df.attrs` and
+        `starfile.write` joins the pairs back into a single column, for polars
+        pass `join_stacks=True` to `starfile.write`.
+    keep_source: bool
+        Remember the location of each data block in the file. `starfile.write`
+        copies blocks which have not been modified byte for byte rather than
+        formatting them again, preserving their original formatting. Always
+        returns a dictionary.
     """
-    parser = StarParser(filename, n_blocks_to_read=read_n_blocks, parse_as_string=parse_as_string)
-    if len(parser.data_blocks) == 1 and always_dict is False:
-        return list(parser.data_blocks.values())[0]
+    if backend not in ('pandas', 'polars'):
+        raise ValueError(f"backend must be 'pandas' or 'polars', got {backend!r}")
+    if keep_source and backend != 'pandas':
+        raise ValueError("keep_source is only supported for backend='pandas'")
+
+    def parse():
+        if backend == 'polars':
+            return parse_polars(filename, read_n_blocks, parse_as_string, n_threads)
+        return StarParser(
+            filename,
+            n_blocks_to_read=read_n_blocks,
+            parse_as_string=parse_as_string,
+            n_threads=n_threads,
+        ).data_blocks
+
+    with file_lock(filename, shared=True) if lock else nullcontext():
+        if cache:
+            options = (read_n_blocks, tuple(parse_as_string), backend)
+            data_blocks = _block_cache.get_or_parse(filename, options, parse)
+        else:
+            data_blocks = parse()
+    if split_stacks is not False:
+        data_blocks = {
+            name: (
+                split_stack_columns(block, split_stacks)
+                if is_loop_block(block) else block
+            )
+            for name, block in data_blocks.items()
+        }
+    if keep_source:
+        locations = scan_blocks(filename)
+        sources = {
+            name: BlockSource(
+                filename, locations[name].start, locations[name].end, block
+            )
+            for name, block in data_blocks.items()
+            if name in locations
+        }
+        return SourcedBlocks(data_blocks, sources)
+    if len(data_blocks) == 1 and always_dict is False:
+        return next(iter(data_blocks.values()))
     else:
-        return parser.data_blocks
+        return data_blocks
+
+
+def parse_polars(
+    filename: PathLike,
+    n_blocks_to_read: int | None = None,
+    parse_as_string: Sequence[str] = (),
+    n_threads: int = 1,
+) -> dict[str, DataBlock]:
+    """Parse the data blocks of a STAR file with loop blocks as polars dataframes.
+
+    Loop blocks accepted by `parse_loop_data_arrow` are parsed into arrow memory
+    which polars wraps, other loop blocks are parsed with pandas and converted.
+    """
+    polars = import_polars()
+    data_blocks = {}
+    with open(filename, 'rb') as file:
+        for info in list(scan_blocks(filename).values())[:n_blocks_to_read]:
+            if not info.is_loop:
+                file.seek(info.start)
+                text = file.read(info.end - info.start).decode()
+                data_blocks[info.name] = parse_simple_block(text, parse_as_string)
+                continue
+            file.seek(info.data_start)
+            loop_data = file.read(info.end - info.data_start)
+            table = parse_loop_data_arrow(
+                loop_data, info.column_names, parse_as_string, use_threads=n_threads > 1
+            )
+            if table is not None:
+                data_blocks[info.name] = polars.from_arrow(table)
+                continue
+            if loop_data.strip() == b'':
+                df = empty_loop_dataframe(info.column_names)
+            elif n_threads > 1:
+                df = parse_loop_data_parallel(
+                    loop_data, info.column_names, parse_as_string, n_threads
+                )
+            else:
+                df = parse_loop_data(loop_data, info.column_names, parse_as_string)
+            data_blocks[info.name] = polars.from_pandas(df)
+    return data_blocks
 
 
 def write(
     data: Union[DataBlock, Dict[str, DataBlock], List[DataBlock]],
     filename: PathLike,
-    float_format: str = '%.6f',
+    float_format: FloatFormat = '%.6f',
     sep: str = '\t',
     na_rep: str = '<NA>',
     quote_character: str = '"',
     quote_all_strings: bool = False,
+    n_threads: int = 1,
+    header: Header = 'timestamp',
+    atomic: bool = False,
+    lock: bool = False,
+    fixed_width: bool = False,
+    join_stacks: bool | list[str] | None = None,
     **kwargs
 ):
     """Write data to disk in the STAR format.
@@ -66,12 +198,36 @@ def write(
         If a dictionary of datablocks are passed the keys will be the data block names.
     filename: PathLike
         Path where the file will be saved.
-    float_format: str
-        Float format string which will be passed to pandas.
+    float_format: str | dict[str, str]
+        Float format string e.g. `'%.6f'`, or a dictionary of format strings per
+        column name. Columns missing from the dictionary use `'%.6f'`.
     sep: str
         Separator between values, will be passed to pandas.
     na_rep: str
         Representation of null values, will be passed to pandas.
+    n_threads: int
+        Number of threads used to format loop blocks. Output is identical for
+        any number of threads.
+    header: str | Callable[[], str] | None
+        Comment at the top of the file. `'timestamp'` records the package version
+        and the current time, `'static'` only the package version so that identical
+        data gives identical bytes. A callable returns custom comment text,
+        `None` omits the comment.
+    atomic: bool
+        Write to a temporary file in the same directory which is synced to disk
+        and renamed over `filename`, readers never see a partially written file.
+    lock: bool
+        Hold an exclusive advisory lock on `filename` while writing.
+    fixed_width: bool
+        Right align the values of each loop block column to a common width. Columns
+        of files written this way can be updated in place with
+        `starfile.update_columns`.
+    join_stacks: bool | list[str] | None
+        Join `<name>@index` and `<name>@stack` column pairs into `index@stack`
+        references. By default only pairs split by `starfile.read(...,
+        split_stacks=...)` into pandas dataframes are joined, `True` joins every
+        pair and a list names the pairs to join. Polars dataframes cannot record
+        the split, pass the names or `True` to join their pairs.
     """
     StarWriter(
         data,
@@ -81,16 +237,25 @@ def write(
         separator=sep,
         quote_character=quote_character,
         quote_all_strings=quote_all_strings,
+        n_threads=n_threads,
+        header=header,
+        atomic=atomic,
+        lock=lock,
+        fixed_width=fixed_width,
+        join_stacks=join_stacks,
     ).write()
 
 
 def to_string(
     data: Union[DataBlock, Dict[str, DataBlock], List[DataBlock]],
-    float_format: str = '%.6f',
+    float_format: FloatFormat = '%.6f',
     sep: str = '\t',
     na_rep: str = '<NA>',
     quote_character: str = '"',
     quote_all_strings: bool = False,
+    n_threads: int = 1,
+    header: Header = 'timestamp',
+    join_stacks: bool | list[str] | None = None,
     **kwargs
 ):
     """Represent data in the STAR format.
@@ -100,12 +265,27 @@ def to_string(
     data: DataBlock | Dict[str, DataBlock] | List[DataBlock]
         Data to represent. DataBlocks are dictionaries or dataframes.
         If a dictionary of datablocks are passed the keys will be the data block names.
-    float_format: str
-        Float format string which will be passed to pandas.
+    float_format: str | dict[str, str]
+        Float format string e.g. `'%.6f'`, or a dictionary of format strings per
+        column name. Columns missing from the dictionary use `'%.6f'`.
     sep: str
         Separator between values, will be passed to pandas.
     na_rep: str
         Representation of null values, will be passed to pandas.
+    n_threads: int
+        Number of threads used to format loop blocks. Output is identical for
+        any number of threads.
+    header: str | Callable[[], str] | None
+        Comment at the top of the file. `'timestamp'` records the package version
+        and the current time, `'static'` only the package version so that identical
+        data gives identical bytes. A callable returns custom comment text,
+        `None` omits the comment.
+    join_stacks: bool | list[str] | None
+        Join `<name>@index` and `<name>@stack` column pairs into `index@stack`
+        references. By default only pairs split by `starfile.read(...,
+        split_stacks=...)` into pandas dataframes are joined, `True` joins every
+        pair and a list names the pairs to join. Polars dataframes cannot record
+        the split, pass the names or `True` to join their pairs.
     """
     writer = StarWriter(
         data,
@@ -115,5 +295,86 @@ def to_string(
         separator=sep,
         quote_character=quote_character,
         quote_all_strings=quote_all_strings,
+        n_threads=n_threads,
+        header=header,
+        join_stacks=join_stacks,
     )
     return writer.to_string()
+
+
+def write_many(
+    files: dict[PathLike, DataBlock | dict[str, DataBlock] | list[DataBlock]],
+    workers: int = 8,
+    float_format: FloatFormat = '%.6f',
+    sep: str = '\t',
+    na_rep: str = '<NA>',
+    quote_character: str = '"',
+    quote_all_strings: bool = False,
+    header: Header = 'timestamp',
+    atomic: bool = False,
+    join_stacks: bool | list[str] | None = None,
+) -> dict[PathLike, Exception]:
+    """Write many STAR files concurrently, e.g. one small file per micrograph.
+
+    Files are formatted together before any is written, see
+    `starfile.writer.format_many`: loop blocks with the same columns and dtypes
+    are formatted in one pass rather than once per file, which dominates the
+    time taken for small files. Each file is then written with a single write
+    call by a pool of `workers` threads, so that the latency of a network file
+    system overlaps. A failure to write one file does not stop the others.
+
+    Parameters
+    ----------
+    files: dict[PathLike, DataBlock | dict[str, DataBlock] | list[DataBlock]]
+        Data to write, keyed by the path of each file.
+    workers: int
+        Number of files written concurrently.
+    float_format: str | dict[str, str]
+        Float format string e.g. `'%.6f'`, or a dictionary of format strings per
+        column name.
+    sep: str
+        Separator between values.
+    na_rep: str
+        Representation of null values.
+    quote_character: str
+        Quote character used for strings which need quoting.
+    quote_all_strings: bool
+        Quote all strings, not only those which need quoting.
+    header: str | Callable[[], str] | None
+        Comment at the top of each file, see `starfile.write`.
+    atomic: bool
+        Write each file atomically, see `starfile.write`.
+    join_stacks: bool | list[str] | None
+        Stack column pairs to join, see `starfile.write`.
+
+    Returns
+    -------
+    failures: dict[PathLike, Exception]
+        The exception raised for each file which could not be written, empty
+        if all files were written.
+    """
+    texts, failures = format_many(
+        files,
+        float_format=float_format,
+        separator=sep,
+        na_rep=na_rep,
+        quote_character=quote_character,
+        quote_all_strings=quote_all_strings,
+        header=header,
+        join_stacks=join_stacks,
+    )
+
+    def write_one(filename: PathLike, text: str):
+        with (atomic_open if atomic else open)(filename, 'w') as file:
+            file.write(text)
+
+    with ThreadPoolExecutor(max_workers=workers) as executor:
+        futures = {
+            executor.submit(write_one, filename, text): filename
+            for filename, text in texts.items()
+        }
+        for future, filename in futures.items():
+            exception = future.exception()
+            if exception is not None:
+                failures[filename] = exception
+    return failures
@@ -0,0 +1,171 @@
+"""Iterating over groups of rows of a loop block."""
+
+from __future__ import annotations
+
+import tempfile
+from pathlib import Path
+from typing import TYPE_CHECKING, Any, Generator, Sequence
+
+import numpy as np
+import pandas as pd
+import pyarrow as pa
+import pyarrow.ipc
+
+from .streaming import iter_chunks, iter_column_chunks
+from .utils import iter_runs
+
+if TYPE_CHECKING:
+    from os import PathLike
+
+
+def iter_groups(
+    filename: PathLike,
+    block: str | None = None,
+    by: str = 'rlnMicrographName',
+    contiguous: bool | None = None,
+    chunksize: int = 100_000,
+    parse_as_string: Sequence[str] = (),
+) -> Generator[tuple[Any, pd.DataFrame], None, None]:
+    """Iterate over groups of rows of a loop block sharing a value of `by`.
+
+    Yields `(key, dataframe)` pairs like `DataFrame.groupby(by, sort=False)`
+    without holding the whole table in memory. When the rows of each group are
+    contiguous in the file, groups are streamed and each is yielded as soon as
+    its last row has been read. Otherwise chunks are sorted by key and spilled
+    to disk, groups are then gathered from the spilled chunks in order of first
+    appearance.
+
+    Whether groups are contiguous can only be known once every key has been
+    seen. With `contiguous=None` the file is first read parsing only the `by`
+    column, pass `contiguous=True` for files known to be grouped to stream
+    groups from the first row.
+
+    Parameters
+    ----------
+    filename: PathLike
+        File from which to read data.
+    block: str | None
+        Name of the loop block, may be omitted if the file contains a single loop block.
+    by: str
+        Column by which rows are grouped.
+    contiguous: bool | None
+        Whether the rows of each group are contiguous. `None` checks the `by`
+        column of the file first, `True` skips the check and raises a
+        `ValueError` if a group is found to be split, `False` always sorts on disk.
+    chunksize: int
+        Maximum number of rows read at a time.
+    parse_as_string: list[str]
+        A list of column names which will not be coerced to numeric values.
+    """
+    def chunks():
+        return iter_chunks(
+            filename, block=block, chunksize=chunksize, parse_as_string=parse_as_string
+        )
+
+    if contiguous is None:
+        contiguous = _is_contiguous(
+            iter_column_chunks(filename, block, by, chunksize, parse_as_string), by
+        )
+    if contiguous:
+        yield from _iter_contiguous_groups(chunks(), by)
+    else:
+        yield from _iter_sorted_groups(chunks(), by)
+
+
+def _is_contiguous(chunks, by: str) -> bool:
+    finished = set()
+    current = None
+    for key, _, continues in iter_runs(chunks, by):
+        if continues:
+            continue
+        if current is not None:
+            finished.add(_hashable_key(current))
+        if _hashable_key(key) in finished:
+            return False
+        current = key
+    return True
+
+
+def _hashable_key(key):
+    return None if pd.isna(key) else key
+
+
+def _iter_contiguous_groups(chunks, by: str):
+    finished = set()
+    current_key, current_parts = None, []
+    for key, df, continues in iter_runs(chunks, by):
+        if continues:
+            current_parts.append(df)
+            continue
+        if current_parts:
+            yield current_key, _concat(current_parts)
+            finished.add(_hashable_key(current_key))
+        if _hashable_key(key) in finished:
+            raise ValueError(
+                f'rows with {by}={key!r} are not contiguous, use contiguous=False'
+            )
+        current_key, current_parts = key, [df]
+    if current_parts:
+        yield current_key, _concat(current_parts)
+
+
+def _iter_sorted_groups(chunks, by: str):
+    with tempfile.TemporaryDirectory(prefix='starfile-groups-') as directory:
+        paths: list[Path] = []
+        keys: dict[Any, Any] = {}  # hashable key -> key, in order of first appearance
+        # hashable key -> (spilled chunk, start, stop) of its rows in each chunk
+        locations: dict[Any, list[tuple[int, int, int]]] = {}
+        for idx, df in enumerate(chunks):
+            codes, uniques = pd.factorize(df[by], use_na_sentinel=False)
+            order = np.argsort(codes, kind='stable')
+            counts = np.bincount(codes, minlength=len(uniques))
+            offsets = np.r_[0, np.cumsum(counts)].tolist()
+            for code, key in enumerate(uniques):
+                hashable_key = _hashable_key(key)
+                keys.setdefault(hashable_key, key)
+                locations.setdefault(hashable_key, []).append(
+                    (idx, offsets[code], offsets[code + 1])
+                )
+
+            path = Path(directory) / f'{idx}.arrow'
+            table = pa.Table.from_pandas(df.take(order), preserve_index=False)
+            with pa.OSFile(str(path), 'wb') as sink:
+                with pa.ipc.new_file(sink, table.schema) as writer:
+                    writer.write_table(table)
+            paths.append(path)
+
+        tables = []
+        for path in paths:
+            with pa.memory_map(str(path), 'r') as source:
+                tables.append(pa.ipc.open_file(source).read_all())
+        for hashable_key, key in keys.items():
+            parts = [
+                tables[idx].slice(start, stop - start)
+                for idx, start, stop in locations[hashable_key]
+            ]
+            yield key, _gather(parts)
+
+
+def _gather(parts: list[pa.Table]) -> pd.DataFrame:
+    """Concatenate the parts of a group, converting to pandas once where possible."""
+    try:
+        table = pa.concat_tables(parts, promote_options='permissive')
+    # e.g. numbers in one chunk, strings in another
+    except (pa.ArrowInvalid, pa.ArrowTypeError):
+        return _concat([_to_pandas(part) for part in parts])
+    return _to_pandas(table)
+
+
+def _to_pandas(table: pa.Table) -> pd.DataFrame:
+    """Convert a spilled chunk back to a dataframe, null strings become NaN."""
+    df = table.to_pandas()
+    for col in df.columns:
+        if pd.api.types.is_object_dtype(df[col].dtype) and df[col].isna().any():
+            df[col] = df[col].where(df[col].notna(), np.nan)
+    return df
+
+
+def _concat(parts: list[pd.DataFrame]) -> pd.DataFrame:
+    if len(parts) == 1:
+        return parts[0].reset_index(drop=True)
+    return pd.concat(parts, ignore_index=True)
@@ -0,0 +1,53 @@
+"""Hashes of the content of STAR files, ignoring comments and layout whitespace."""
+
+from __future__ import annotations
+
+import hashlib
+import re
+from pathlib import Path
+from typing import TYPE_CHECKING
+
+if TYPE_CHECKING:
+    from os import PathLike
+
+# comment lines, blank lines and whitespace at either end of a line
+_IGNORED_BYTES = re.compile(rb'(?m)^[ \t]*(?:#[^\n]*)?\r?\n|^[ \t]+|[ \t\r]+$')
+
+
+def content_hash(
+    filename: PathLike,
+    algorithm: str = 'sha256',
+    chunksize: int = 2 ** 24,
+) -> str:
+    """Hash the content of a STAR file, ignoring comments and layout whitespace.
+
+    The file is hashed as it is on disk, data are not parsed or reformatted.
+    Full line comments (such as the header written by `starfile.write`),
+    blank lines, whitespace at the start and end of lines and line endings
+    do not change the hash.
+
+    Parameters
+    ----------
+    filename: PathLike
+        File to hash.
+    algorithm: str
+        Name of a hash algorithm provided by `hashlib`.
+    chunksize: int
+        Number of bytes read at a time.
+    """
+    filename = Path(filename)
+    if not filename.exists():
+        raise FileNotFoundError(filename)
+    digest = hashlib.new(algorithm)
+    remainder = b''
+    with open(filename, 'rb') as f:
+        while True:
+            chunk = f.read(chunksize)
+            if len(chunk) == 0:
+                break
+            chunk = remainder + chunk
+            last_newline = chunk.rfind(b'\n')
+            chunk, remainder = chunk[:last_newline + 1], chunk[last_newline + 1:]
+            digest.update(_IGNORED_BYTES.sub(b'', chunk))
+    digest.update(_IGNORED_BYTES.sub(b'', remainder + b'\n'))
+    return digest.hexdigest()
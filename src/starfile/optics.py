@@ -0,0 +1,133 @@
+"""Splitting and joining the optics groups of RELION files."""
+
+from __future__ import annotations
+
+from typing import TYPE_CHECKING, Sequence
+
+import numpy as np
+import pandas as pd
+
+from .functions import read
+
+if TYPE_CHECKING:
+    from os import PathLike
+
+    from .typing import DataBlock
+
+
+def join_optics(
+    data: PathLike | dict[str, DataBlock],
+    columns: Sequence[str] | None = None,
+    optics_block: str = 'optics',
+    particles_block: str = 'particles',
+    on: str = 'rlnOpticsGroup',
+    categorical: bool = True,
+) -> pd.DataFrame:
+    """Attach per optics group values to each particle.
+
+    Equivalent to `particles.merge(optics, on='rlnOpticsGroup', how='left')`
+    without building a merged copy of the particles table. Each particle is
+    mapped to the row of its optics group once, selected optics columns are then
+    gathered with that integer index. The particle columns are shared with the
+    input dataframe rather than copied.
+
+    Parameters
+    ----------
+    data: PathLike | dict[str, DataBlock]
+        STAR file or data blocks as returned by `starfile.read`.
+    columns: list[str] | None
+        Optics columns to attach, defaults to all optics columns.
+    optics_block: str
+        Name of the optics data block.
+    particles_block: str
+        Name of the particles data block.
+    on: str
+        Column containing the optics group of each particle.
+    categorical: bool
+        Attach string columns as categoricals, storing one small integer code
+        per particle instead of a python string.
+    """
+    if not isinstance(data, dict):
+        data = read(data, always_dict=True)
+    optics, particles = data[optics_block], data[particles_block]
+    if columns is None:
+        columns = [col for col in optics.columns if col != on]
+    overlap = [col for col in columns if col in particles.columns]
+    if overlap:
+        raise ValueError(f'columns already present in {particles_block!r}: {overlap}')
+    if not optics[on].is_unique:
+        raise ValueError(f'optics groups in {optics_block!r} are not unique')
+
+    # row in optics table for each particle, -1 where the group is missing
+    indexer = pd.Index(optics[on]).get_indexer(particles[on])
+    missing = indexer == -1
+
+    df = particles.copy(deep=False)
+    for col in columns:
+        values = optics[col]
+        if categorical and pd.api.types.is_object_dtype(values.dtype):
+            df[col] = _categorical_take(values, indexer)
+        else:
+            taken = values.to_numpy()[indexer]
+            if missing.any():
+                taken = np.where(missing, np.nan, taken)
+            df[col] = taken
+    return df
+
+
+def _categorical_take(values: pd.Series, indexer: np.ndarray) -> pd.Categorical:
+    categories = pd.Index(values.unique())
+    group_codes = categories.get_indexer(values)
+    codes = np.where(indexer == -1, -1, group_codes[indexer])
+    return pd.Categorical.from_codes(codes, categories=categories)
+
+
+def split_optics(
+    df: pd.DataFrame,
+    columns: Sequence[str],
+    optics_block: str = 'optics',
+    particles_block: str = 'particles',
+    on: str = 'rlnOpticsGroup',
+) -> dict[str, pd.DataFrame]:
+    """Split a flat particles table into optics and particles data blocks.
+
+    The inverse of `join_optics`, the result can be passed to `starfile.write`.
+    Each of `columns` must take a single value per optics group.
+
+    Parameters
+    ----------
+    df: pd.DataFrame
+        Particles table containing per optics group columns.
+    columns: list[str]
+        Columns to move into the optics block.
+    optics_block: str
+        Name of the optics data block.
+    particles_block: str
+        Name of the particles data block.
+    on: str
+        Column containing the optics group of each particle.
+    """
+    columns = [col for col in columns if col != on]
+    groups = df[on]
+    first_rows = np.flatnonzero(~groups.duplicated().to_numpy())
+    optics = df[[on, *columns]].iloc[first_rows].reset_index(drop=True)
+
+    # each particle must agree with the first particle of its group
+    indexer = pd.Index(optics[on]).get_indexer(groups)
+    for col in columns:
+        expected = optics[col].to_numpy()[indexer]
+        actual = df[col].to_numpy()
+        same = (expected == actual) | (pd.isna(expected) & pd.isna(actual))
+        if not same.all():
+            raise ValueError(
+                f'column {col!r} takes more than one value per optics group'
+            )
+
+    if isinstance(optics[on].dtype, pd.CategoricalDtype):
+        optics[on] = optics[on].astype(optics[on].cat.categories.dtype)
+    for col in columns:
+        if isinstance(optics[col].dtype, pd.CategoricalDtype):
+            optics[col] = optics[col].astype(object)
+    optics = optics.sort_values(on, ignore_index=True)
+    particles = df.drop(columns=columns)
+    return {optics_block: optics, particles_block: particles}
@@ -1,15 +1,22 @@
 from __future__ import annotations
 
+import csv
 import linecache
+from bisect import bisect_left
 from collections import deque
-from io import StringIO
+from concurrent.futures import ThreadPoolExecutor
+from io import BytesIO, StringIO
 from linecache import getline
-import shlex
+import re
+import warnings
 
 import numpy as np
 import pandas as pd
+import pyarrow as pa
+import pyarrow.compute as pc
+import pyarrow.csv as pa_csv
 from pathlib import Path
-from typing import TYPE_CHECKING, Union, Optional, Dict, Tuple, List
+from typing import TYPE_CHECKING, Dict, Optional, Sequence, Tuple, Union
 
 from starfile.typing import DataBlock
 
@@ -22,14 +29,17 @@ class StarParser:
     n_lines_in_file: int
     n_blocks_to_read: int
     current_line_number: int
+    block_start_lines: list[int]
     data_blocks: Dict[DataBlock]
-    parse_as_string: List[str]
+    parse_as_string: Sequence[str]
+    n_threads: int
 
     def __init__(
         self,
         filename: PathLike,
         n_blocks_to_read: Optional[int] = None,
-        parse_as_string: List[str] = [],
+        parse_as_string: Sequence[str] = (),
+        n_threads: int = 1,
     ):
         # set filename, with path checking
         filename = Path(filename)
@@ -40,8 +50,10 @@ class StarParser:
         # setup for parsing
         self.data_blocks = {}
         self.n_lines_in_file = count_lines(self.filename)
+        self.block_start_lines = block_start_lines(self.filename)
         self.n_blocks_to_read = n_blocks_to_read
         self.parse_as_string = parse_as_string
+        self.n_threads = n_threads
 
         # parse file
         self.current_line_number = 0
@@ -56,7 +68,7 @@ class StarParser:
         while self.current_line_number <= self.n_lines_in_file:
             if len(self.data_blocks) == self.n_blocks_to_read:
                 break
-            elif self.current_line.startswith('data_'):
+            elif is_block_header(self.current_line):
                 block_name, block = self._parse_data_block()
                 self.data_blocks[block_name] = block
             else:
@@ -77,10 +89,10 @@ class StarParser:
     def _parse_simple_block(self) -> Dict[str, Union[str, int, float]]:
         block = {}
         while self.current_line_number <= self.n_lines_in_file:
-            if self.current_line.startswith('data'):
+            if is_block_header(self.current_line):
                 break
             elif self.current_line.startswith('_'):  # '_foo bar'
-                k, v = shlex.split(self.current_line)
+                k, v = tokenize(self.current_line)
                 column_name = k[1:]
                 parse_column_as_string = (
                     self.parse_as_string is not None
@@ -109,46 +121,408 @@ class StarParser:
             if self.current_line_number > self.n_lines_in_file:
                 break
 
-        # now parse the loop block data
-        loop_data = deque()
-        while self.current_line_number <= self.n_lines_in_file:
-            if self.current_line.startswith('data_'):
-                break
-            loop_data.append(self.current_line)
-            self.current_line_number += 1
-        loop_data = '\n'.join(loop_data)
+        # now parse the loop block data, up to the start of the next block
+        next_block = bisect_left(self.block_start_lines, self.current_line_number)
+        if next_block < len(self.block_start_lines):
+            end = self.block_start_lines[next_block]
+        else:
+            end = self.n_lines_in_file + 1
+        lines = linecache.getlines(str(self.filename))
+        loop_data = '\n'.join(
+            line.strip() for line in lines[self.current_line_number - 1:end - 1]
+        )
+        self.current_line_number = max(end, self.current_line_number)
         if loop_data[-2:] != '\n':
             loop_data += '\n'
 
         # put string data into a dataframe
         if loop_data.startswith('\n'):
-            n_cols = len(loop_column_names)
-            df = pd.DataFrame(np.zeros(shape=(0, n_cols)))
-            df.columns = loop_column_names
+            return empty_loop_dataframe(loop_column_names)
+        if self.n_threads > 1:
+            return parse_loop_data_parallel(
+                loop_data, loop_column_names, self.parse_as_string, self.n_threads
+            )
+        return parse_loop_data(loop_data, loop_column_names, self.parse_as_string)
+
+
+def empty_loop_dataframe(column_names: Sequence[str]) -> pd.DataFrame:
+    """Empty dataframe for a loop block with no rows."""
+    df = pd.DataFrame(np.zeros(shape=(0, len(column_names))))
+    df.columns = column_names
+    return df
+
+
+def parse_loop_data(
+    loop_data: str | bytes,
+    column_names: Sequence[str],
+    parse_as_string: Sequence[str] = (),
+    usecols: Sequence[str] | None = None,
+) -> pd.DataFrame:
+    """Parse the text of loop block rows into a dataframe.
+
+    Columns are numericised where possible, columns named in `parse_as_string`
+    are kept as strings. Rows are split by the C parser of `pandas.read_csv`
+    where it splits them exactly as the STAR grammar does, otherwise values are
+    first separated by regular expressions equivalent to `tokenize`. Either way
+    `pandas.read_csv` converts the values, so types do not depend on quoting.
+    If `usecols` is given only those columns are returned, the other columns
+    are not converted at all.
+    """
+    column_names = list(column_names)
+    usecols = column_names if usecols is None else list(usecols)
+    column_name_to_index = {col: idx for idx, col in enumerate(column_names)}
+    quote_character = csv_quote_character(loop_data)
+    if quote_character is None:
+        # one value per field of a stream which read_csv splits without rules
+        tokenized = _tokenized_buffer(loop_data, len(column_names))
+        if tokenized is None:
+            return empty_loop_dataframe(usecols)
+        buffer, field_separator, row_separator = tokenized
+        csv_options = {
+            'delimiter': field_separator,
+            'lineterminator': row_separator,
+            'quoting': csv.QUOTE_NONE,
+            'skip_blank_lines': False,
+        }
+    else:
+        if isinstance(loop_data, bytes):
+            buffer = BytesIO(loop_data)
         else:
-            column_name_to_index = {col: idx for idx, col in enumerate(loop_column_names)}
-            df = pd.read_csv(
-                StringIO(loop_data.replace("'", '"')),
-                delimiter=r'\s+',
-                header=None,
-                comment='#',
-                dtype={column_name_to_index[k]: str for k in self.parse_as_string if k in loop_column_names},
-                keep_default_na=False,
-                na_values=['nan','NaN','<NA>'],
-                engine='c',
+            buffer = StringIO(loop_data)
+        csv_options = {
+            'delimiter': r'\s+', 'comment': '#', 'quotechar': quote_character
+        }
+    try:
+        df = pd.read_csv(
+            buffer,
+            header=None,
+            dtype={
+                column_name_to_index[k]: str
+                for k in parse_as_string if k in column_names
+            },
+            keep_default_na=False,
+            na_values=NA_VALUES,
+            engine='c',
+            usecols=None if usecols == column_names else [
+                column_name_to_index[col] for col in usecols
+            ],
+            **csv_options,
+        )
+    except pd.errors.EmptyDataError:  # only comments/whitespace
+        return empty_loop_dataframe(usecols)
+    if usecols != column_names:  # read_csv returns columns in file order
+        df = df[[column_name_to_index[col] for col in usecols]]
+    df.columns = usecols
+
+    # read_csv infers types in blocks of rows, a column with numbers in some
+    # blocks and text in others is parsed again as text throughout
+    mixed = [
+        col for col in usecols
+        if col not in parse_as_string
+        and pd.api.types.is_object_dtype(df[col].dtype)
+        and pd.api.types.infer_dtype(df[col], skipna=True).startswith('mixed')
+    ]
+    if mixed:
+        return parse_loop_data(
+            loop_data, column_names, [*parse_as_string, *mixed], usecols
+        )
+
+    # Numericise all columns in temporary copy
+    df_numeric = df.apply(_apply_numeric)
+
+    # Replace columns that are all NaN with the original columns
+    df_numeric[df_numeric.columns[df_numeric.isna().all()]] = df[df_numeric.columns[df_numeric.isna().all()]]
+
+    # Replace columns that should be strings
+    for col in df.columns:
+        df[col] = df_numeric[col] if col not in parse_as_string else df[col]
+    return df
+
+
+def parse_loop_data_parallel(
+    loop_data: str | bytes,
+    column_names: Sequence[str],
+    parse_as_string: Sequence[str] = (),
+    n_threads: int = 2,
+) -> pd.DataFrame:
+    """Parse loop block rows in `n_threads` ranges of lines concurrently.
+
+    Gives the same result as `parse_loop_data`. Each range is parsed with the
+    same rules and column types are reconciled when the ranges are
+    concatenated, e.g. a column of integers in one range and floats in another
+    is float. Data with multi-line text fields or too few rows to be worth
+    splitting are parsed in one piece.
+    """
+    column_names = list(column_names)
+    ranges = split_lines(loop_data, n_threads, min_size=MIN_BYTES_PER_THREAD)
+    has_text_fields = loop_data[:1] in (';', b';') or (
+        (b'\n;' if isinstance(loop_data, bytes) else '\n;') in loop_data
+    )
+    if len(ranges) == 1 or has_text_fields:
+        return parse_loop_data(loop_data, column_names, parse_as_string)
+
+    pieces = [loop_data[start:end] for start, end in ranges]
+    with ThreadPoolExecutor(len(pieces)) as executor:
+        dfs = list(executor.map(
+            lambda piece: parse_loop_data(piece, column_names, parse_as_string), pieces
+        ))
+
+    non_empty = [idx for idx, df in enumerate(dfs) if len(df) > 0] or [0]
+    pieces, dfs = [pieces[idx] for idx in non_empty], [dfs[idx] for idx in non_empty]
+
+    # a column with non numeric values in any range is kept as strings throughout
+    for col in column_names:
+        if col in parse_as_string:
+            continue
+        is_string = [
+            pd.api.types.is_object_dtype(df[col].dtype) and df[col].notna().any()
+            for df in dfs
+        ]
+        if any(is_string) and not all(is_string):
+            for idx, piece in enumerate(pieces):
+                if not is_string[idx]:
+                    raw = parse_loop_data(piece, column_names, [*parse_as_string, col])
+                    dfs[idx][col] = raw[col]
+    return pd.concat(dfs, ignore_index=True)
+
+
+def parse_loop_data_arrow(
+    loop_data: bytes,
+    column_names: Sequence[str],
+    parse_as_string: Sequence[str] = (),
+    use_threads: bool = False,
+) -> pa.Table | None:
+    """Parse the text of loop block rows straight into an arrow table.
+
+    Only rows with a single tab or space between values and no quotes,
+    comments, text fields or leading and trailing whitespace are parsed,
+    as written by `starfile.write`. Columns have the types `parse_loop_data`
+    would give them, missing values are null. Returns `None` for any other
+    data, which should be parsed by `parse_loop_data`.
+    """
+    column_names = list(column_names)
+    start = 0
+    while loop_data[start:start + 1] == b'\n':
+        start += 1
+    end = loop_data.find(b'\n', start)
+    first_line = loop_data[start:end if end != -1 else len(loop_data)]
+    delimiter, other = (b'\t', b' ') if b'\t' in first_line else (b' ', b'\t')
+    if any(byte in loop_data for byte in (other, b'\r', b'"', b"'", b'#')) or (
+        b';' in loop_data and (loop_data[:1] == b';' or b'\n;' in loop_data)
+    ):
+        return None
+    string_columns = [col for col in parse_as_string if col in column_names]
+    while True:
+        try:
+            table = pa_csv.read_csv(
+                BytesIO(loop_data),
+                read_options=pa_csv.ReadOptions(
+                    column_names=column_names, use_threads=use_threads
+                ),
+                parse_options=pa_csv.ParseOptions(
+                    delimiter=delimiter.decode(), quote_char=False
+                ),
+                convert_options=pa_csv.ConvertOptions(
+                    column_types={col: pa.string() for col in string_columns},
+                    null_values=NA_VALUES,
+                    strings_can_be_null=True,
+                    true_values=['True', 'TRUE', 'true'],
+                    false_values=['False', 'FALSE', 'false'],
+                ),
             )
-            df.columns = loop_column_names
-
-            # Numericise all columns in temporary copy
-            df_numeric = df.apply(_apply_numeric)
-
-            # Replace columns that are all NaN with the original columns
-            df_numeric[df_numeric.columns[df_numeric.isna().all()]] = df[df_numeric.columns[df_numeric.isna().all()]]
-
-            # Replace columns that should be strings
-            for col in df.columns:
-                df[col] = df_numeric[col] if col not in self.parse_as_string else df[col]
-        return df
+        except pa.ArrowInvalid:  # e.g. a row with the wrong number of values
+            return None
+        # an empty value is two delimiters in a row, STAR values are never empty
+        if any(
+            pa.types.is_string(field.type)
+            and pc.any(pc.equal(table.column(idx), '')).as_py()
+            for idx, field in enumerate(table.schema)
+        ):
+            return None
+        # pandas only infers numbers and booleans, dates and times stay strings
+        inferred = [
+            field.name for field in table.schema
+            if pa.types.is_temporal(field.type) and field.name not in string_columns
+        ]
+        if len(inferred) == 0:
+            break
+        string_columns += inferred
+    for idx, field in enumerate(table.schema):
+        if pa.types.is_null(field.type) or (
+            pa.types.is_integer(field.type) and table.column(idx).null_count > 0
+        ):  # pandas has no missing integers, these columns are float
+            column = table.column(idx).cast(pa.float64())
+            table = table.set_column(idx, field.name, column)
+    return table
+
+
+MIN_BYTES_PER_THREAD = 2 ** 22
+
+
+def split_lines(text: str | bytes, n: int, min_size: int = 0) -> list[tuple[int, int]]:
+    """Split text into at most `n` ranges of whole lines of roughly equal size."""
+    n = max(1, min(n, len(text) // max(min_size, 1)))
+    newline = b'\n' if isinstance(text, bytes) else '\n'
+    boundaries = [0]
+    for i in range(1, n):
+        position = text.find(newline, max(len(text) * i // n, boundaries[-1]))
+        if position == -1:
+            break
+        boundaries.append(position + 1)
+    boundaries.append(len(text))
+    return [
+        (start, end)
+        for start, end in zip(boundaries, boundaries[1:])
+        if end > start
+    ]
+
+
+NA_VALUES = ['nan', 'NaN', '<NA>']
+
+# read_csv warns about columns of mixed types, parse_loop_data parses them as text
+warnings.filterwarnings('ignore', category=pd.errors.DtypeWarning, module=__name__)
+
+# one STAR token per match, the group which matched identifies the token type
+STAR_TOKEN = re.compile(
+    r"""
+    ^;([^\n]*(?:\n(?!;)[^\n]*)*)\n;   # text field, between lines starting with ';'
+    |'(.*?)'(?=\s|$)                 # single quoted, followed by whitespace
+    |"(.*?)"(?=\s|$)                 # double quoted
+    |(\#.*)                          # comment
+    |(\S+)                           # unquoted
+    """,
+    re.MULTILINE | re.VERBOSE,
+)
+_COMMENT_GROUP = 4
+
+
+def tokenize(text: str) -> list[str]:
+    """Split STAR formatted text into values, removing quotes and comments.
+
+    Values may be unquoted, quoted with `'` or `"`, or `;` delimited
+    multi-line text fields. Quotes only close a value when followed by
+    whitespace so values may contain apostrophes, e.g. `'it's'`.
+    """
+    return [
+        match.group(match.lastindex)
+        for match in STAR_TOKEN.finditer(text)
+        if match.lastindex != _COMMENT_GROUP
+    ]
+
+
+def csv_quote_character(loop_data: str | bytes) -> str | None:
+    """Quote character for which `pandas.read_csv` splits `loop_data` like `tokenize`.
+
+    Returns `None` if there is no such quote character, i.e. the data contain
+    text fields, comments after values, both kinds of quotes, quote
+    characters within values or unclosed quotes.
+    """
+    def contains(pattern: str) -> bool:
+        if isinstance(loop_data, bytes):
+            return pattern.encode() in loop_data
+        return pattern in loop_data
+
+    def search(pattern: str) -> bool:
+        if isinstance(loop_data, bytes):
+            return re.search(pattern.encode(), loop_data) is not None
+        return re.search(pattern, loop_data) is not None
+
+    if contains('\n;') or loop_data[:1] in (';', b';'):
+        return None
+    if contains('#') and search(r'(?m)^[^\S\n]*[^#\s][^\n]*#'):
+        return None
+    has_single, has_double = contains("'"), contains('"')
+    if has_single and has_double:
+        return None
+    quote_character = "'" if has_single else '"'
+    if (has_single or has_double) and search(rf'\S{quote_character}\S'):
+        return None
+    # a value starting with an unclosed quote is unquoted in STAR
+    if (has_single or has_double) and search(
+        rf'(?m)(?:^|\s){quote_character}[^{quote_character}\n]*$'
+    ):
+        return None
+    return quote_character
+
+
+# field and row separators of the value stream built from data which read_csv
+# cannot split, the first pair which does not occur in the data is used
+STREAM_SEPARATORS = [
+    ('\x1f', '\x1e'), ('\x1c', '\x1d'), ('\x01', '\x02'), ('\x03', '\x04')
+]
+
+# STAR_TOKEN for the values of a line without comments, in the RE2 syntax of
+# arrow, which has no lookahead: a closing quote consumes the whitespace after it
+STAR_LINE_VALUE = r"""\s*(?:'(.*?)'(?:\s|$)|"(.*?)"(?:\s|$)|(\S+))"""
+
+
+def _tokenized_buffer(
+    loop_data: str | bytes, n_columns: int
+) -> tuple[BytesIO, str, str] | None:
+    """Values of loop block rows as a stream of separated fields.
+
+    Values are separated like `tokenize`, line by line with arrow's vectorised
+    regular expressions, so that no python string is created per value. Lines
+    with comments and data with multi-line text fields are tokenized in python.
+    Returns the stream with its field and row separators, values may contain
+    newlines. Returns `None` if there are no values.
+    """
+    if isinstance(loop_data, bytes):
+        loop_data = loop_data.decode()
+    unused = [
+        pair for pair in STREAM_SEPARATORS
+        if not any(c in loop_data for c in pair)
+    ]
+    if len(unused) == 0:
+        raise ValueError(
+            'loop block contains every control character used to separate values'
+        )
+    field_separator, row_separator = unused[0]
+    if loop_data[:1] == ';' or '\n;' in loop_data:  # text fields span lines
+        text = ''.join(f'{token}{field_separator}' for token in tokenize(loop_data))
+    else:
+        text = _separate_values(loop_data.split('\n'), field_separator)
+    stream = np.frombuffer(text.encode(), dtype=np.uint8).copy()
+    separators = np.flatnonzero(stream == ord(field_separator))
+    if len(separators) == 0:
+        return None
+    if len(separators) % n_columns != 0:
+        raise ValueError(
+            f'expected a multiple of {n_columns} values in loop block, '
+            f'got {len(separators)}'
+        )
+    stream[separators[n_columns - 1::n_columns]] = ord(row_separator)
+    return BytesIO(stream.tobytes()), field_separator, row_separator
+
+
+def _separate_values(lines: list[str], separator: str) -> str:
+    """Values of lines without text fields, each followed by `separator`."""
+    lines = pc.utf8_trim_whitespace(pa.array(lines, type=pa.large_string()))
+    values = pc.replace_substring_regex(lines, STAR_LINE_VALUE, rf'\1\2\3{separator}')
+    # whether '#' starts a comment depends on the values before it
+    has_comment = pc.match_substring(lines, '#')
+    if pc.any(has_comment).as_py():
+        values = pc.replace_with_mask(values, has_comment, pa.array([
+            ''.join(f'{token}{separator}' for token in tokenize(line))
+            for line in pc.filter(lines, has_comment).to_pylist()
+        ], type=pa.large_string()))
+    values = pa.LargeListArray.from_arrays([0, len(values)], values)
+    return pc.binary_join(values, pa.scalar('', type=pa.large_string()))[0].as_py()
+
+
+def parse_simple_block(
+    text: str, parse_as_string: Sequence[str] = ()
+) -> dict[str, str | int | float]:
+    """Parse the `_key value` lines of a simple block into a dictionary."""
+    block = {}
+    for line in text.splitlines():
+        line = line.strip()
+        if not line.startswith('_'):
+            continue
+        key, *values = tokenize(line)
+        value = values[0] if len(values) > 0 else ''
+        block[key[1:]] = value if key[1:] in parse_as_string else numericise(value)
+    return block
 
 
 def count_lines(file: Path) -> int:
@@ -156,6 +530,68 @@ def count_lines(file: Path) -> int:
         return sum(1 for _ in f)
 
 
+def block_start_lines(file: Path) -> list[int]:
+    """Line numbers, counting from 1, of the lines starting data blocks."""
+    data = file.read_bytes()
+    line_numbers = []
+    line_number, position = 1, 0
+    for start in block_starts(data, 0, len(data)):
+        line_number += data.count(b'\n', position, start)
+        line_numbers.append(line_number)
+        position = start
+    return line_numbers
+
+
+def is_block_header(line: str | bytes) -> bool:
+    """Whether a line starts a data block, i.e. `data_` after any whitespace."""
+    return line.lstrip().startswith(b'data_' if isinstance(line, bytes) else 'data_')
+
+
+def is_text_field_delimiter(line: str | bytes) -> bool:
+    """Whether a line opens or closes a multi-line text field, i.e. starts with `;`."""
+    return line.startswith(b';' if isinstance(line, bytes) else ';')
+
+
+def block_starts(buffer, start: int, end: int) -> list[int]:
+    """Offsets of the lines starting data blocks in bytes [start, end) of a buffer.
+
+    `start` must be at the start of a line. A data block starts at a line for
+    which `is_block_header` is true, unless that line is within a multi-line
+    text field, delimited by lines for which `is_text_field_delimiter` is true.
+    """
+    starts = []
+    in_text_field = False
+    position = start
+    next_header = buffer.find(b'data_', position, end)
+    next_delimiter = _next_text_field_delimiter(buffer, position, start, end)
+    while position < end:
+        if next_header != -1 and next_header < position:
+            next_header = buffer.find(b'data_', position, end)
+        if next_delimiter != -1 and next_delimiter < position:
+            next_delimiter = _next_text_field_delimiter(buffer, position, start, end)
+        delimiter_first = next_header == -1 or next_delimiter < next_header
+        if next_delimiter != -1 and (in_text_field or delimiter_first):
+            in_text_field = not in_text_field
+            position = next_delimiter + 1
+        elif next_header != -1 and not in_text_field:
+            line_start = max(buffer.rfind(b'\n', start, next_header) + 1, start)
+            if is_block_header(buffer[line_start:next_header + 5]):
+                starts.append(line_start)
+            position = next_header + 5
+        else:
+            break
+    return starts
+
+
+def _next_text_field_delimiter(buffer, position: int, start: int, end: int) -> int:
+    """Offset of the first line at or after `position` starting with `;`, -1 if none."""
+    at_line_start = position == start or buffer[position - 1:position] == b'\n'
+    if at_line_start and is_text_field_delimiter(buffer[position:position + 1]):
+        return position
+    found = buffer.find(b'\n;', position, end)
+    return -1 if found == -1 else found + 1
+
+
 def block_name_from_line(line: str) -> str:
     """'data_general' -> 'general'"""
     return line[5:]
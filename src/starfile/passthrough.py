@@ -0,0 +1,190 @@
+"""Data blocks which are copied unchanged from the file they were read from."""
+
+from __future__ import annotations
+
+import hashlib
+import os
+import shutil
+from pathlib import Path
+from typing import TYPE_CHECKING, BinaryIO, Hashable
+
+import numpy as np
+import pandas as pd
+import pyarrow as pa
+
+from .utils import file_identity
+
+if TYPE_CHECKING:
+    from os import PathLike
+
+    from .typing import DataBlock
+
+
+class BlockSource:
+    """Byte range of a data block in the file it was read from.
+
+    Records the structure and a checksum of the block as read so that a block
+    which has not been modified can be copied verbatim instead of being
+    formatted again. The checksum of the block being written is only computed
+    if the source file and the structure of the block are unchanged.
+    """
+
+    filename: Path
+    start: int
+    end: int
+
+    def __init__(self, filename: PathLike, start: int, end: int, block: DataBlock):
+        self.filename = Path(filename).resolve()
+        self.start = start
+        self.end = end
+        self._identity = file_identity(self.filename)
+        self._structure = structure(block)
+        self._checksum = checksum(block)
+
+    def matches(self, block: DataBlock) -> bool:
+        """Whether `block` and the source file are unchanged since it was read."""
+        try:
+            identity = file_identity(self.filename)
+        except FileNotFoundError:
+            return False
+        return (
+            identity == self._identity
+            and structure(block) == self._structure
+            and checksum(block) == self._checksum
+        )
+
+    def read(self) -> bytes:
+        """The bytes of the block, ending in a newline."""
+        with open(self.filename, 'rb') as f:
+            f.seek(self.start)
+            return _terminated(f.read(self.end - self.start))
+
+    def copy_to(self, file: BinaryIO):
+        """Append the block to a file open for binary writing.
+
+        The bytes are copied in the kernel where possible, `file` is positioned
+        after them.
+        """
+        with open(self.filename, 'rb') as src:
+            src.seek(self.end - 1)
+            needs_newline = self.end > self.start and src.read(1) != b'\n'
+            copy_bytes(src.fileno(), file, self.start, self.end - self.start)
+        if needs_newline:
+            file.write(b'\n')
+
+    def __repr__(self) -> str:
+        """Path and byte range of the block."""
+        return f'BlockSource({str(self.filename)!r}, bytes {self.start}-{self.end})'
+
+
+class SourcedBlocks(dict):
+    """Data blocks as returned by `starfile.read(..., keep_source=True)`.
+
+    A dictionary of data blocks which also records where each block came from,
+    `starfile.write` copies blocks which were not modified byte for byte.
+    """
+
+    sources: dict[str, BlockSource]
+
+    def __init__(
+        self, data_blocks: dict[str, DataBlock], sources: dict[str, BlockSource]
+    ):
+        super().__init__(data_blocks)
+        self.sources = sources
+
+
+def structure(block: DataBlock) -> Hashable:
+    """Column names, types and length of a loop block, or items of a simple block."""
+    if isinstance(block, pd.DataFrame):
+        return tuple(block.columns), tuple(map(str, block.dtypes)), len(block)
+    return tuple((key, repr(value)) for key, value in block.items())
+
+
+def checksum(block: DataBlock) -> bytes:
+    """BLAKE2b digest of the values of a loop block, computed over column buffers."""
+    if not isinstance(block, pd.DataFrame):
+        return b''  # values of simple blocks are part of their structure
+    digest = hashlib.blake2b(digest_size=32)
+    for _, column in block.items():
+        values = column.to_numpy()
+        if values.dtype.kind in 'biufcmM':
+            buffers = [np.ascontiguousarray(values).view(np.uint8)]
+        else:
+            try:
+                buffers = pa.array(values, from_pandas=True).buffers()
+            except (pa.ArrowInvalid, pa.ArrowTypeError):  # mixed types
+                buffers = ['\x1f'.join(map(repr, values)).encode()]
+        for buffer in buffers:
+            if buffer is not None:
+                # lengths keep the boundaries between buffers in the digest
+                digest.update(len(memoryview(buffer)).to_bytes(8, 'little'))
+                digest.update(buffer)
+    return digest.digest()
+
+
+def _terminated(data: bytes) -> bytes:
+    return data if data.endswith(b'\n') or len(data) == 0 else data + b'\n'
+
+
+def copy_bytes(src_fd: int, dst: BinaryIO, offset: int, count: int):
+    """Copy `count` bytes from `offset` in `src_fd` to the current position of `dst`.
+
+    Uses `os.copy_file_range` or `os.sendfile` on the descriptor of `dst` so
+    data need not pass through user space, then moves `dst` past the copied
+    bytes. Remaining bytes are read and written through `dst`.
+    """
+    dst.flush()
+    position = dst.tell()
+    for kernel_copy in (_copy_file_range, _sendfile):
+        copied = kernel_copy(src_fd, dst.fileno(), offset, count)
+        offset, count, position = offset + copied, count - copied, position + copied
+        if count == 0:
+            break
+    dst.seek(position)
+    os.lseek(src_fd, offset, os.SEEK_SET)
+    while count > 0:
+        buffer = os.read(src_fd, min(count, shutil.COPY_BUFSIZE))
+        if len(buffer) == 0:
+            raise EOFError('source file ended before the end of the block')
+        dst.write(buffer)
+        count -= len(buffer)
+
+
+def _copy_file_range(src_fd: int, dst_fd: int, offset: int, count: int) -> int:
+    if not hasattr(os, 'copy_file_range'):
+        return 0
+    copied = 0
+    while copied < count:
+        try:
+            n = os.copy_file_range(src_fd, dst_fd, count - copied, offset + copied)
+        except OSError:  # not supported for these files
+            break
+        if n == 0:
+            break
+        copied += n
+    return copied
+
+
+def _sendfile(src_fd: int, dst_fd: int, offset: int, count: int) -> int:
+    if not hasattr(os, 'sendfile'):
+        return 0
+    copied = 0
+    while copied < count:
+        try:
+            n = os.sendfile(dst_fd, src_fd, offset + copied, count - copied)
+        except OSError:  # not supported for these files
+            break
+        if n == 0:
+            break
+        copied += n
+    return copied
+
+
+def unchanged_source(
+    sources: dict[str, BlockSource], name: str, block: DataBlock
+) -> BlockSource | None:
+    """The source of a block if it can be copied verbatim, otherwise `None`."""
+    source = sources.get(name)
+    if source is not None and source.matches(block):
+        return source
+    return None
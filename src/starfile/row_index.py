@@ -0,0 +1,285 @@
+"""Random access to the rows of a loop block via an index of line offsets."""
+
+from __future__ import annotations
+
+from pathlib import Path
+from typing import TYPE_CHECKING, Sequence
+
+import numpy as np
+
+from .parser import empty_loop_dataframe, parse_loop_data
+from .streaming import BlockInfo, iter_loop_lines, resolve_loop_block, scan_blocks
+from .utils import file_identity
+
+if TYPE_CHECKING:
+    from os import PathLike
+
+    import pandas as pd
+    from numpy.typing import ArrayLike
+
+DEFAULT_EVERY = 1024
+
+
+class RowIndex:
+    """Byte offsets of every `every`-th row of a loop block.
+
+    Rows are the non blank, non comment lines of the block. `offsets[i]` is the
+    byte offset of row `i * every`. `info` locates the block in the file.
+    """
+
+    info: BlockInfo
+    offsets: np.ndarray
+    n_rows: int
+    every: int
+
+    def __init__(self, info: BlockInfo, offsets: np.ndarray, n_rows: int, every: int):
+        self.info = info
+        self.offsets = offsets
+        self.n_rows = n_rows
+        self.every = every
+
+
+def row_index_path(filename: PathLike) -> Path:
+    """Path of the row index file built for `filename`."""
+    filename = Path(filename)
+    return filename.with_name(f'{filename.name}.rowidx.npz')
+
+
+def _is_row(line: bytes) -> bool:
+    return line.lstrip()[:1] not in (b'', b'#')
+
+
+def scan_row_index(
+    filename: PathLike, info: BlockInfo, every: int = DEFAULT_EVERY
+) -> RowIndex:
+    """Sample the byte offset of every `every`-th row of a loop block, unparsed."""
+    offsets = []
+    n_rows = 0
+    position = info.data_start
+    with open(filename, 'rb') as f:
+        for lines in iter_loop_lines(f, info, chunksize=100_000):
+            for line in lines:
+                if _is_row(line):
+                    if n_rows % every == 0:
+                        offsets.append(position)
+                    n_rows += 1
+                position += len(line)
+    return RowIndex(info, np.array(offsets, dtype=np.int64), n_rows, every)
+
+
+def build_row_index(filename: PathLike, every: int = DEFAULT_EVERY) -> Path:
+    """Write a sidecar index of row byte offsets for each loop block of a STAR file.
+
+    The index is saved next to the file as `<filename>.rowidx.npz` and used by
+    `starfile.read_rows` until the file is modified. It records the location
+    and columns of each block so that rows can be read without scanning the
+    file. An up to date index with the same `every` is not rebuilt.
+
+    Parameters
+    ----------
+    filename: PathLike
+        STAR file to index.
+    every: int
+        Record the offset of every `every`-th row, smaller values use more
+        space and read less data per requested row.
+
+    Returns
+    -------
+    path: Path
+        Path of the sidecar index.
+    """
+    filename = Path(filename)
+    path = row_index_path(filename)
+    indices = load_row_index(filename)
+    if indices is not None and all(index.every == every for index in indices.values()):
+        return path
+    arrays = {'identity': np.array(repr(file_identity(filename)))}
+    names = []
+    loop_blocks = [info for info in scan_blocks(filename).values() if info.is_loop]
+    for idx, info in enumerate(loop_blocks):
+        index = scan_row_index(filename, info, every)
+        names.append(info.name)
+        arrays[f'offsets_{idx}'] = index.offsets
+        arrays[f'shape_{idx}'] = np.array([index.n_rows, every], dtype=np.int64)
+        arrays[f'location_{idx}'] = np.array(
+            [info.start, info.end, info.data_start], dtype=np.int64
+        )
+        arrays[f'columns_{idx}'] = np.array(info.column_names, dtype=str)
+    arrays['blocks'] = np.array(names, dtype=str)
+    with open(path, 'wb') as f:
+        np.savez(f, **arrays)
+    return path
+
+
+def load_row_index(filename: PathLike) -> dict[str, RowIndex] | None:
+    """Row indices from the sidecar of a file, `None` if missing or out of date.
+
+    Only the sidecar is read, block locations are taken from the index.
+    """
+    path = row_index_path(filename)
+    if not path.exists():
+        return None
+    with np.load(path) as npz:
+        if str(npz['identity']) != repr(file_identity(filename)):
+            return None
+        indices = {}
+        for idx, name in enumerate(npz['blocks'].tolist()):
+            n_rows, every = npz[f'shape_{idx}'].tolist()
+            start, end, data_start = npz[f'location_{idx}'].tolist()
+            info = BlockInfo(
+                name,
+                start,
+                end,
+                is_loop=True,
+                column_names=npz[f'columns_{idx}'].tolist(),
+                data_start=data_start,
+            )
+            indices[name] = RowIndex(info, npz[f'offsets_{idx}'], n_rows, every)
+    return indices
+
+
+def read_rows(
+    filename: PathLike,
+    block: str | None = None,
+    rows: ArrayLike = (),
+    parse_as_string: Sequence[str] = (),
+) -> pd.DataFrame:
+    """Read selected rows of a loop block by row number.
+
+    With a sidecar index written by `starfile.build_row_index` only the rows
+    following the nearest indexed row are read, so the cost depends on the
+    number of requested rows rather than the size of the file. The location
+    of the block is also taken from the index. Without an index, or if the
+    file changed since it was indexed, row offsets are found by scanning the
+    block without parsing it.
+
+    Each row must be on a single line.
+
+    Parameters
+    ----------
+    filename: PathLike
+        File from which to read data.
+    block: str | None
+        Name of the loop block, may be omitted if the file contains a single loop block.
+    rows: ArrayLike
+        Row numbers to read, negative numbers count from the end. Rows are
+        returned in the order requested.
+    parse_as_string: list[str]
+        A list of column names which will not be coerced to numeric values.
+    """
+    index = current_row_index(filename, block)
+    rows = np.asarray(rows, dtype=np.int64).reshape(-1)
+    rows = np.where(rows < 0, rows + index.n_rows, rows)
+    if ((rows < 0) | (rows >= index.n_rows)).any():
+        raise IndexError(f'row numbers out of range for a block of {index.n_rows} rows')
+    return read_indexed_rows(filename, index, rows, parse_as_string)
+
+
+def current_row_index(filename: PathLike, block: str | None) -> RowIndex:
+    """Row index of a loop block.
+
+    From an up to date sidecar the block is located without reading the STAR
+    file, otherwise the file is scanned for the block and its rows.
+    """
+    indices = load_row_index(filename)
+    info = locate_loop_block(filename, block, indices)
+    if indices is not None and info.name in indices:
+        return indices[info.name]
+    return scan_row_index(filename, info)
+
+
+def locate_loop_block(
+    filename: PathLike,
+    block: str | None,
+    indices: dict[str, RowIndex] | None = None,
+) -> BlockInfo:
+    """Location of a loop block, taken from `indices` if they contain it.
+
+    `indices` are the row indices of an up to date sidecar, see `load_row_index`.
+    Otherwise the file is scanned with `scan_blocks`.
+    """
+    if indices is not None and (
+        block in indices or (block is None and len(indices) > 0)
+    ):
+        infos = {name: index.info for name, index in indices.items()}
+        return resolve_loop_block(infos, block)
+    return resolve_loop_block(scan_blocks(filename), block)
+
+
+def read_indexed_rows(
+    filename: PathLike,
+    index: RowIndex,
+    rows: np.ndarray,
+    parse_as_string: Sequence[str],
+) -> pd.DataFrame:
+    """Parse rows of a loop block, seeking to each from the nearest indexed row."""
+    info = index.info
+    if len(rows) == 0:
+        return empty_loop_dataframe(info.column_names)
+    unique_rows = np.unique(rows)
+    lines = []
+    with open(filename, 'rb') as f:
+        anchors = unique_rows // index.every
+        for anchor in np.unique(anchors):
+            offsets = unique_rows[anchors == anchor] - anchor * index.every
+            wanted = iter(offsets.tolist())
+            target = next(wanted)
+            f.seek(index.offsets[anchor])
+            row = 0
+            for line in f:
+                if not _is_row(line):
+                    continue
+                if row == target:
+                    lines.append(line)
+                    target = next(wanted, None)
+                    if target is None:
+                        break
+                row += 1
+    loop_data = b''.join(
+        line if line.endswith(b'\n') else line + b'\n' for line in lines
+    )
+    df = parse_loop_data(loop_data, info.column_names, parse_as_string)
+    return df.iloc[np.searchsorted(unique_rows, rows)].reset_index(drop=True)
+
+
+def sample(
+    filename: PathLike,
+    block: str | None = None,
+    n: int = 1000,
+    seed: int | None = None,
+    parse_as_string: Sequence[str] = (),
+) -> pd.DataFrame:
+    """Read a uniform random sample of rows from a loop block.
+
+    Row numbers are drawn without replacement and only the chosen rows are
+    parsed, so memory use depends on `n` rather than the size of the block.
+    With an up to date sidecar index from `starfile.build_row_index` the block
+    and rows are located from the index, so only the sampled rows are read.
+    Otherwise rows are located by scanning the block without parsing it.
+    The same `seed` gives the same sample of an unchanged file.
+
+    Parameters
+    ----------
+    filename: PathLike
+        File from which to read data.
+    block: str | None
+        Name of the loop block, may be omitted if the file contains a single loop block.
+    n: int
+        Number of rows, all rows are returned in file order if the block has fewer.
+    seed: int | None
+        Seed for `numpy.random.default_rng`.
+    parse_as_string: list[str]
+        A list of column names which will not be coerced to numeric values.
+
+    Returns
+    -------
+    df: pd.DataFrame
+        Sampled rows in file order.
+    """
+    index = current_row_index(filename, block)
+    rng = np.random.default_rng(seed)
+    if n >= index.n_rows:
+        rows = np.arange(index.n_rows)
+    else:
+        rows = np.sort(rng.choice(index.n_rows, size=n, replace=False))
+    return read_indexed_rows(filename, index, rows, parse_as_string)
@@ -0,0 +1,239 @@
+"""Loop blocks shared between processes without copying."""
+
+from __future__ import annotations
+
+import os
+import tempfile
+import weakref
+from pathlib import Path
+from typing import TYPE_CHECKING, Generator, Iterable, Sequence
+
+import pandas as pd
+import pyarrow as pa
+import pyarrow.ipc
+
+from .parser import empty_loop_dataframe
+from .streaming import _parse_lines, iter_loop_lines, resolve_loop_block, scan_blocks
+
+if TYPE_CHECKING:
+    from os import PathLike
+
+    from .streaming import BlockInfo
+
+SHARED_MEMORY_DIRECTORY = Path('/dev/shm')
+
+
+class SharedTable:
+    """Handle to a table held in shared memory as an Arrow IPC file.
+
+    The handle is cheap to pickle, a worker process receiving it maps the same
+    memory with `to_pandas` instead of receiving a copy of the table. Numeric
+    columns without nulls are views of the shared memory, other columns are
+    converted on access.
+
+    The handle returned by `starfile.share` owns the shared memory, which is
+    freed by `release`, on leaving a `with` block or when the owning handle is
+    garbage collected. Handles unpickled in other processes never free it.
+    """
+
+    def __init__(self, path: PathLike, owner: bool = False):
+        self.path = Path(path)
+        self.owner = owner
+        self._finalizer = weakref.finalize(self, _unlink, self.path) if owner else None
+
+    def to_arrow(self) -> pa.Table:
+        """Map the shared table as a pyarrow table without copying."""
+        with pa.memory_map(str(self.path), 'r') as source:
+            return pa.ipc.open_file(source).read_all()
+
+    def to_pandas(self) -> pd.DataFrame:
+        """Map the shared table as a dataframe, numeric columns are not copied."""
+        return self.to_arrow().to_pandas(split_blocks=True)
+
+    @property
+    def column_names(self) -> list[str]:
+        """Names of the columns of the shared table."""
+        with pa.memory_map(str(self.path), 'r') as source:
+            return pa.ipc.open_file(source).schema.names
+
+    def release(self):
+        """Free the shared memory if this handle owns it, invalidating other handles."""
+        if self._finalizer is not None:
+            self._finalizer()
+
+    def __enter__(self) -> SharedTable:
+        """Use the handle as a context manager which releases it on exit."""
+        return self
+
+    def __exit__(self, *exc_info):
+        """Release the shared memory, see `release`."""
+        self.release()
+
+    def __reduce__(self):
+        """Pickle as a non-owning handle to the same shared memory."""
+        return SharedTable, (self.path, False)
+
+    def __repr__(self) -> str:
+        """Path of the shared memory and whether this handle owns it."""
+        return f'SharedTable({str(self.path)!r}, owner={self.owner})'
+
+
+def _unlink(path: Path):
+    try:
+        os.unlink(path)
+    except FileNotFoundError:
+        pass
+
+
+def share(
+    data: PathLike | pd.DataFrame,
+    block: str | None = None,
+    parse_as_string: Sequence[str] = (),
+    directory: PathLike | None = None,
+    chunksize: int = 100_000,
+) -> SharedTable:
+    """Place a loop block in shared memory for zero-copy access from other processes.
+
+    The table is written once as an Arrow IPC file in shared memory
+    (`/dev/shm` where available). The returned handle can be passed to
+    `multiprocessing` workers, each maps the same memory rather than receiving
+    a pickled copy of the dataframe.
+
+    Rows are parsed and written `chunksize` at a time, so only one chunk of the
+    table is held in process memory. Column types match `starfile.read`: when a
+    later chunk needs a wider type than the chunks already written, the file is
+    written again with the wider type.
+
+    Parameters
+    ----------
+    data: PathLike | pd.DataFrame
+        STAR file or dataframe to share.
+    block: str | None
+        Name of the loop block when `data` is a file, may be omitted if the file
+        contains a single loop block.
+    parse_as_string: list[str]
+        A list of column names which will not be coerced to numeric values.
+    directory: PathLike | None
+        Directory in which to create the shared file, defaults to `/dev/shm`
+        or the temporary directory if `/dev/shm` does not exist.
+    chunksize: int
+        Number of rows written at a time.
+
+    Returns
+    -------
+    table: SharedTable
+        Owning handle, call `release` or use as a context manager to free the
+        shared memory.
+    """
+    if not isinstance(data, pd.DataFrame):
+        info = resolve_loop_block(scan_blocks(data), block)
+    if directory is None:
+        directory = (
+            SHARED_MEMORY_DIRECTORY if SHARED_MEMORY_DIRECTORY.is_dir()
+            else tempfile.gettempdir()
+        )
+    fd, path = tempfile.mkstemp(prefix='starfile-', suffix='.arrow', dir=directory)
+    os.close(fd)
+    handle = SharedTable(path, owner=True)
+    try:
+        if isinstance(data, pd.DataFrame):
+            _write_dataframe(handle.path, data, chunksize)
+        else:
+            _write_loop_block(handle.path, data, info, parse_as_string, chunksize)
+    except BaseException:
+        handle.release()
+        raise
+    return handle
+
+
+def _write_dataframe(path: Path, df: pd.DataFrame, chunksize: int):
+    schema = pa.Schema.from_pandas(df, preserve_index=False)
+    with open(path, 'wb') as f, pa.ipc.new_file(f, schema) as writer:
+        for start in range(0, len(df), chunksize):
+            chunk = df.iloc[start:start + chunksize]
+            writer.write_batch(
+                pa.RecordBatch.from_pandas(chunk, schema=schema, preserve_index=False)
+            )
+
+
+def _write_loop_block(
+    path: Path,
+    filename: PathLike,
+    info: BlockInfo,
+    parse_as_string: Sequence[str],
+    chunksize: int,
+):
+    schema = None
+    while True:
+        string_columns = list(parse_as_string) + [
+            field.name for field in schema or () if pa.types.is_string(field.type)
+        ]
+        tables = _iter_loop_tables(filename, info, string_columns, chunksize)
+        widened = _write_tables(path, tables, schema)
+        if widened is None:
+            return
+        schema = widened
+
+
+def _iter_loop_tables(
+    filename: PathLike,
+    info: BlockInfo,
+    parse_as_string: list[str],
+    chunksize: int,
+) -> Generator[pa.Table, None, None]:
+    with open(filename, 'rb') as file:
+        for lines in iter_loop_lines(file, info, chunksize):
+            df = _parse_lines(lines, info.column_names, parse_as_string)
+            if df is not None:
+                yield _to_arrow(df)
+    yield _to_arrow(empty_loop_dataframe(info.column_names))
+
+
+def _to_arrow(df: pd.DataFrame) -> pa.Table:
+    return pa.Table.from_pandas(df, preserve_index=False).replace_schema_metadata()
+
+
+def _write_tables(
+    path: Path,
+    tables: Iterable[pa.Table],
+    schema: pa.Schema | None,
+) -> pa.Schema | None:
+    """Write tables to an IPC file, or return the wider schema they need.
+
+    The schema of the first table is used when `schema` is None. Writing stops
+    as soon as a table does not fit the schema, the partially written file is
+    overwritten by the next attempt.
+    """
+    writer = None
+    with open(path, 'wb') as f:
+        try:
+            for table in tables:
+                if schema is None:
+                    schema = table.schema
+                if writer is not None and table.num_rows == 0:
+                    continue
+                if table.schema != schema:
+                    widened = pa.schema([
+                        pa.field(field.name, _wider_type(field.type, other.type))
+                        for field, other in zip(schema, table.schema)
+                    ])
+                    if widened != schema:
+                        return widened
+                    table = table.cast(schema)
+                if writer is None:
+                    writer = pa.ipc.new_file(f, schema)
+                writer.write_table(table)
+        finally:
+            if writer is not None:
+                writer.close()
+    return None
+
+
+def _wider_type(a: pa.DataType, b: pa.DataType) -> pa.DataType:
+    """Type of a column parsed in one go which parses as `a` and `b` in parts."""
+    if a == b:
+        return a
+    numeric = [pa.types.is_integer(t) or pa.types.is_floating(t) for t in (a, b)]
+    if all(numeric):
+        return pa.float64()
+    return pa.string()
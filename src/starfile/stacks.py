@@ -0,0 +1,188 @@
+"""Splitting and joining `index@stack` image reference columns."""
+
+from __future__ import annotations
+
+import re
+import sys
+from typing import Iterator, Sequence
+
+import pandas as pd
+import pyarrow as pa
+import pyarrow.compute as pc
+
+from .utils import is_polars_dataframe
+
+# an image in a stack, e.g. '000123@Extract/job012/Movies/mic_0001.mrcs'
+STACK_REFERENCE = re.compile(r'^(\d+)@(.+)$')
+STACK_INDEX_SUFFIX = '@index'
+STACK_PATH_SUFFIX = '@stack'
+# df.attrs key recording the zero padded width of split stack indices
+STACK_INDEX_WIDTHS = 'starfile_stack_index_widths'
+DEFAULT_STACK_INDEX_WIDTH = 6
+
+
+def stack_reference_columns(df: pd.DataFrame) -> list[str]:
+    """Columns of strings in which every value is an `index@stack` reference."""
+    return [
+        col for col, strings in _string_columns(df)
+        if pc.all(pc.match_substring_regex(strings, STACK_REFERENCE.pattern)).as_py()
+    ]
+
+
+def split_stack_columns(
+    df: pd.DataFrame,
+    columns: bool | Sequence[str] = True,
+) -> pd.DataFrame:
+    """Split `index@stack` columns into an integer index and a categorical stack path.
+
+    Column `name` is replaced by `name@index` and `name@stack` in its place.
+    Works on pandas and polars dataframes. For pandas the split columns and
+    the zero padded width of their indices are recorded in `df.attrs`, so
+    that `starfile.write` joins the pairs back into `name`.
+    """
+    if columns is True:
+        columns = stack_reference_columns(df)
+    elif columns is False:
+        columns = []
+    else:
+        columns = [col for col in columns if col in df.columns]
+        valid = stack_reference_columns(df[columns])
+        invalid = [col for col in columns if col not in valid]
+        if invalid:
+            raise ValueError(
+                f'columns do not contain index@stack references: {invalid}'
+            )
+    if len(columns) == 0:
+        return df
+    polars = sys.modules['polars'] if is_polars_dataframe(df) else None
+    widths = {} if polars is not None else dict(df.attrs.get(STACK_INDEX_WIDTHS, {}))
+    new_columns = {}
+    for col in df.columns:
+        if col not in columns:
+            new_columns[col] = df[col]
+            continue
+        strings = _arrow_strings(df[col])
+        parts = pc.split_pattern(strings, '@', max_splits=1)
+        index, stack = pc.list_element(parts, 0), pc.list_element(parts, 1)
+        lengths = pc.utf8_length(index)
+        if len(lengths) > 0:
+            widths[col] = pc.max(lengths).as_py()
+        else:
+            widths[col] = DEFAULT_STACK_INDEX_WIDTH
+        if pc.min(lengths).as_py() != widths[col]:
+            widths[col] = 0  # not zero padded
+        index = pc.cast(index, pa.int64())
+        if polars is not None:
+            new_columns[col + STACK_INDEX_SUFFIX] = polars.from_arrow(index)
+            new_columns[col + STACK_PATH_SUFFIX] = (
+                polars.from_arrow(stack).cast(polars.Categorical)
+            )
+            continue
+        new_columns[col + STACK_INDEX_SUFFIX] = (
+            index.to_numpy()
+            if index.null_count == 0
+            else pd.array(index, dtype='Int64')
+        )
+        new_columns[col + STACK_PATH_SUFFIX] = pd.Categorical(stack.to_pandas())
+    if polars is not None:
+        return polars.DataFrame(
+            [series.alias(col) for col, series in new_columns.items()]
+        )
+    split = pd.DataFrame(new_columns, index=df.index)
+    split.attrs = {**df.attrs, STACK_INDEX_WIDTHS: widths}
+    return split
+
+
+def join_stack_columns(
+    df: pd.DataFrame,
+    columns: bool | Sequence[str] | None = None,
+) -> pd.DataFrame:
+    """Join `name@index` and `name@stack` column pairs back into `name` references.
+
+    By default only the pairs recorded in `df.attrs` by `split_stack_columns`
+    are joined, other columns with these suffixes are left alone. `True`
+    joins every pair and a list names the pairs to join, e.g. for polars
+    dataframes which cannot record the split. Indices of pairs which were
+    not recorded are padded with zeros to six digits.
+    """
+    polars = sys.modules['polars'] if is_polars_dataframe(df) else None
+    widths = {} if polars is not None else df.attrs.get(STACK_INDEX_WIDTHS, {})
+    if columns is None:
+        columns = widths
+    elif columns is False:
+        columns = []
+    pairs = {
+        col[:-len(STACK_INDEX_SUFFIX)]
+        for col in df.columns
+        if isinstance(col, str) and col.endswith(STACK_INDEX_SUFFIX)
+        and col[:-len(STACK_INDEX_SUFFIX)] + STACK_PATH_SUFFIX in df.columns
+        and (columns is True or col[:-len(STACK_INDEX_SUFFIX)] in columns)
+    }
+    if len(pairs) == 0:
+        return df
+    paired_columns = {name + STACK_PATH_SUFFIX for name in pairs}
+    new_columns = {}
+    for col in df.columns:
+        if col in paired_columns:
+            continue
+        name = col[:-len(STACK_INDEX_SUFFIX)] if isinstance(col, str) else None
+        if name in pairs and col.endswith(STACK_INDEX_SUFFIX):
+            width = widths.get(name, DEFAULT_STACK_INDEX_WIDTH)
+            index = pc.cast(_arrow_array(df[col]), pa.large_string())
+            if width > 0:
+                index = pc.utf8_lpad(index, width, '0')
+            stack = pc.cast(
+                _arrow_array(df[name + STACK_PATH_SUFFIX]), pa.large_string()
+            )
+            joined = pc.binary_join_element_wise(
+                index, stack, pa.scalar('@', pa.large_string())
+            )
+            if polars is not None:
+                new_columns[name] = polars.from_arrow(joined).cast(polars.String)
+            else:
+                values = pd.array(joined, dtype=pd.ArrowDtype(pa.large_string()))
+                new_columns[name] = pd.Series(values, index=df.index)
+        else:
+            new_columns[col] = df[col]
+    if polars is not None:
+        return polars.DataFrame(
+            [series.alias(col) for col, series in new_columns.items()]
+        )
+    joined = pd.DataFrame(new_columns, index=df.index)
+    joined.attrs = {
+        **df.attrs,
+        STACK_INDEX_WIDTHS: {
+            name: w for name, w in widths.items() if name not in pairs
+        },
+    }
+    return joined
+
+
+def _string_columns(df) -> Iterator[tuple[str, pa.Array]]:
+    """Columns of a pandas or polars dataframe holding strings, as arrow arrays."""
+    for col in df.columns:
+        values = df[col]
+        if is_polars_dataframe(df):
+            is_string = values.dtype == sys.modules['polars'].String
+            if not is_string or values.null_count() == len(values):
+                continue
+        elif values.dtype != object or values.isna().all():
+            continue
+        strings = _arrow_array(values)
+        if pa.types.is_string(strings.type) or pa.types.is_large_string(strings.type):
+            yield col, strings
+
+
+def _arrow_strings(values) -> pa.Array:
+    """A column of strings as an arrow array of large strings."""
+    return pc.cast(_arrow_array(values), pa.large_string())
+
+
+def _arrow_array(values) -> pa.Array:
+    """A pandas or polars column as an arrow array."""
+    if isinstance(values, pd.Series):
+        return pa.array(values, from_pandas=True)
+    array = values.to_arrow()
+    if pa.types.is_string_view(array.type):
+        array = pc.cast(array, pa.large_string())
+    return array
@@ -0,0 +1,177 @@
+"""Summary statistics of loop block columns in one pass over a file."""
+
+from __future__ import annotations
+
+from typing import TYPE_CHECKING, Sequence
+
+import numpy as np
+import pandas as pd
+
+from .streaming import iter_chunks, resolve_loop_block, scan_blocks
+
+if TYPE_CHECKING:
+    from os import PathLike
+
+
+class ColumnStatistics:
+    """Mergeable summary of one column, updated one chunk at a time.
+
+    Counts, extrema and moments are exact. Quantiles are computed from a
+    uniform sample of at most `sample_size` values, kept by assigning each
+    value a random key and retaining the smallest keys. Frequent strings are
+    tracked with a Misra-Gries summary of `capacity` counters, counts of the
+    reported values are lower bounds which undercount by at most `n / capacity`.
+    """
+
+    def __init__(self, sample_size: int, capacity: int, rng: np.random.Generator):
+        self.sample_size = sample_size
+        self.capacity = capacity
+        self.rng = rng
+        self.count = 0
+        self.null_count = 0
+        self.is_string = False
+        self.n_numeric = 0
+        self.min = np.nan
+        self.max = np.nan
+        self.mean = 0.0
+        self.m2 = 0.0  # sum of squared differences from the mean
+        self.sample = np.zeros(0)
+        self.sample_keys = np.zeros(0)
+        self.counters: dict[str, int] = {}
+
+    def update(self, values: pd.Series):
+        """Accumulate the statistics of a chunk of values."""
+        nulls = values.isna()
+        self.null_count += int(nulls.sum())
+        values = values[~nulls]
+        self.count += len(values)
+        if len(values) == 0:
+            return
+        if pd.api.types.is_object_dtype(values.dtype) or isinstance(
+            values.dtype, pd.CategoricalDtype
+        ):
+            self.is_string = True
+        if (
+            pd.api.types.is_numeric_dtype(values.dtype)
+            and not pd.api.types.is_bool_dtype(values)
+        ):
+            self._update_numeric(values.to_numpy(dtype=np.float64))
+        if self.is_string:
+            self._update_counters(values.astype(str).value_counts())
+
+    def _update_numeric(self, x: np.ndarray):
+        n, mean = len(x), x.mean()
+        m2 = ((x - mean) ** 2).sum()
+        total = self.n_numeric + n
+        delta = mean - self.mean
+        self.mean += delta * n / total
+        self.m2 += m2 + delta ** 2 * self.n_numeric * n / total
+        self.n_numeric = total
+        self.min = np.nanmin([self.min, x.min()])
+        self.max = np.nanmax([self.max, x.max()])
+
+        keys = self.rng.random(n)
+        sample = np.concatenate([self.sample, x])
+        keys = np.concatenate([self.sample_keys, keys])
+        if len(sample) > self.sample_size:
+            keep = np.argpartition(keys, self.sample_size)[:self.sample_size]
+            sample, keys = sample[keep], keys[keep]
+        self.sample, self.sample_keys = sample, keys
+
+    def _update_counters(self, counts: pd.Series):
+        counters = self.counters
+        for value, count in counts.items():
+            counters[value] = counters.get(value, 0) + int(count)
+        if len(counters) > self.capacity:
+            ordered = sorted(counters.values(), reverse=True)
+            threshold = ordered[self.capacity]
+            self.counters = {
+                value: count - threshold
+                for value, count in counters.items()
+                if count > threshold
+            }
+
+    def summary(self, quantiles: Sequence[float], top_k: int) -> dict[str, object]:
+        """Statistics of all values seen, as a row of `starfile.describe`."""
+        summary = {'count': self.count, 'null_count': self.null_count}
+        numeric = not self.is_string and self.n_numeric > 0
+        summary['min'] = self.min if numeric else np.nan
+        summary['max'] = self.max if numeric else np.nan
+        summary['mean'] = self.mean if numeric else np.nan
+        has_variance = numeric and self.n_numeric > 1
+        summary['var'] = self.m2 / (self.n_numeric - 1) if has_variance else np.nan
+        for q in quantiles:
+            summary[f'{q:.0%}'] = np.quantile(self.sample, q) if numeric else np.nan
+        if self.is_string:
+            top = sorted(self.counters.items(), key=lambda item: (-item[1], item[0]))
+            summary['top'] = top[:top_k]
+        else:
+            summary['top'] = np.nan
+        return summary
+
+
+def describe(
+    filename: PathLike,
+    block: str | None = None,
+    columns: list[str] | None = None,
+    quantiles: Sequence[float] = (0.25, 0.5, 0.75),
+    top_k: int = 5,
+    sample_size: int = 100_000,
+    seed: int = 0,
+    chunksize: int = 100_000,
+    parse_as_string: Sequence[str] = (),
+) -> pd.DataFrame:
+    """Summary statistics of loop block columns in a single streaming pass.
+
+    Only one chunk of rows is held in memory at a time so files larger than
+    memory can be described. For each column the count of non null values,
+    null count, min, max, mean and variance are exact. Quantiles are
+    estimated from a uniform random sample of `sample_size` values. For
+    string columns the `top_k` most frequent values are reported with
+    approximate counts as a list of `(value, count)` pairs.
+
+    Parameters
+    ----------
+    filename: PathLike
+        File from which to read data.
+    block: str | None
+        Name of the loop block, may be omitted if the file contains a single loop block.
+    columns: list[str] | None
+        Columns to describe, defaults to all columns.
+    quantiles: list[float]
+        Quantiles to estimate, between 0 and 1.
+    top_k: int
+        Number of most frequent values reported for string columns.
+    sample_size: int
+        Number of values sampled per column to estimate quantiles.
+    seed: int
+        Seed for the sample, the same seed gives the same estimates.
+    chunksize: int
+        Maximum number of rows held in memory at a time.
+    parse_as_string: list[str]
+        A list of column names which will not be coerced to numeric values.
+
+    Returns
+    -------
+    statistics: pd.DataFrame
+        One row per column, one column per statistic.
+    """
+    info = resolve_loop_block(scan_blocks(filename), block)
+    if columns is None:
+        columns = info.column_names
+    missing = [col for col in columns if col not in info.column_names]
+    if missing:
+        raise KeyError(f'no columns named {missing} in data block {info.name!r}')
+
+    rng = np.random.default_rng(seed)
+    statistics = {
+        col: ColumnStatistics(sample_size, capacity=max(100 * top_k, 1000), rng=rng)
+        for col in columns
+    }
+    for df in iter_chunks(
+        filename, block=info.name, chunksize=chunksize, parse_as_string=parse_as_string
+    ):
+        for col in columns:
+            statistics[col].update(df[col])
+    summaries = [statistics[col].summary(quantiles, top_k) for col in columns]
+    return pd.DataFrame(summaries, index=pd.Index(columns, name='column'))
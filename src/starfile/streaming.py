@@ -0,0 +1,392 @@
+"""Block level scanning and chunked reading and writing of STAR files."""
+
+from __future__ import annotations
+
+import mmap
+import os
+import shutil
+from bisect import bisect_right
+from itertools import accumulate, islice
+from pathlib import Path
+from typing import TYPE_CHECKING, BinaryIO, Callable, Generator, Sequence
+
+from .parser import (
+    block_starts,
+    empty_loop_dataframe,
+    is_text_field_delimiter,
+    parse_loop_data,
+    tokenize,
+)
+from .writer import loop_block_data, loop_block_header
+
+if TYPE_CHECKING:
+    from os import PathLike
+
+    import pandas as pd
+
+
+class BlockInfo:
+    """Location of a data block within a STAR file.
+
+    Offsets are in bytes from the start of the file. `start` points at the
+    `data_` line, `end` at the start of the next block (or the end of the file).
+    For loop blocks `data_start` points at the first line after the loop header.
+    """
+
+    name: str
+    start: int
+    end: int
+    is_loop: bool
+    column_names: list[str]
+    data_start: int
+
+    def __init__(
+        self,
+        name: str,
+        start: int,
+        end: int,
+        is_loop: bool = False,
+        column_names: list[str] | None = None,
+        data_start: int | None = None,
+    ):
+        self.name = name
+        self.start = start
+        self.end = end
+        self.is_loop = is_loop
+        self.column_names = column_names if column_names is not None else []
+        self.data_start = data_start if data_start is not None else end
+
+    def __repr__(self) -> str:
+        """Name, type and byte range of the block."""
+        kind = 'loop' if self.is_loop else 'simple'
+        return f'BlockInfo({self.name!r}, {kind}, bytes {self.start}-{self.end})'
+
+
+def scan_blocks(filename: PathLike) -> dict[str, BlockInfo]:
+    """Locate the data blocks in a STAR file without parsing their contents.
+
+    Only the `data_` lines and loop headers are read, loop rows are skipped.
+    Blocks start at the same lines as for `StarParser`, see `block_starts`.
+    """
+    filename = Path(filename)
+    if not filename.exists():
+        raise FileNotFoundError(filename)
+    with open(filename, 'rb') as f:
+        if os.fstat(f.fileno()).st_size == 0:
+            return {}
+        with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+            return scan_buffer(mm, 0, len(mm))
+
+
+def scan_buffer(buffer, start: int, end: int) -> dict[str, BlockInfo]:
+    """Locate the data blocks in bytes [start, end) of a buffer such as an mmap."""
+    starts = block_starts(buffer, start, end)
+    blocks = {}
+    for block_start, block_end in zip(starts, [*starts[1:], end]):
+        info = _scan_block_header(buffer, block_start, block_end)
+        blocks[info.name] = info
+    return blocks
+
+
+def _scan_block_header(buffer, start: int, end: int) -> BlockInfo:
+    lines = _iter_lines_with_offsets(buffer, start, end)
+    _, first_line = next(lines)
+    name = first_line.strip()[5:].decode()  # 'data_foo' -> 'foo'
+
+    for _, line in lines:
+        line = line.strip()
+        if line.startswith(b'loop_'):
+            break
+        elif line.startswith(b'_'):
+            return BlockInfo(name, start, end, is_loop=False)
+    else:
+        return BlockInfo(name, start, end, is_loop=False)
+
+    # loop header, one column name per line
+    column_names = []
+    data_start = end
+    for offset, line in lines:
+        line = line.strip()
+        if line.startswith(b'_'):
+            column_names.append(line.split()[0][1:].decode())
+        elif line == b'' and len(column_names) == 0:
+            continue
+        else:
+            data_start = offset
+            break
+    return BlockInfo(
+        name, start, end, is_loop=True, column_names=column_names, data_start=data_start
+    )
+
+
+def _iter_lines_with_offsets(buffer, start: int, end: int):
+    position = start
+    while position < end:
+        newline = buffer.find(b'\n', position, end)
+        line_end = end if newline == -1 else newline + 1
+        yield position, buffer[position:line_end]
+        position = line_end
+
+
+def resolve_loop_block(blocks: dict[str, BlockInfo], block: str | None) -> BlockInfo:
+    """Find a loop block by name, `None` selects the only loop block in the file."""
+    if block is None:
+        loop_blocks = [info for info in blocks.values() if info.is_loop]
+        if len(loop_blocks) != 1:
+            raise ValueError(
+                f'block must be specified, file contains {len(loop_blocks)} loop blocks'
+            )
+        return loop_blocks[0]
+    if block not in blocks:
+        raise KeyError(f'no data block named {block!r}, found {list(blocks)}')
+    if not blocks[block].is_loop:
+        raise ValueError(f'data block {block!r} is not a loop block')
+    return blocks[block]
+
+
+def iter_loop_lines(
+    file: BinaryIO,
+    info: BlockInfo,
+    chunksize: int,
+) -> Generator[list[bytes], None, None]:
+    """Iterate over the raw lines of a loop block, about `chunksize` lines at a time.
+
+    Rows spanning several lines are only expected around multi-line text
+    fields, a chunk containing or followed by a text field is extended to the
+    end of a row.
+    """
+    file.seek(info.data_start)
+    remaining = info.end - info.data_start
+    n_columns = len(info.column_names)
+    while remaining > 0:
+        lines = list(islice(file, chunksize))
+        if len(lines) == 0:
+            break
+        n_bytes = sum(map(len, lines))
+        if n_bytes < remaining and (
+            any(map(is_text_field_delimiter, lines)) or _next_line_is_text_field(file)
+        ):
+            _extend_to_end_of_row(file, lines, n_columns)
+            n_bytes = sum(map(len, lines))
+        if n_bytes > remaining:  # ran into the next data block
+            lines = lines[:bisect_right(list(accumulate(map(len, lines))), remaining)]
+            n_bytes = remaining
+        remaining -= n_bytes
+        yield lines
+
+
+def _next_line_is_text_field(file: BinaryIO) -> bool:
+    position = file.tell()
+    line = file.readline()
+    file.seek(position)
+    return is_text_field_delimiter(line)
+
+
+def _extend_to_end_of_row(file: BinaryIO, lines: list[bytes], n_columns: int):
+    """Append lines to a chunk of loop rows with text fields until it ends a row.
+
+    The chunk starts at the start of a row, text fields are appended whole.
+    """
+    # an odd number of delimiters leaves a text field open
+    if sum(map(is_text_field_delimiter, lines)) % 2 == 1:
+        _append_text_field(file, lines)
+    n_values = _count_values(lines)
+    while n_values % n_columns != 0:
+        start = len(lines)
+        line = file.readline()
+        if line == b'':
+            break
+        lines.append(line)
+        if is_text_field_delimiter(line):
+            _append_text_field(file, lines)
+        n_values += _count_values(lines[start:])
+
+
+def _append_text_field(file: BinaryIO, lines: list[bytes]):
+    """Append the lines of an open text field up to the line closing it."""
+    line = file.readline()
+    while line != b'':
+        lines.append(line)
+        if is_text_field_delimiter(line):
+            break
+        line = file.readline()
+
+
+def _count_values(lines: list[bytes]) -> int:
+    return len(tokenize(b''.join(lines).decode(errors='replace')))
+
+
+def _parse_lines(
+    lines: list[bytes],
+    column_names: list[str],
+    parse_as_string: list[str],
+) -> pd.DataFrame | None:
+    loop_data = b''.join(lines).lstrip()
+    if loop_data == b'':
+        return None
+    return parse_loop_data(loop_data, column_names, parse_as_string)
+
+
+def iter_chunks(
+    filename: PathLike,
+    block: str | None = None,
+    chunksize: int = 100_000,
+    parse_as_string: Sequence[str] = (),
+) -> Generator[pd.DataFrame, None, None]:
+    """Iterate over the rows of a loop block in chunks of dataframes.
+
+    Only one chunk is held in memory at a time. Column types are inferred per chunk.
+
+    Parameters
+    ----------
+    filename: PathLike
+        File from which to read data.
+    block: str | None
+        Name of the loop block, may be omitted if the file contains a single loop block.
+    chunksize: int
+        Maximum number of rows per chunk.
+    parse_as_string: list[str]
+        A list of column names which will not be coerced to numeric values.
+    """
+    info = resolve_loop_block(scan_blocks(filename), block)
+    with open(filename, 'rb') as file:
+        for lines in iter_loop_lines(file, info, chunksize):
+            df = _parse_lines(lines, info.column_names, parse_as_string)
+            if df is not None:
+                yield df
+
+
+def iter_column_chunks(
+    filename: PathLike,
+    block: str | None,
+    column: str,
+    chunksize: int = 100_000,
+    parse_as_string: Sequence[str] = (),
+) -> Generator[pd.DataFrame, None, None]:
+    """Like `iter_chunks` but parsing only `column`, as a single column dataframe."""
+    info = resolve_loop_block(scan_blocks(filename), block)
+    if column not in info.column_names:
+        raise KeyError(f'no column named {column!r} in data block {info.name!r}')
+    with open(filename, 'rb') as file:
+        for lines in iter_loop_lines(file, info, chunksize):
+            loop_data = b''.join(lines).lstrip()
+            if loop_data != b'':
+                yield parse_loop_data(
+                    loop_data, info.column_names, parse_as_string, usecols=[column]
+                )
+
+
+def copy_byte_range(src: BinaryIO, dst: BinaryIO, start: int, end: int):
+    """Copy bytes [start, end) of `src` into `dst`."""
+    src.seek(start)
+    remaining = end - start
+    while remaining > 0:
+        buffer = src.read(min(remaining, shutil.COPY_BUFSIZE))
+        if len(buffer) == 0:
+            break
+        dst.write(buffer)
+        remaining -= len(buffer)
+
+
+def write_lines(file: BinaryIO, lines):
+    """Write lines of text to a binary file, each followed by a newline."""
+    file.write(''.join(line + '\n' for line in lines).encode())
+
+
+def transform(
+    src: PathLike,
+    dst: PathLike,
+    block: str | None = None,
+    fn: Callable[[pd.DataFrame], pd.DataFrame] | None = None,
+    query: str | None = None,
+    chunksize: int = 100_000,
+    parse_as_string: Sequence[str] = (),
+    float_format: str = '%.6f',
+    sep: str = '\t',
+    na_rep: str = '<NA>',
+    quote_character: str = '"',
+    quote_all_strings: bool = False,
+):
+    """Filter or transform a loop block, streaming from one STAR file to another.
+
+    The loop block is read in chunks, each chunk is passed through `query` and
+    `fn` then written out before the next chunk is read. All other content of
+    the file, including other data blocks, is copied verbatim.
+
+    Parameters
+    ----------
+    src: PathLike
+        File from which to read data.
+    dst: PathLike
+        Path where the transformed file will be saved, must differ from `src`.
+    block: str | None
+        Name of the loop block to transform, may be omitted if the file contains
+        a single loop block.
+    fn: Callable[[pd.DataFrame], pd.DataFrame] | None
+        Function applied to each chunk, must return a dataframe with the
+        same columns for every chunk.
+    query: str | None
+        Expression passed to `pandas.DataFrame.query` to select rows of each chunk,
+        applied before `fn`. e.g. `'rlnClassNumber in [3, 5]'`
+    chunksize: int
+        Maximum number of rows held in memory at a time.
+    parse_as_string: list[str]
+        A list of column names which will not be coerced to numeric values.
+    float_format: str
+        Float format string which will be passed to pandas.
+    sep: str
+        Separator between values, will be passed to pandas.
+    na_rep: str
+        Representation of null values, will be passed to pandas.
+    quote_character: str
+        Quote character used for strings which need quoting.
+    quote_all_strings: bool
+        Quote all strings, not only those which need quoting.
+    """
+    src, dst = Path(src), Path(dst)
+    if dst.exists() and dst.resolve() == src.resolve():
+        raise ValueError('cannot transform a file in place, dst must differ from src')
+    blocks = scan_blocks(src)
+    info = resolve_loop_block(blocks, block)
+
+    def apply(df: pd.DataFrame) -> pd.DataFrame:
+        if query is not None:
+            df = df.query(query)
+        if fn is not None:
+            df = fn(df)
+        return df
+
+    def format_rows(df: pd.DataFrame):
+        return loop_block_data(
+            df,
+            float_format=float_format,
+            separator=sep,
+            na_rep=na_rep,
+            quote_character=quote_character,
+            quote_all_strings=quote_all_strings,
+        )
+
+    with open(src, 'rb') as f_src, open(src, 'rb') as f_loop, open(dst, 'wb') as f_dst:
+        copy_byte_range(f_src, f_dst, 0, info.start)
+
+        column_names = None
+        for lines in iter_loop_lines(f_loop, info, chunksize):
+            df = _parse_lines(lines, info.column_names, parse_as_string)
+            if df is None:
+                continue
+            df = apply(df)
+            if column_names is None:
+                column_names = list(df.columns)
+                write_lines(f_dst, loop_block_header(info.name, column_names))
+            elif list(df.columns) != column_names:
+                raise ValueError(
+                    'columns changed between chunks: '
+                    f'{column_names} -> {list(df.columns)}'
+                )
+            write_lines(f_dst, format_rows(df))
+        if column_names is None:  # no rows, header from transformed empty block
+            df = apply(empty_loop_dataframe(info.column_names))
+            write_lines(f_dst, loop_block_header(info.name, df.columns))
+        write_lines(f_dst, ['', ''])
+
+        copy_byte_range(f_src, f_dst, info.end, os.fstat(f_src.fileno()).st_size)
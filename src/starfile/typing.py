@@ -1,6 +1,6 @@
 from __future__ import annotations
 
-from typing import Union, Dict
+from typing import Callable, Dict, Optional, Union
 from typing_extensions import TypeAlias
 
 import pandas as pd
@@ -9,3 +9,7 @@ DataBlock: TypeAlias = Union[
     pd.DataFrame,
     Dict[str, Union[str, int, float]]
 ]
+
+FloatFormat: TypeAlias = Union[str, Dict[str, str]]
+
+Header: TypeAlias = Optional[Union[str, Callable[[], str]]]
@@ -1,12 +1,38 @@
 from __future__ import annotations
 
+import os
+import stat
+import sys
+import tempfile
 from collections import deque
-from linecache import getline, checkcache
-from typing import TYPE_CHECKING
+from concurrent.futures import Future
+from contextlib import contextmanager
+from linecache import checkcache, getline
+from pathlib import Path
+from typing import (
+    IO,
+    TYPE_CHECKING,
+    Any,
+    Callable,
+    Generator,
+    Iterable,
+    TypeVar,
+)
+
+import numpy as np
+import pandas as pd
+
+try:
+    import fcntl
+except ImportError:  # not available on windows
+    fcntl = None
 
 if TYPE_CHECKING:
+    from concurrent.futures import Executor
     from os import PathLike
 
+T = TypeVar('T')
+
 
 class TextBuffer:
     def __init__(self):
@@ -93,3 +119,192 @@ class TextCrawler:
 
     def increment_line_number(self):
         self._current_line_number += 1
+
+
+def iter_results_in_order(
+    tasks: Iterable[T | Callable[[], T]],
+    executor: Executor,
+    max_pending: int,
+) -> Generator[T, None, None]:
+    """Run callable tasks in an executor, yielding results in submission order.
+
+    Non-callable items are passed through in place. At most `max_pending` tasks
+    are submitted ahead of the item currently being yielded.
+    """
+    pending = deque()
+    n_running = 0
+    for task in tasks:
+        if callable(task):
+            pending.append(executor.submit(task))
+            n_running += 1
+        else:
+            pending.append(task)
+        while n_running > max_pending:
+            item = pending.popleft()
+            if isinstance(item, Future):
+                n_running -= 1
+                item = item.result()
+            yield item
+    while pending:
+        item = pending.popleft()
+        yield item.result() if isinstance(item, Future) else item
+
+
+def lock_file_path(filename: PathLike) -> Path:
+    """Path of the lock file held by `file_lock` for `filename`."""
+    filename = Path(filename)
+    return filename.with_name(f'{filename.name}.lock')
+
+
+def file_identity(filename: PathLike) -> tuple[str, int, int, int, int]:
+    """Path, device, inode, size and modification time of a file.
+
+    Changes when the file is replaced or modified, used to invalidate cached
+    blocks, block sources and sidecar indices.
+    """
+    path = Path(filename).resolve()
+    stat = os.stat(path)
+    return str(path), stat.st_dev, stat.st_ino, stat.st_size, stat.st_mtime_ns
+
+
+@contextmanager
+def file_lock(filename: PathLike, shared: bool = False) -> Generator[None, None, None]:
+    """Hold an advisory lock on `filename` for the duration of the context.
+
+    The lock is taken on a sidecar `<filename>.lock` file, so it survives the
+    target being replaced by an atomic write. Writers take an exclusive lock,
+    readers a shared lock. POSIX record locks are used as these are also
+    honoured by NFS. The lock file is left in place.
+    """
+    if fcntl is None:
+        raise NotImplementedError('file locking is not supported on this platform')
+    with open(lock_file_path(filename), 'a+') as lock:
+        fcntl.lockf(lock, fcntl.LOCK_SH if shared else fcntl.LOCK_EX)
+        try:
+            yield
+        finally:
+            fcntl.lockf(lock, fcntl.LOCK_UN)
+
+
+@contextmanager
+def atomic_open(filename: PathLike, mode: str = 'w') -> Generator[IO, None, None]:
+    """Open a temporary file which replaces `filename` when the context exits.
+
+    Data are flushed and synced to disk before the temporary file, created in
+    the same directory, is renamed over `filename`. If an error occurs
+    `filename` is left untouched and the temporary file is removed.
+    """
+    filename = Path(filename)
+    fd, temporary_filename = tempfile.mkstemp(
+        dir=filename.parent, prefix=f'.{filename.name}.', suffix='.tmp'
+    )
+    try:
+        if os.name == 'posix':  # mkstemp creates files readable only by the owner
+            os.fchmod(fd, _replacement_mode(filename))
+        with os.fdopen(fd, mode) as file:
+            yield file
+            file.flush()
+            os.fsync(file.fileno())
+        os.replace(temporary_filename, filename)
+    except BaseException:
+        Path(temporary_filename).unlink(missing_ok=True)
+        raise
+    _fsync_directory(filename.parent)
+
+
+def _replacement_mode(filename: Path) -> int:
+    """Permissions for a file replacing `filename`, those of `filename` if it exists."""
+    try:
+        return stat.S_IMODE(os.stat(filename).st_mode)
+    except FileNotFoundError:
+        return 0o666 & ~_UMASK
+
+
+def _current_umask() -> int:
+    """The umask of the process, read once at import.
+
+    Setting the umask to read it is not thread safe, so it is read from
+    /proc where possible and otherwise set and restored while importing.
+    """
+    try:
+        with open('/proc/self/status') as status:
+            for line in status:
+                if line.startswith('Umask:'):
+                    return int(line.split()[1], 8)
+    except OSError:
+        pass
+    umask = os.umask(0o022)
+    os.umask(umask)
+    return umask
+
+
+_UMASK = _current_umask()
+
+
+def _fsync_directory(directory: Path):
+    """Make a rename durable, not possible on all platforms."""
+    try:
+        fd = os.open(directory, os.O_RDONLY)
+    except OSError:
+        return
+    try:
+        os.fsync(fd)
+    except OSError:
+        pass
+    finally:
+        os.close(fd)
+
+
+def import_polars():
+    """Import the optional polars dependency."""
+    try:
+        import polars
+    except ImportError as e:
+        raise ImportError(
+            "polars is required for backend='polars', "
+            "install with `pip install starfile[polars]`"
+        ) from e
+    return polars
+
+
+def is_polars_dataframe(obj) -> bool:
+    """Whether `obj` is a polars dataframe, without importing polars."""
+    polars = sys.modules.get('polars')
+    return polars is not None and isinstance(obj, polars.DataFrame)
+
+
+def is_loop_block(obj) -> bool:
+    """Whether `obj` is a dataframe to be written as a loop block."""
+    return isinstance(obj, pd.DataFrame) or is_polars_dataframe(obj)
+
+
+def _run_starts(keys: pd.Series) -> np.ndarray:
+    """Positions at which a new run of equal keys starts, null keys compare equal."""
+    codes, _ = pd.factorize(keys, use_na_sentinel=False)
+    return np.flatnonzero(np.r_[True, codes[1:] != codes[:-1]])
+
+
+def _same_key(a, b) -> bool:
+    return a == b or (pd.isna(a) and pd.isna(b))
+
+
+def iter_runs(
+    chunks: Iterable[pd.DataFrame], by: str
+) -> Generator[tuple[Any, pd.DataFrame, bool], None, None]:
+    """Runs of rows with equal values of `by` in a sequence of chunks.
+
+    Yields `(key, rows, continues)` for each run within each chunk, `continues`
+    is whether the run continues the last run of the previous chunk.
+    """
+    last_key = None
+    first = True
+    for df in chunks:
+        if len(df) == 0:
+            continue
+        starts = _run_starts(df[by])
+        ends = np.r_[starts[1:], len(df)]
+        for start, end in zip(starts, ends):
+            key = df[by].iat[start]
+            continues = not first and _same_key(key, last_key)
+            yield key, df.iloc[start:end], continues
+            last_key, first = key, False
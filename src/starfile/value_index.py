@@ -0,0 +1,216 @@
+"""Lookup of loop block rows by the value of a column."""
+
+from __future__ import annotations
+
+import json
+from pathlib import Path
+from typing import TYPE_CHECKING, Iterable, Sequence
+
+import numpy as np
+import pandas as pd
+import pyarrow as pa
+import pyarrow.compute as pc
+import pyarrow.ipc
+
+from .row_index import (
+    DEFAULT_EVERY,
+    build_row_index,
+    load_row_index,
+    locate_loop_block,
+    read_indexed_rows,
+    scan_row_index,
+)
+from .streaming import BlockInfo, iter_column_chunks, resolve_loop_block, scan_blocks
+from .utils import file_identity, iter_runs
+
+if TYPE_CHECKING:
+    from os import PathLike
+
+_IDENTITY_KEY = b'starfile.identity'
+_BLOCK_KEY = b'starfile.block'
+
+
+def value_index_path(filename: PathLike, block: str, column: str) -> Path:
+    """Path of the value index file built for a column of a loop block."""
+    filename = Path(filename)
+    return filename.with_name(f'{filename.name}.{block}.{column}.validx.arrow')
+
+
+def _encode_block_info(info: BlockInfo) -> bytes:
+    return json.dumps({
+        'name': info.name,
+        'start': info.start,
+        'end': info.end,
+        'data_start': info.data_start,
+        'column_names': info.column_names,
+    }).encode()
+
+
+def _decode_block_info(metadata: bytes) -> BlockInfo:
+    location = json.loads(metadata)
+    return BlockInfo(
+        location['name'],
+        location['start'],
+        location['end'],
+        is_loop=True,
+        column_names=location['column_names'],
+        data_start=location['data_start'],
+    )
+
+
+def build_value_index(
+    filename: PathLike,
+    block: str | None = None,
+    column: str = 'rlnMicrographName',
+    every: int = DEFAULT_EVERY,
+    chunksize: int = 100_000,
+) -> Path:
+    """Write a sidecar index mapping each value of a column to the rows containing it.
+
+    The index is saved next to the file as `<filename>.<block>.<column>.validx.arrow`
+    and records runs of consecutive rows sharing a value, it stays small when
+    rows are grouped by the column. Values are stored as they are written in the
+    file, only the indexed column is parsed. The location of the block is stored in the
+    metadata of the index. A row offset index (see
+    `starfile.build_row_index`) is written alongside if missing or out of date.
+    Both are ignored by `starfile.lookup` once the file is modified.
+
+    Parameters
+    ----------
+    filename: PathLike
+        STAR file to index.
+    block: str | None
+        Name of the loop block, may be omitted if the file contains a single loop block.
+    column: str
+        Column to index.
+    every: int
+        Sampling interval of the row offset index.
+    chunksize: int
+        Maximum number of rows read at a time.
+
+    Returns
+    -------
+    path: Path
+        Path of the sidecar index.
+    """
+    info = resolve_loop_block(scan_blocks(filename), block)
+    if column not in info.column_names:
+        raise KeyError(f'no column named {column!r} in data block {info.name!r}')
+    identity = repr(file_identity(filename)).encode()
+
+    keys, starts, stops = [], [], []
+    row = 0
+    chunks = iter_column_chunks(
+        filename, info.name, column, chunksize, parse_as_string=[column]
+    )
+    for key, df, continues in iter_runs(chunks, column):
+        if continues:
+            stops[-1] += len(df)
+        else:
+            keys.append(key)
+            starts.append(row)
+            stops.append(row + len(df))
+        row += len(df)
+
+    table = pa.table({
+        'key': pa.array(keys, pa.string(), from_pandas=True),
+        'start': pa.array(starts, pa.int64()),
+        'stop': pa.array(stops, pa.int64()),
+    })
+    order = pc.sort_indices(table, [('key', 'ascending'), ('start', 'ascending')])
+    table = table.take(order)
+    table = table.replace_schema_metadata(
+        {_IDENTITY_KEY: identity, _BLOCK_KEY: _encode_block_info(info)}
+    )
+
+    path = value_index_path(filename, info.name, column)
+    with pa.OSFile(str(path), 'wb') as sink:
+        with pa.ipc.new_file(sink, table.schema) as writer:
+            writer.write_table(table)
+    if load_row_index(filename) is None:
+        build_row_index(filename, every=every)
+    return path
+
+
+def load_value_index(filename: PathLike, block: str, column: str) -> pa.Table | None:
+    """Value index of a column from its sidecar, `None` if missing or out of date."""
+    path = value_index_path(filename, block, column)
+    if not path.exists():
+        return None
+    with pa.memory_map(str(path), 'r') as source:
+        table = pa.ipc.open_file(source).read_all()
+    metadata = table.schema.metadata
+    identity = repr(file_identity(filename)).encode()
+    if metadata.get(_IDENTITY_KEY) != identity or _BLOCK_KEY not in metadata:
+        return None
+    return table
+
+
+def _match_keys(keys: pa.ChunkedArray, values: list, as_string: bool) -> np.ndarray:
+    """Mask of the keys equal to one of `values`, comparing as `starfile.read` parses.
+
+    Keys are the text of the column, they are compared as numbers when every key
+    parses as a number and the column is not parsed as strings.
+    """
+    keys = keys.to_pandas()
+    numeric_keys = pd.to_numeric(keys, errors='coerce')
+    if as_string or (numeric_keys.isna() & keys.notna()).any():
+        return keys.isin([str(value) for value in values]).to_numpy()
+    return numeric_keys.isin(values).to_numpy()
+
+
+def lookup(
+    filename: PathLike,
+    block: str | None = None,
+    column: str = 'rlnMicrographName',
+    values: Iterable = (),
+    build_index: bool = True,
+    parse_as_string: Sequence[str] = (),
+) -> pd.DataFrame:
+    """Read the rows of a loop block in which `column` takes one of `values`.
+
+    Matching rows are found in the value index of the column and only those
+    rows are parsed. With up to date indices the block is located from the
+    index, so the rest of the file is not read. Equivalent to
+    `df[df[column].isin(values)]`, rows are returned in file order.
+
+    Parameters
+    ----------
+    filename: PathLike
+        File from which to read data.
+    block: str | None
+        Name of the loop block, may be omitted if the file contains a single loop block.
+    column: str
+        Column in which to look up values.
+    values: Iterable
+        Values to look up.
+    build_index: bool
+        Build and save the value index (see `starfile.build_value_index`) if it is
+        missing or out of date. Otherwise a missing index raises a `FileNotFoundError`.
+    parse_as_string: list[str]
+        A list of column names which will not be coerced to numeric values.
+    """
+    row_indices = load_row_index(filename)
+    if block is None:
+        block = locate_loop_block(filename, block, row_indices).name
+    index = load_value_index(filename, block, column)
+    if index is None:
+        if not build_index:
+            raise FileNotFoundError(value_index_path(filename, block, column))
+        build_value_index(filename, block, column)
+        index = load_value_index(filename, block, column)
+        row_indices = load_row_index(filename)
+    info = _decode_block_info(index.schema.metadata[_BLOCK_KEY])
+
+    as_string = column in parse_as_string
+    runs = index.filter(_match_keys(index['key'], list(values), as_string))
+    starts, stops = runs['start'].to_numpy(), runs['stop'].to_numpy()
+    if len(starts) == 0:
+        rows = np.zeros(0, dtype=np.int64)
+    else:
+        rows = np.sort(np.concatenate([np.arange(a, b) for a, b in zip(starts, stops)]))
+    if row_indices is not None and info.name in row_indices:
+        row_index = row_indices[info.name]
+    else:
+        row_index = scan_row_index(filename, info)
+    return read_indexed_rows(filename, row_index, rows, parse_as_string)
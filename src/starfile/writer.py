@@ -1,33 +1,78 @@
 from __future__ import annotations
 
 import csv
-import pandas as pd
+import re
+import sys
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import nullcontext
 from datetime import datetime
+from functools import lru_cache, partial
 from importlib.metadata import version
 from pathlib import Path
+from typing import (
+    TYPE_CHECKING,
+    Callable,
+    Dict,
+    Generator,
+    Hashable,
+    Iterable,
+    List,
+    Optional,
+    Union,
+)
+
+import numpy as np
+import pandas as pd
+import pyarrow as pa
+import pyarrow.compute as pc
 
-from typing import TYPE_CHECKING, Union, Dict, List, Generator, Optional
-from .typing import DataBlock
-from .utils import TextBuffer
+from .passthrough import BlockSource, unchanged_source
+from .stacks import join_stack_columns
+from .utils import (
+    TextBuffer,
+    atomic_open,
+    file_lock,
+    is_loop_block,
+    is_polars_dataframe,
+    iter_results_in_order,
+)
 
 if TYPE_CHECKING:
     from os import PathLike
 
+    from .typing import DataBlock, FloatFormat, Header
+
 __version__ = version("starfile")
 
+FIXED_POINT_FORMAT = re.compile(r'%\.(\d+)f')
+MAX_FIXED_POINT_DECIMALS = 15  # 10 ** n must be exact in float64
+
+# strings which would not be read back as a single unquoted value: empty,
+# containing whitespace, starting like a quote/comment/text field/data name
+# or starting with a reserved word
+NEEDS_QUOTES_PATTERN = r'\s|^$|^[_#\'";$]|^(?i:data|loop|save|global|stop)_'
+NEEDS_QUOTES = re.compile(NEEDS_QUOTES_PATTERN)
+
 
 class StarWriter:
     def __init__(
         self,
         data_blocks: Union[DataBlock, Dict[str, DataBlock], List[DataBlock]],
         filename: Optional[PathLike] = None,
-        float_format: str = '%.6f',
+        float_format: FloatFormat = '%.6f',
         separator: str = '\t',
         na_rep: str = '<NA>',
         quote_character: str = '"',
         quote_all_strings: bool = False,
+        n_threads: int = 1,
+        header: Header = 'timestamp',
+        atomic: bool = False,
+        lock: bool = False,
+        fixed_width: bool = False,
+        join_stacks: bool | list[str] | None = None,
     ):
         # coerce data
+        self.sources = getattr(data_blocks, 'sources', {})
         self.data_blocks = self.coerce_data_blocks(data_blocks)
 
         if filename is not None:
@@ -39,13 +84,19 @@ class StarWriter:
         self.na_rep = na_rep
         self.quote_character = quote_character
         self.quote_all_strings = quote_all_strings
+        self.n_threads = n_threads
+        self.header = header
+        self.atomic = atomic
+        self.lock = lock
+        self.fixed_width = fixed_width
+        self.join_stacks = join_stacks
         self.buffer = TextBuffer()
 
+    @staticmethod
     def coerce_data_blocks(
-        self,
         data_blocks: Union[DataBlock, List[DataBlock], Dict[str, DataBlock]]
     ) -> Dict[str, DataBlock]:
-        if isinstance(data_blocks, pd.DataFrame):
+        if is_loop_block(data_blocks):
             return coerce_dataframe(data_blocks)
         elif isinstance(data_blocks, dict):
             return coerce_dict(data_blocks)
@@ -60,24 +111,66 @@ class StarWriter:
                 got {type(data_blocks)}'
             )
 
-    def lines(self) -> Generator[str, None, None]:
-        yield package_info()
-        yield ''
-        yield ''
+    def lines(self) -> Generator[str | BlockSource, None, None]:
+        """Lines of the file, or sources of blocks to copy unchanged."""
+        header = header_lines(self.header)
+        for line in header:
+            yield line
+        if len(header) > 0:
+            yield ''
+            yield ''
         for line in self.data_block_generator():
             yield line
     
     def to_string(self) -> str:
-        return ''.join(line + '\n' for line in self.lines())
+        return ''.join(
+            line.read().decode() if isinstance(line, BlockSource) else line + '\n'
+            for line in self.lines()
+        )
 
     def write(self):
         if self.filename is None:
             raise ValueError('Cannot write nameless file!')
-        self.filename.write_text(self.to_string())
+        # blocks copied from the file being overwritten must be read before it is
+        # replaced
+        overwrites_source = any(
+            source.filename == self.filename.resolve()
+            for source in self.sources.values()
+        )
+        atomic = self.atomic or overwrites_source
+        with file_lock(self.filename) if self.lock else nullcontext():
+            with (atomic_open if atomic else open)(self.filename, 'wb') as file:
+                for line in self.lines():
+                    if isinstance(line, BlockSource):
+                        line.copy_to(file)
+                    else:
+                        file.write(f'{line}\n'.encode())
+
+    def data_block_generator(self) -> Generator[str | BlockSource, None, None]:
+        """Formatted data blocks in order, by a pool of threads if `n_threads > 1`."""
+        if self.n_threads == 1:
+            for task in self.data_block_tasks():
+                yield task() if callable(task) else task
+            return
+        # format row ranges of all blocks concurrently, yield them in order
+        with ThreadPoolExecutor(max_workers=self.n_threads) as executor:
+            yield from iter_results_in_order(
+                self.data_block_tasks(), executor, max_pending=2 * self.n_threads
+            )
 
-    def data_block_generator(self) -> Generator[str, None, None]:
+    def data_block_tasks(
+        self
+    ) -> Generator[str | Callable[[], str] | BlockSource, None, None]:
+        """Lines of all data blocks, loop block rows as deferred formatting tasks.
+
+        Blocks read with `keep_source=True` which have not been modified are
+        yielded as their `BlockSource`, to be copied verbatim.
+        """
         for block_name, block in self.data_blocks.items():
-            if isinstance(block, dict):
+            source = unchanged_source(self.sources, block_name, block)
+            if source is not None:
+                yield source
+            elif isinstance(block, dict):
                 for line in simple_block(
                     block_name=block_name,
                     data=block,
@@ -85,17 +178,30 @@ class StarWriter:
                     quote_all_strings=self.quote_all_strings
                 ):
                     yield line
-            elif isinstance(block, pd.DataFrame):
-                for line in loop_block(
-                    block_name=block_name,
+            elif is_loop_block(block):
+                block = join_stack_columns(block, self.join_stacks)
+                for line in loop_block_header(block_name, block.columns):
+                    yield line
+                column_widths = None
+                if self.fixed_width and len(block.columns) > 0:
+                    column_widths = measure_column_widths(
+                        block,
+                        float_format=self.float_format,
+                        na_rep=self.na_rep,
+                        quote_character=self.quote_character,
+                        quote_all_strings=self.quote_all_strings
+                    )
+                yield from loop_block_data_tasks(
                     df=block,
                     float_format=self.float_format,
                     separator=self.sep,
                     na_rep=self.na_rep,
                     quote_character=self.quote_character,
-                    quote_all_strings=self.quote_all_strings
-                ):
-                    yield line
+                    quote_all_strings=self.quote_all_strings,
+                    column_widths=column_widths,
+                )
+                yield ''
+                yield ''
 
 
 def coerce_dataframe(df: pd.DataFrame) -> Dict[str, DataBlock]:
@@ -108,7 +214,7 @@ def coerce_dict(
     """Coerce dict into dict of data blocks."""
     # check if data is already Dict[str, DataBlock]
     for k, v in data_blocks.items():
-        if type(v) in (dict, pd.DataFrame):  #
+        if type(v) is dict or is_loop_block(v):
             return data_blocks
     # coerce if not
     return {'': data_blocks}
@@ -120,21 +226,52 @@ def coerce_list(data_blocks: List[DataBlock]) -> Dict[str, DataBlock]:
 
 
 def package_info():
-    date = datetime.now().strftime('%d/%m/%Y')
-    time = datetime.now().strftime('%H:%M:%S')
+    now = datetime.now()
+    date = now.strftime('%d/%m/%Y')
+    time = now.strftime('%H:%M:%S')
     return f'# Created by the starfile Python package (version {__version__}) at {time} on {date}'
 
 
+def static_package_info():
+    """Comment line naming the package version which wrote a file."""
+    return f'# Created by the starfile Python package (version {__version__})'
+
+
+def header_lines(header: Header) -> list[str]:
+    """Comment lines written at the top of a file."""
+    if header is None:
+        return []
+    elif header == 'timestamp':
+        return [package_info()]
+    elif header == 'static':
+        return [static_package_info()]
+    elif callable(header):
+        return [
+            line if line.startswith('#') else f'# {line}'
+            for line in header().splitlines()
+        ]
+    raise ValueError(
+        f"header must be None, 'timestamp', 'static' or callable, got {header!r}"
+    )
+
+
 def quote(
     x, *,
     quote_character: str = '"',
     quote_all_strings: bool = False
 ) -> str:
-    if isinstance(x, str) and (quote_all_strings or ' ' in x or not x):
+    if isinstance(x, str) and (quote_all_strings or NEEDS_QUOTES.search(x) is not None):
+        if quote_character in x:
+            quote_character = other_quote_character(quote_character)
         return f'{quote_character}{x}{quote_character}'
     return x
 
 
+def other_quote_character(quote_character: str) -> str:
+    """The quote character which is not `quote_character`."""
+    return "'" if quote_character == '"' else '"'
+
+
 def simple_block(
     block_name: str,
     data: Dict[str, Union[str, int, float]],
@@ -152,25 +289,608 @@ def simple_block(
 def loop_block(
     block_name: str,
     df: pd.DataFrame,
-    float_format: str = '%.6f',
+    float_format: FloatFormat = '%.6f',
     separator: str = '\t',
     na_rep: str = '<NA>',
     quote_character: str = '"',
     quote_all_strings: bool = False
 ) -> Generator[str, None, None]:
     # Header
+    for line in loop_block_header(block_name=block_name, column_names=df.columns):
+        yield line
+
+    # Data
+    for line in loop_block_data(
+        df=df,
+        float_format=float_format,
+        separator=separator,
+        na_rep=na_rep,
+        quote_character=quote_character,
+        quote_all_strings=quote_all_strings
+    ):
+        yield line
+
+    yield ''
+    yield ''
+
+
+def loop_block_header(
+    block_name: str,
+    column_names: Iterable[str]
+) -> Generator[str, None, None]:
+    """Block name and `loop_` header of a loop block."""
     yield f'data_{block_name}'
     yield ''
     yield 'loop_'
-    for idx, column_name in enumerate(df.columns, 1):
+    for idx, column_name in enumerate(column_names, 1):
         yield f'_{column_name} #{idx}'
 
-    # Data
-    for line in df.map(lambda x:
-                       quote(x,
-                             quote_character=quote_character,
-                             quote_all_strings=quote_all_strings)
-                       ).to_csv(
+
+def loop_block_data(
+    df: pd.DataFrame,
+    float_format: FloatFormat = '%.6f',
+    separator: str = '\t',
+    na_rep: str = '<NA>',
+    quote_character: str = '"',
+    quote_all_strings: bool = False,
+    chunksize: int = 100_000,
+) -> Generator[str, None, None]:
+    """Rows of a loop block, without header.
+
+    Rows are formatted `chunksize` at a time and yielded as one string per chunk,
+    rows within a chunk are separated by newlines.
+    """
+    for task in loop_block_data_tasks(
+        df,
+        float_format=float_format,
+        separator=separator,
+        na_rep=na_rep,
+        quote_character=quote_character,
+        quote_all_strings=quote_all_strings,
+        chunksize=chunksize,
+    ):
+        yield task()
+
+
+def loop_block_data_tasks(
+    df: pd.DataFrame,
+    float_format: FloatFormat = '%.6f',
+    separator: str = '\t',
+    na_rep: str = '<NA>',
+    quote_character: str = '"',
+    quote_all_strings: bool = False,
+    chunksize: int = 100_000,
+    column_widths: list[int] | None = None,
+) -> Generator[Callable[[], str], None, None]:
+    """Independent tasks formatting consecutive row ranges of a loop block."""
+    if len(df.columns) == 0:
+        if len(df) > 0:
+            rows = pandas_formatted_rows(df, '%.6f', separator, na_rep)
+            yield partial('\n'.join, rows)
+        return
+    for start in range(0, len(df), chunksize):
+        yield partial(
+            format_rows,
+            slice_rows(df, start, start + chunksize),
+            float_format=float_format,
+            separator=separator,
+            na_rep=na_rep,
+            quote_character=quote_character,
+            quote_all_strings=quote_all_strings,
+            column_widths=column_widths,
+        )
+
+
+def format_rows(
+    df: pd.DataFrame,
+    float_format: FloatFormat = '%.6f',
+    separator: str = '\t',
+    na_rep: str = '<NA>',
+    quote_character: str = '"',
+    quote_all_strings: bool = False,
+    column_widths: list[int] | None = None,
+) -> str:
+    """Format rows of a dataframe as newline separated text.
+
+    Each column is formatted in bulk as an arrow string array, the columns are
+    then joined with `separator` without creating python strings per value.
+    If `column_widths` are given values are right aligned to those widths.
+    """
+    rows = format_row_array(
+        df,
+        float_format=float_format,
+        separator=separator,
+        na_rep=na_rep,
+        quote_character=quote_character,
+        quote_all_strings=quote_all_strings,
+        column_widths=column_widths,
+    )
+    rows = pa.LargeListArray.from_arrays([0, len(rows)], rows)
+    return pc.binary_join(rows, _large_string('\n'))[0].as_py()
+
+
+def format_row_array(
+    df: pd.DataFrame,
+    float_format: FloatFormat = '%.6f',
+    separator: str = '\t',
+    na_rep: str = '<NA>',
+    quote_character: str = '"',
+    quote_all_strings: bool = False,
+    column_widths: list[int] | None = None,
+) -> pa.Array:
+    """Format rows of a dataframe as an arrow array with one string per row."""
+    columns = format_columns(
+        df,
+        float_format=float_format,
+        na_rep=na_rep,
+        quote_character=quote_character,
+        quote_all_strings=quote_all_strings,
+    )
+    if column_widths is not None:
+        columns = [
+            pc.utf8_lpad(column, width, ' ')
+            for column, width in zip(columns, column_widths)
+        ]
+    if len(columns) == 1:
+        return columns[0]
+    return pc.binary_join_element_wise(*columns, _large_string(separator))
+
+
+def format_many(
+    files: dict[Hashable, DataBlock | dict[str, DataBlock] | list[DataBlock]],
+    float_format: FloatFormat = '%.6f',
+    separator: str = '\t',
+    na_rep: str = '<NA>',
+    quote_character: str = '"',
+    quote_all_strings: bool = False,
+    header: Header = 'timestamp',
+    join_stacks: bool | list[str] | None = None,
+    chunksize: int = 100_000,
+) -> tuple[dict[Hashable, str], dict[Hashable, Exception]]:
+    """Format the text of many files, sharing the work between files.
+
+    The header is rendered once. Loop blocks with the same columns and dtypes
+    in different files are concatenated and formatted together, up to
+    `chunksize` rows at a time, then split back into the rows of each file.
+    The cost of formatting a column is then paid per batch rather than per
+    file, which dominates for small files. The loop header of each block
+    name and columns is rendered once. Files which cannot share work, e.g.
+    blocks read with `keep_source=True`, are formatted by `StarWriter`.
+
+    Returns the text of each file and the exception raised for each file
+    which could not be formatted.
+    """
+    lines = header_lines(header)
+    shared_header = (lambda: '\n'.join(lines)) if len(lines) > 0 else None
+    preamble = ''.join(f'{line}\n' for line in lines)
+    if len(lines) > 0:
+        preamble += '\n\n'
+    options = {
+        "float_format": float_format,
+        "na_rep": na_rep,
+        "quote_character": quote_character,
+        "quote_all_strings": quote_all_strings,
+    }
+
+    parts = {}  # file -> list of text and (schema, position in batch) of loop rows
+    schemas = {}  # schema -> list of (file, dataframe)
+    loop_headers = {}
+    texts, failures = {}, {}
+    for key, data in files.items():
+        try:
+            if len(getattr(data, 'sources', {})) > 0:
+                texts[key] = StarWriter(
+                    data,
+                    separator=separator,
+                    header=shared_header,
+                    join_stacks=join_stacks,
+                    **options,
+                ).to_string()
+                continue
+            parts[key] = [preamble]
+            for block_name, block in StarWriter.coerce_data_blocks(data).items():
+                if isinstance(block, dict):
+                    parts[key].append(''.join(
+                        f'{line}\n' for line in simple_block(
+                            block_name,
+                            block,
+                            quote_character=quote_character,
+                            quote_all_strings=quote_all_strings,
+                        )
+                    ))
+                    continue
+                block = join_stack_columns(block, join_stacks)
+                columns = tuple(block.columns)
+                if len(columns) == 0:
+                    parts[key].append(''.join(
+                        f'{line}\n' for line in loop_block(
+                            block_name, block, separator=separator, **options
+                        )
+                    ))
+                    continue
+                if (block_name, columns) not in loop_headers:
+                    loop_headers[block_name, columns] = ''.join(
+                        f'{line}\n' for line in loop_block_header(block_name, columns)
+                    )
+                parts[key].append(loop_headers[block_name, columns])
+                schema = _schema(block)
+                members = schemas.setdefault(schema, [])
+                parts[key].append((schema, len(members)))
+                members.append((key, block))
+                parts[key].append('\n\n')
+        except Exception as exception:
+            failures[key] = exception
+            parts.pop(key, None)
+
+    rows = {}  # (schema, position) -> formatted rows
+    for schema, members in schemas.items():
+        for start, stop in _row_batches([len(df) for _, df in members], chunksize):
+            batch = members[start:stop]
+            try:
+                formatted = format_row_batch(
+                    [df for _, df in batch], separator, **options
+                )
+            except Exception:  # attribute the failure to the files which caused it
+                formatted = []
+                for key, df in batch:
+                    try:
+                        formatted += format_row_batch([df], separator, **options)
+                    except Exception as exception:
+                        failures[key] = exception
+                        formatted.append('')
+            for position, text in enumerate(formatted, start):
+                rows[schema, position] = text
+
+    for key, file_parts in parts.items():
+        if key not in failures:
+            texts[key] = ''.join(
+                part if isinstance(part, str) else rows[part] for part in file_parts
+            )
+    return texts, failures
+
+
+def format_row_batch(
+    dfs: list[pd.DataFrame],
+    separator: str = '\t',
+    float_format: FloatFormat = '%.6f',
+    na_rep: str = '<NA>',
+    quote_character: str = '"',
+    quote_all_strings: bool = False,
+) -> list[str]:
+    """Rows of dataframes with the same columns and dtypes, formatted in one pass.
+
+    Gives the text `loop_block_data` would write for each dataframe, followed
+    by a newline unless the dataframe has no rows.
+    """
+    if len(dfs) == 1:
+        df = dfs[0]
+    elif is_polars_dataframe(dfs[0]):
+        df = sys.modules['polars'].concat(dfs)
+    else:
+        df = pd.concat(dfs, ignore_index=True)
+    rows = format_row_array(
+        df,
+        float_format=float_format,
+        separator=separator,
+        na_rep=na_rep,
+        quote_character=quote_character,
+        quote_all_strings=quote_all_strings,
+    )
+    # end each row with a newline, then join the rows of each dataframe
+    rows = pc.binary_join_element_wise(rows, _large_string(''), _large_string('\n'))
+    offsets = np.cumsum([0, *(len(df) for df in dfs)])
+    per_df = pa.LargeListArray.from_arrays(offsets, rows)
+    return pc.binary_join(per_df, _large_string('')).to_pylist()
+
+
+def _schema(df) -> tuple:
+    """Columns and types which must match for dataframes to be formatted together.
+
+    Object columns are distinguished by their inferred type, which decides
+    how they are formatted.
+    """
+    if is_polars_dataframe(df):
+        return 'polars', tuple(df.columns), tuple(df.dtypes)
+    dtypes = tuple(
+        (
+            dtype,
+            pd.api.types.infer_dtype(column, skipna=True)
+            if pd.api.types.is_object_dtype(dtype)
+            else None,
+        )
+        for (_, column), dtype in zip(df.items(), df.dtypes)
+    )
+    return 'pandas', tuple(df.columns), dtypes
+
+
+def _row_batches(
+    n_rows: list[int], chunksize: int
+) -> Generator[tuple[int, int], None, None]:
+    """Ranges of consecutive items with up to `chunksize` rows, at least one each."""
+    start, total = 0, 0
+    for idx, n in enumerate(n_rows):
+        if idx > start and total + n > chunksize:
+            yield start, idx
+            start, total = idx, 0
+        total += n
+    if start < len(n_rows):
+        yield start, len(n_rows)
+
+
+def format_columns(
+    df: pd.DataFrame,
+    float_format: FloatFormat = '%.6f',
+    na_rep: str = '<NA>',
+    quote_character: str = '"',
+    quote_all_strings: bool = False,
+) -> list[pa.Array]:
+    """Format each column of a dataframe as an array of strings."""
+    return [
+        format_column(
+            column,
+            float_format=column_float_format(float_format, column_name),
+            na_rep=na_rep,
+            quote_character=quote_character,
+            quote_all_strings=quote_all_strings,
+        )
+        for column_name, column in zip(df.columns, iter_columns(df))
+    ]
+
+
+def slice_rows(df, start: int, stop: int):
+    """Rows [start, stop) of a pandas or polars dataframe."""
+    if is_polars_dataframe(df):
+        return df.slice(start, stop - start)
+    return df.iloc[start:stop]
+
+
+def iter_columns(df) -> Generator[pd.Series | pa.Array, None, None]:
+    """Columns of a dataframe, polars columns as arrow arrays, not via pandas."""
+    if is_polars_dataframe(df):
+        for idx in range(df.width):
+            yield df.to_series(idx).to_arrow()
+    else:
+        for _, column in df.items():
+            yield column
+
+
+def measure_column_widths(
+    df: pd.DataFrame,
+    float_format: FloatFormat = '%.6f',
+    na_rep: str = '<NA>',
+    quote_character: str = '"',
+    quote_all_strings: bool = False,
+    chunksize: int = 100_000,
+) -> list[int]:
+    """Widest formatted value in each column."""
+    widths = [0] * len(df.columns)
+    for start in range(0, len(df), chunksize):
+        columns = format_columns(
+            slice_rows(df, start, start + chunksize),
+            float_format=float_format,
+            na_rep=na_rep,
+            quote_character=quote_character,
+            quote_all_strings=quote_all_strings,
+        )
+        for idx, column in enumerate(columns):
+            widths[idx] = max(widths[idx], pc.max(pc.utf8_length(column)).as_py())
+    return widths
+
+
+def column_float_format(float_format: FloatFormat, column_name: str) -> str:
+    """The float format string for `column_name`."""
+    if isinstance(float_format, dict):
+        return float_format.get(column_name, '%.6f')
+    return float_format
+
+
+def format_column(
+    series: pd.Series,
+    float_format: str = '%.6f',
+    na_rep: str = '<NA>',
+    quote_character: str = '"',
+    quote_all_strings: bool = False,
+) -> pa.Array:
+    """Format a column as an arrow array of strings without nulls."""
+    if isinstance(series, (pa.Array, pa.ChunkedArray)):
+        return format_arrow_column(
+            series,
+            float_format=float_format,
+            na_rep=na_rep,
+            quote_character=quote_character,
+            quote_all_strings=quote_all_strings,
+        )
+    dtype = series.dtype
+    fixed_point = FIXED_POINT_FORMAT.fullmatch(float_format)
+    if isinstance(dtype, np.dtype) and dtype.kind == 'f' and fixed_point is not None:
+        return format_fixed_point(
+            series.to_numpy(), n_decimals=int(fixed_point.group(1)), na_rep=na_rep
+        )
+    elif isinstance(dtype, np.dtype) and dtype.kind in 'iu':
+        return pc.cast(pa.array(series.to_numpy()), pa.large_string())
+    elif isinstance(dtype, np.dtype) and dtype.kind == 'b':
+        return pc.if_else(
+            pa.array(series.to_numpy()), _large_string('True'), _large_string('False')
+        )
+    elif (
+        pd.api.types.is_object_dtype(dtype)
+        and pd.api.types.infer_dtype(series, skipna=True) == 'string'
+    ):
+        strings = pa.array(series, type=pa.large_string(), from_pandas=True)
+        return format_strings(strings, na_rep, quote_character, quote_all_strings)
+    elif isinstance(dtype, pd.ArrowDtype):
+        return format_arrow_column(
+            pa.array(series),
+            float_format=float_format,
+            na_rep=na_rep,
+            quote_character=quote_character,
+            quote_all_strings=quote_all_strings,
+        )
+    elif isinstance(dtype, pd.CategoricalDtype) and pd.api.types.is_object_dtype(
+        dtype.categories.dtype
+    ):
+        # format each category once, then gather by code
+        categories = format_column(
+            pd.Series(dtype.categories, dtype=object),
+            float_format=float_format,
+            na_rep=na_rep,
+            quote_character=quote_character,
+            quote_all_strings=quote_all_strings,
+        )
+        codes = series.cat.codes.to_numpy()
+        formatted = categories.take(pa.array(codes, mask=codes == -1))
+        return pc.fill_null(formatted, _large_string(na_rep))
+    lines = pandas_formatted_rows(
+        series.to_frame(),
+        float_format,
+        '\t',
+        na_rep,
+        quote_character,
+        quote_all_strings,
+    )
+    return pa.array(list(lines), type=pa.large_string())
+
+
+def format_strings(
+    strings: pa.Array,
+    na_rep: str = '<NA>',
+    quote_character: str = '"',
+    quote_all_strings: bool = False,
+) -> pa.Array:
+    """Quote an arrow array of large strings where needed, nulls become `na_rep`."""
+    if quote_all_strings:
+        needs_quotes = pa.array(np.ones(len(strings), dtype=bool))
+    else:
+        needs_quotes = pc.match_substring_regex(strings, NEEDS_QUOTES_PATTERN)
+
+    def quoted(character: str) -> pa.Array:
+        return pc.binary_join_element_wise(
+            _large_string(character), strings, _large_string(character),
+            _large_string(''),
+        )
+
+    contains_quote = pc.match_substring(strings, quote_character)
+    formatted = pc.if_else(
+        needs_quotes,
+        pc.if_else(
+            contains_quote,
+            quoted(other_quote_character(quote_character)),
+            quoted(quote_character),
+        ),
+        strings,
+    )
+    return pc.fill_null(formatted, _large_string(na_rep))
+
+
+def format_arrow_column(
+    array: pa.Array | pa.ChunkedArray,
+    float_format: str = '%.6f',
+    na_rep: str = '<NA>',
+    quote_character: str = '"',
+    quote_all_strings: bool = False,
+) -> pa.Array:
+    """Format an arrow column, e.g. from a polars dataframe, like `format_column`."""
+    if isinstance(array, pa.ChunkedArray):
+        array = array.combine_chunks()
+    kind = array.type
+    fixed_point = FIXED_POINT_FORMAT.fullmatch(float_format)
+    if pa.types.is_floating(kind) and fixed_point is not None:
+        return format_fixed_point(
+            array.to_numpy(zero_copy_only=False),
+            n_decimals=int(fixed_point.group(1)),
+            na_rep=na_rep,
+        )
+    elif pa.types.is_integer(kind):
+        return pc.fill_null(pc.cast(array, pa.large_string()), _large_string(na_rep))
+    elif pa.types.is_boolean(kind):
+        formatted = pc.if_else(array, _large_string('True'), _large_string('False'))
+        return pc.fill_null(formatted, _large_string(na_rep))
+    elif (
+        pa.types.is_string(kind)
+        or pa.types.is_large_string(kind)
+        or pa.types.is_string_view(kind)
+    ):
+        strings = pc.cast(array, pa.large_string())
+        return format_strings(strings, na_rep, quote_character, quote_all_strings)
+    elif pa.types.is_dictionary(kind):
+        # format each category once, then gather by code
+        categories = format_arrow_column(
+            array.dictionary,
+            float_format=float_format,
+            na_rep=na_rep,
+            quote_character=quote_character,
+            quote_all_strings=quote_all_strings,
+        )
+        return pc.fill_null(categories.take(array.indices), _large_string(na_rep))
+    return format_column(
+        pd.Series(array.to_pandas()),
+        float_format=float_format,
+        na_rep=na_rep,
+        quote_character=quote_character,
+        quote_all_strings=quote_all_strings,
+    )
+
+
+def format_fixed_point(
+    values: np.ndarray, n_decimals: int, na_rep: str = '<NA>'
+) -> pa.Array:
+    """Vectorised equivalent of `[f'%.{n_decimals}f' % x for x in values]`.
+
+    Values are scaled, rounded to integers and printed as digits with the decimal
+    point inserted. Values for which the rounding could differ from printf
+    (near a tie, too large, or not finite) are formatted individually.
+    """
+    float_format = f'%.{n_decimals}f'
+    values = np.asarray(values, dtype=np.float64)
+    if n_decimals > MAX_FIXED_POINT_DECIMALS:
+        return pa.array(
+            [na_rep if np.isnan(x) else float_format % x for x in values],
+            type=pa.large_string()
+        )
+    with np.errstate(invalid='ignore', over='ignore'):
+        scaled = np.abs(values) * 10.0 ** n_decimals
+        distance_from_tie = np.abs(scaled - np.floor(scaled) - 0.5)
+        exact = np.isfinite(scaled) & (distance_from_tie > 2 * np.spacing(scaled))
+    integers = np.rint(np.where(exact, scaled, 0)).astype(np.int64)
+
+    digits = pc.cast(pa.array(integers), pa.large_string())
+    if n_decimals > 0:
+        digits = pc.utf8_lpad(digits, n_decimals + 1, '0')
+        digits = pc.binary_join_element_wise(
+            pc.utf8_slice_codeunits(digits, 0, -n_decimals),
+            pc.utf8_slice_codeunits(digits, -n_decimals),
+            _large_string('.'),
+        )
+    negative = pa.array(np.signbit(values))
+    formatted = pc.if_else(
+        negative,
+        pc.binary_join_element_wise(_large_string('-'), digits, _large_string('')),
+        digits,
+    )
+
+    if not exact.all():
+        inexact = values[~exact]
+        replacements = [na_rep if np.isnan(x) else float_format % x for x in inexact]
+        formatted = pc.replace_with_mask(
+            formatted, pa.array(~exact), pa.array(replacements, type=pa.large_string())
+        )
+    return formatted
+
+
+def pandas_formatted_rows(
+    df: pd.DataFrame,
+    float_format: str = '%.6f',
+    separator: str = '\t',
+    na_rep: str = '<NA>',
+    quote_character: str = '"',
+    quote_all_strings: bool = False
+) -> list[str]:
+    """Format rows of a dataframe with `DataFrame.to_csv`, one string per row."""
+    return df.map(lambda x:
+                  quote(x,
+                        quote_character=quote_character,
+                        quote_all_strings=quote_all_strings)
+                  ).to_csv(
         mode='a',
         sep=separator,
         header=False,
@@ -178,8 +898,9 @@ def loop_block(
         float_format=float_format,
         na_rep=na_rep,
         quoting=csv.QUOTE_NONE
-    ).splitlines():
-        yield line
+    ).splitlines()
 
-    yield ''
-    yield ''
+
+@lru_cache(maxsize=64)
+def _large_string(value: str) -> pa.Scalar:
+    return pa.scalar(value, type=pa.large_string())
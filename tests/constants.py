@@ -25,6 +25,7 @@ basic_single_quote = test_data_directory / 'basic_single_quote.star'
 basic_double_quote = test_data_directory / 'basic_double_quote.star'
 loop_single_quote = test_data_directory / 'loop_single_quote.star'
 loop_double_quote = test_data_directory / 'loop_double_quote.star'
+loop_star_grammar = test_data_directory / 'loop_star_grammar.star'
 
 # Example DataFrame for testing
 cars = {'Brand': ['Honda_Civic', 'Toyota_Corolla', 'Ford_Focus', 'Audi_A4'],
@@ -0,0 +1,54 @@
+import asyncio
+from concurrent.futures import ThreadPoolExecutor
+
+import pandas as pd
+
+import starfile
+
+from .constants import pipeline, postprocess
+
+
+def test_aread_matches_read():
+    async def main():
+        with ThreadPoolExecutor(2) as executor:
+            return await asyncio.gather(
+                starfile.aread(postprocess, executor=executor),
+                starfile.aread(pipeline),
+            )
+
+    star_postprocess, star_pipeline = asyncio.run(main())
+    expected = starfile.read(postprocess)
+    pd.testing.assert_frame_equal(star_postprocess['fsc'], expected['fsc'])
+    assert list(star_pipeline) == list(starfile.read(pipeline))
+
+
+def test_aread_passes_keyword_arguments_to_read():
+    kwargs = {
+        'always_dict': True,
+        'parse_as_string': ['rlnFinalResolution'],
+        'n_threads': 2,
+    }
+    actual = asyncio.run(starfile.aread(postprocess, **kwargs))
+    expected = starfile.read(postprocess, **kwargs)
+    assert actual['general'] == expected['general']
+    assert isinstance(actual['general']['rlnFinalResolution'], str)
+    pd.testing.assert_frame_equal(actual['fsc'], expected['fsc'])
+
+
+def test_awrite_round_trip(tmp_path):
+    df = pd.DataFrame({'a': [1, 2], 'b': [0.5, 1.5]})
+    filename = tmp_path / 'out.star'
+    asyncio.run(starfile.awrite(df, filename, header=None))
+    pd.testing.assert_frame_equal(starfile.read(filename), df)
+
+
+def test_aiter_chunks_matches_iter_chunks():
+    async def collect():
+        chunks = starfile.aiter_chunks(pipeline, 'pipeline_nodes', chunksize=10)
+        return [df async for df in chunks]
+
+    actual = asyncio.run(collect())
+    expected = list(starfile.iter_chunks(pipeline, 'pipeline_nodes', chunksize=10))
+    assert len(actual) == len(expected)
+    for a, b in zip(actual, expected):
+        pd.testing.assert_frame_equal(a, b)
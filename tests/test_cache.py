@@ -0,0 +1,55 @@
+import os
+
+import pandas as pd
+import pytest
+
+import starfile
+from starfile.cache import BlockCache
+
+from .constants import postprocess
+
+
+@pytest.fixture(autouse=True)
+def empty_cache():
+    starfile.cache_clear()
+    yield
+    starfile.cache_clear()
+    starfile.set_cache_size(2 ** 30)
+
+
+def test_cached_read_hits_and_copies():
+    first = starfile.read(postprocess, cache=True)
+    first['fsc'].iloc[0, 0] = -1
+    first['general']['rlnFinalResolution'] = -1
+    second = starfile.read(postprocess, cache=True)
+
+    expected = starfile.read(postprocess)
+    pd.testing.assert_frame_equal(second['fsc'], expected['fsc'])
+    assert second['general'] == expected['general']
+    info = starfile.cache_info()
+    assert (info.hits, info.misses, info.n_entries) == (1, 1, 1)
+
+
+def test_cache_invalidated_by_modification(tmp_path):
+    filename = tmp_path / 'data.star'
+    starfile.write(pd.DataFrame({'a': [1, 2]}), filename)
+    assert starfile.read(filename, cache=True)['a'].tolist() == [1, 2]
+
+    starfile.write(pd.DataFrame({'a': [3, 4, 5]}), filename)
+    os.utime(filename, ns=(0, 0))
+    assert starfile.read(filename, cache=True)['a'].tolist() == [3, 4, 5]
+    assert starfile.cache_info().misses == 2
+
+
+def test_cache_evicts_least_recently_used(tmp_path):
+    filenames = [tmp_path / f'{i}.star' for i in range(3)]
+    for filename in filenames:
+        starfile.write(pd.DataFrame({'a': range(1000)}), filename)
+    cache = BlockCache(max_bytes=10_000)
+    parse = lambda filename: lambda: {'': starfile.read(filename)}  # noqa: E731
+    for filename in filenames:
+        cache.get_or_parse(filename, None, parse(filename))
+    info = cache.info()
+    assert info.n_entries == 1
+    assert info.evictions == 2
+    assert info.n_bytes <= 10_000
@@ -0,0 +1,95 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+import starfile
+from starfile.comparison import _aligned_chunks
+
+from .constants import postprocess
+
+
+@pytest.fixture
+def modified(tmp_path):
+    star = starfile.read(postprocess)
+    star['fsc'].loc[3, 'rlnFourierShellCorrelationUnmaskedMaps'] += 0.01
+    star['fsc'] = star['fsc'].iloc[:-2]
+    star['general']['rlnFinalResolution'] = 3.0
+    del star['guinier']
+    filename = tmp_path / 'modified.star'
+    starfile.write(star, filename)
+    return filename
+
+
+def test_diff_identical():
+    result = starfile.diff(postprocess, postprocess)
+    assert result.identical
+    assert result.report() == 'files are identical'
+    assert (result.columns['n_mismatched'] == 0).all()
+    assert len(result.mismatches) == 0
+
+
+@pytest.mark.parametrize('chunksize', [5, 7, 100_000])
+def test_diff_reports_differences(modified, chunksize):
+    result = starfile.diff(postprocess, modified, tolerance=1e-4, chunksize=chunksize)
+    assert not result.identical
+    assert result.header == ["block 'guinier' only in a"]
+    assert result.row_counts == {'fsc': (49, 47)}
+
+    fsc = result.columns.loc['fsc']
+    assert fsc['n_compared'].eq(47).all()
+    mismatched = fsc[fsc['n_mismatched'] > 0]
+    assert list(mismatched.index) == ['rlnFourierShellCorrelationUnmaskedMaps']
+    np.testing.assert_allclose(mismatched['max_abs_diff'], 0.01, rtol=1e-3)
+    assert result.columns.loc[('general', 'rlnFinalResolution'), 'n_mismatched'] == 1
+
+    assert list(result.mismatches['block']) == ['general', 'fsc']
+    assert list(result.mismatches['row']) == [0, 3]
+
+
+def test_diff_tolerance(modified):
+    result = starfile.diff(postprocess, modified, tolerance=0.02)
+    assert result.columns.loc['fsc', 'n_mismatched'].sum() == 0
+    result = starfile.diff(postprocess, modified, relative_tolerance=0.02)
+    assert result.columns.loc['fsc', 'n_mismatched'].sum() == 0
+
+
+def test_diff_columns(tmp_path):
+    df = starfile.read(postprocess)['guinier']
+    a, b = tmp_path / 'a.star', tmp_path / 'b.star'
+    starfile.write({'guinier': df}, a)
+    starfile.write({'guinier': df[df.columns[::-1]].drop(columns=df.columns[0])}, b)
+    result = starfile.diff(a, b)
+    assert f"column {df.columns[0]!r} of block 'guinier' only in a" in result.header
+    assert "columns of block 'guinier' are in a different order" in result.header
+    assert result.columns['n_mismatched'].eq(0).all()
+
+
+def test_diff_cli(modified):
+    click_testing = pytest.importorskip('click.testing')
+    from starfile.__main__ import main
+
+    runner = click_testing.CliRunner()
+    result = runner.invoke(main, ['diff', str(postprocess), str(postprocess)])
+    assert result.exit_code == 0
+    assert 'files are identical' in result.output
+    result = runner.invoke(
+        main, ['diff', str(postprocess), str(modified), '--tolerance', '1e-4']
+    )
+    assert result.exit_code == 1
+    assert 'rlnFourierShellCorrelationUnmaskedMaps' in result.output
+
+
+def test_aligned_chunks_stream_unpaired_rows():
+    consumed = []
+
+    def chunks(n):
+        for idx in range(n):
+            consumed.append(idx)
+            yield pd.DataFrame({'x': [idx]})
+
+    pairs = _aligned_chunks(chunks(5), iter([pd.DataFrame({'x': [0]})]))
+    assert next(pairs)[1] is not None
+    chunk_a, chunk_b = next(pairs)
+    assert chunk_a['x'].tolist() == [1] and chunk_b is None
+    assert consumed == [0, 1]
+    assert len(list(pairs)) == 3
@@ -0,0 +1,57 @@
+import pandas as pd
+import pytest
+
+import starfile
+
+from .constants import postprocess
+
+optics_a = pd.DataFrame({
+    'rlnOpticsGroup': [1, 2],
+    'rlnOpticsGroupName': ['opticsGroup1', 'opticsGroup2'],
+    'rlnVoltage': [300.0, 200.0],
+})
+optics_b = pd.DataFrame({
+    'rlnOpticsGroup': [1, 2],
+    'rlnOpticsGroupName': ['opticsGroup2', 'opticsGroup3'],
+    'rlnVoltage': [200.0, 100.0],
+})
+particles_a = pd.DataFrame({'rlnCoordinateX': [1.0, 2.0], 'rlnOpticsGroup': [1, 2]})
+particles_b = pd.DataFrame(
+    {'rlnOpticsGroup': [2, 1, 1], 'rlnCoordinateX': [3.0, 4.0, 5.0]}
+)
+
+
+def test_concat_unifies_columns_and_optics_groups(tmp_path):
+    starfile.write({'optics': optics_a, 'particles': particles_a}, tmp_path / 'a.star')
+    starfile.write({'optics': optics_b, 'particles': particles_b}, tmp_path / 'b.star')
+    starfile.concat(
+        [tmp_path / 'a.star', tmp_path / 'b.star'], tmp_path / 'c.star', chunksize=2
+    )
+
+    star = starfile.read(tmp_path / 'c.star')
+    assert star['optics']['rlnOpticsGroup'].tolist() == [1, 2, 3]
+    assert star['optics']['rlnVoltage'].tolist() == [300.0, 200.0, 100.0]
+    assert list(star['particles'].columns) == ['rlnCoordinateX', 'rlnOpticsGroup']
+    assert star['particles']['rlnCoordinateX'].tolist() == [1.0, 2.0, 3.0, 4.0, 5.0]
+    assert star['particles']['rlnOpticsGroup'].tolist() == [1, 2, 3, 2, 2]
+
+
+def test_concat_copies_unchanged_rows_verbatim(tmp_path):
+    starfile.concat([postprocess, postprocess], tmp_path / 'c.star', block='fsc')
+    expected = starfile.read(postprocess)
+    actual = starfile.read(tmp_path / 'c.star')
+    assert actual['general'] == expected['general']
+    pd.testing.assert_frame_equal(
+        actual['fsc'], pd.concat([expected['fsc']] * 2, ignore_index=True)
+    )
+    pd.testing.assert_frame_equal(actual['guinier'], expected['guinier'])
+
+
+def test_concat_incompatible_columns(tmp_path):
+    starfile.write({'optics': optics_a, 'particles': particles_a}, tmp_path / 'a.star')
+    starfile.write(
+        {'optics': optics_a, 'particles': particles_a.assign(extra=0)},
+        tmp_path / 'b.star',
+    )
+    with pytest.raises(ValueError):
+        starfile.concat([tmp_path / 'a.star', tmp_path / 'b.star'], tmp_path / 'c.star')
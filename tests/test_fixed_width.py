@@ -0,0 +1,72 @@
+import numpy as np
+import pandas as pd
+
+import starfile
+from starfile.writer import StarWriter
+
+from .constants import loop_simple, postprocess
+
+particles = pd.DataFrame({
+    'rlnOriginXAngst': [1.5, -2.25, 10.0],
+    'rlnImageName': ['1@stack.mrcs', '2@stack.mrcs', '3@a b.mrcs'],
+    'rlnClassNumber': [1, 2, 3],
+})
+
+
+def test_fixed_width_rows_have_equal_length():
+    text = StarWriter(particles, header=None, fixed_width=True).to_string()
+    rows = text.splitlines()[6:9]
+    assert len({len(row) for row in rows}) == 1
+    assert rows[0].split('\t')[0] == ' 1.500000'
+
+
+def test_update_columns_in_place(tmp_path):
+    filename = tmp_path / 'particles.star'
+    starfile.write(
+        {'optics': {'rlnVoltage': 300}, 'particles': particles},
+        filename,
+        fixed_width=True,
+    )
+    size = filename.stat().st_size
+
+    new_values = {'rlnOriginXAngst': [3.0, 4.0, -5.0], 'rlnClassNumber': [7, 8, 9]}
+    assert starfile.update_columns(filename, 'particles', new_values) is True
+    assert filename.stat().st_size == size
+
+    df = starfile.read(filename)['particles']
+    np.testing.assert_array_equal(df['rlnOriginXAngst'], [3.0, 4.0, -5.0])
+    np.testing.assert_array_equal(df['rlnClassNumber'], [7, 8, 9])
+    assert df['rlnImageName'].tolist() == particles['rlnImageName'].tolist()
+
+
+def test_update_columns_rewrites_when_too_wide(tmp_path):
+    filename = tmp_path / 'particles.star'
+    starfile.write(particles, filename, fixed_width=True)
+
+    new_values = {'rlnOriginXAngst': [1e6, 0.0, 0.0]}
+    assert starfile.update_columns(filename, None, new_values) is False
+    assert starfile.read(filename)['rlnOriginXAngst'].tolist() == [1e6, 0.0, 0.0]
+
+    # the rewritten file is fixed width, so now fits in place
+    columns = {'rlnOriginXAngst': [2e5, 0.0, 0.0]}
+    assert starfile.update_columns(filename, None, columns) is True
+
+
+def test_update_columns_file_not_fixed_width(tmp_path):
+    filename = tmp_path / 'loop.star'
+    filename.write_bytes(loop_simple.read_bytes())
+    n_rows = len(starfile.read(loop_simple))
+    columns = {'rlnAngleRot': np.zeros(n_rows)}
+    assert starfile.update_columns(filename, None, columns) is False
+    assert (starfile.read(filename)['rlnAngleRot'] == 0).all()
+
+
+def test_update_columns_multiblock_untouched_blocks(tmp_path):
+    filename = tmp_path / 'postprocess.star'
+    data = starfile.read(postprocess)
+    starfile.write(data, filename, fixed_width=True)
+    n_rows = len(data['fsc'])
+    starfile.update_columns(filename, 'fsc', {'rlnResolution': np.arange(n_rows) / 100})
+    actual = starfile.read(filename)
+    pd.testing.assert_frame_equal(actual['guinier'], data['guinier'], atol=1e-6)
+    np.testing.assert_allclose(actual['fsc']['rlnResolution'], np.arange(n_rows) / 100)
@@ -0,0 +1,75 @@
+import asyncio
+
+import pandas as pd
+
+import starfile
+from starfile.follow import Follower
+
+header = 'data_particles\n\nloop_\n_rlnCoordinateX #1\n_rlnMicrographName #2\n'
+
+
+def test_follower_yields_only_new_complete_rows(tmp_path):
+    filename = tmp_path / 'particles.star'
+    follower = Follower(filename)
+    assert follower.poll() is None  # file does not exist yet
+
+    filename.write_text(header + '1.0\tmic1.mrc\n2.0\tmic1.mrc\n3.0\tmi')
+    df = follower.poll()
+    assert df['rlnCoordinateX'].tolist() == [1.0, 2.0]
+    assert df.attrs['reset'] is False
+    assert follower.poll() is None
+
+    with open(filename, 'a') as f:
+        f.write('c2.mrc\n4.0\tmic2.mrc\n')
+    df = follower.poll()
+    assert df['rlnCoordinateX'].tolist() == [3.0, 4.0]
+    assert df['rlnMicrographName'].tolist() == ['mic2.mrc', 'mic2.mrc']
+
+
+def test_follower_rereads_truncated_file(tmp_path):
+    filename = tmp_path / 'particles.star'
+    filename.write_text(header + '1.0\tmic1.mrc\n2.0\tmic1.mrc\n')
+    follower = Follower(filename)
+    assert len(follower.poll()) == 2
+
+    filename.write_text(header + '5.0\tmic5.mrc\n')
+    df = follower.poll()
+    assert df['rlnCoordinateX'].tolist() == [5.0]
+    assert df.attrs['reset'] is True
+
+
+def test_follower_rereads_file_rewritten_in_place(tmp_path):
+    filename = tmp_path / 'particles.star'
+    filename.write_text(header + '1.0\tmic1.mrc\n2.0\tmic1.mrc\n')
+    follower = Follower(filename)
+    assert len(follower.poll()) == 2
+
+    # same inode and header, larger file, different rows
+    inode = filename.stat().st_ino
+    with open(filename, 'r+') as f:
+        f.truncate(0)
+        f.write(header + '10.0\tmic10.mrc\n20.0\tmic20.mrc\n30.0\tmic30.mrc\n')
+    assert filename.stat().st_ino == inode
+    df = follower.poll()
+    assert df['rlnCoordinateX'].tolist() == [10.0, 20.0, 30.0]
+    assert df.attrs['reset'] is True
+
+
+def test_follow_stops_after_timeout(tmp_path):
+    filename = tmp_path / 'particles.star'
+    filename.write_text(header + '1.0\tmic1.mrc\n')
+    chunks = list(starfile.follow(filename, interval=0.01, timeout=0.05))
+    assert len(chunks) == 1
+    pd.testing.assert_frame_equal(chunks[0], starfile.read(filename))
+
+
+def test_afollow(tmp_path):
+    filename = tmp_path / 'particles.star'
+    filename.write_text(header + '1.0\tmic1.mrc\n')
+
+    async def collect():
+        chunks = starfile.afollow(filename, interval=0.01, timeout=0.05)
+        return [df async for df in chunks]
+
+    chunks = asyncio.run(collect())
+    assert [len(df) for df in chunks] == [1]
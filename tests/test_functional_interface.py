@@ -43,3 +43,55 @@ def test_generate_string():
     starfile.write(test_df, output_file, overwrite=True)
     with open(output_file, "r") as f:
         assert f.read() == star_string
+
+
+def test_write_n_threads(tmp_path):
+    output_file = tmp_path / 'test_write.star'
+    starfile.write(test_df, output_file, n_threads=2)
+    pd.testing.assert_frame_equal(starfile.read(output_file), test_df)
+
+
+def test_content_hash_ignores_header(tmp_path):
+    a, b = tmp_path / 'a.star', tmp_path / 'b.star'
+    starfile.write(test_df, a)
+    starfile.write(test_df, b, header=lambda: 'a different comment')
+    assert a.read_bytes() != b.read_bytes()
+    assert starfile.content_hash(a) == starfile.content_hash(b)
+
+    starfile.write(test_df.iloc[:2], b, header='static')
+    assert starfile.content_hash(a) != starfile.content_hash(b)
+
+
+def test_write_many(tmp_path):
+    files = {
+        tmp_path / f'mic_{idx:04d}.star': pd.DataFrame(
+            {'rlnCoordinateX': [idx, idx + 0.5]}
+        )
+        for idx in range(20)
+    }
+    files[tmp_path / 'missing' / 'mic.star'] = pd.DataFrame({'rlnCoordinateX': [0.0]})
+    failures = starfile.write_many(files, workers=4, header='static')
+    assert list(failures) == [tmp_path / 'missing' / 'mic.star']
+    assert isinstance(failures[tmp_path / 'missing' / 'mic.star'], FileNotFoundError)
+    for filename, df in list(files.items())[:-1]:
+        assert filename.read_text() == starfile.to_string(df, header='static')
+
+
+def test_write_many_formats_files_together(tmp_path):
+    files = {
+        tmp_path / f'mic_{idx}.star': {
+            'optics': {'rlnOpticsGroup': 1, 'rlnMicrographName': f'mic {idx}.mrc'},
+            'particles': pd.DataFrame({
+                'rlnCoordinateX': [idx + 0.25] * idx,
+                'rlnClassNumber': list(range(idx)),
+                'rlnMicrographName': [f'mic_{idx}.mrc'] * idx,
+            }),
+        }
+        for idx in range(5)
+    }
+    files[tmp_path / 'other.star'] = pd.DataFrame({'rlnCoordinateX': ['a b', None]})
+    files[tmp_path / 'invalid.star'] = 'not a data block'
+    failures = starfile.write_many(files, header='static')
+    assert list(failures) == [tmp_path / 'invalid.star']
+    for filename, data in list(files.items())[:-1]:
+        assert filename.read_text() == starfile.to_string(data, header='static')
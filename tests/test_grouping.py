@@ -0,0 +1,96 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+import starfile
+
+from .constants import pipeline
+
+
+@pytest.fixture
+def particles():
+    rng = np.random.default_rng(0)
+    return pd.DataFrame({
+        'rlnMicrographName': rng.choice(['mic1.mrc', 'mic2.mrc', 'mic3.mrc'], 50),
+        'rlnCoordinateX': rng.random(50),
+        'rlnClassNumber': rng.integers(1, 5, 50),
+    })
+
+
+def expected_groups(df, by):
+    return [
+        (key, group.reset_index(drop=True))
+        for key, group in df.groupby(by, sort=False)
+    ]
+
+
+@pytest.mark.parametrize('contiguous', [None, False])
+def test_iter_groups_unsorted_matches_groupby(tmp_path, particles, contiguous):
+    filename = tmp_path / 'particles.star'
+    starfile.write(particles, filename)
+    df = starfile.read(filename)
+    groups = list(starfile.iter_groups(filename, chunksize=7, contiguous=contiguous))
+    assert len(groups) == 3
+    reference = expected_groups(df, 'rlnMicrographName')
+    for (key, actual), (expected_key, expected) in zip(groups, reference):
+        assert key == expected_key
+        pd.testing.assert_frame_equal(actual, expected)
+
+
+def test_iter_groups_contiguous_streams_runs(tmp_path, particles):
+    filename = tmp_path / 'particles.star'
+    starfile.write(particles.sort_values('rlnMicrographName', kind='stable'), filename)
+    df = starfile.read(filename)
+    groups = list(starfile.iter_groups(filename, chunksize=7, contiguous=True))
+    assert [key for key, _ in groups] == ['mic1.mrc', 'mic2.mrc', 'mic3.mrc']
+    reference = expected_groups(df, 'rlnMicrographName')
+    for (_, actual), (_, expected) in zip(groups, reference):
+        pd.testing.assert_frame_equal(actual, expected)
+
+
+def test_iter_groups_split_group_raises_when_assumed_contiguous(tmp_path, particles):
+    filename = tmp_path / 'particles.star'
+    starfile.write(particles, filename)
+    with pytest.raises(ValueError):
+        list(starfile.iter_groups(filename, contiguous=True))
+
+
+def test_iter_groups_by_other_column():
+    df = starfile.read(pipeline)['pipeline_nodes']
+    groups = dict(starfile.iter_groups(
+        pipeline, 'pipeline_nodes', by='rlnPipeLineNodeType', chunksize=5
+    ))
+    assert sorted(groups) == sorted(df['rlnPipeLineNodeType'].unique())
+    assert sum(len(group) for group in groups.values()) == len(df)
+
+
+def test_iter_groups_contiguity_check_parses_only_key_column(
+    tmp_path, particles, monkeypatch
+):
+    filename = tmp_path / 'particles.star'
+    starfile.write(particles.sort_values('rlnMicrographName', kind='stable'), filename)
+    parse_loop_data = starfile.streaming.parse_loop_data
+    parsed_columns = []
+
+    def recording_parse_loop_data(*args, usecols=None, **kwargs):
+        parsed_columns.append(usecols)
+        return parse_loop_data(*args, usecols=usecols, **kwargs)
+
+    monkeypatch.setattr('starfile.streaming.parse_loop_data', recording_parse_loop_data)
+    groups = list(starfile.iter_groups(filename, chunksize=7))
+    assert [key for key, _ in groups] == ['mic1.mrc', 'mic2.mrc', 'mic3.mrc']
+    n_chunks = len(parsed_columns) // 2
+    assert parsed_columns[:n_chunks] == [['rlnMicrographName']] * n_chunks
+
+
+def test_iter_groups_sorted_with_types_differing_between_chunks(tmp_path):
+    df = pd.DataFrame({
+        'rlnMicrographName': ['a', 'b'] * 4,
+        'rlnInt': [1, 2, 3, 4, 5, 6, 7, 8],
+        'rlnMixed': ['1', '2', '3', '4', '5', '6', 'x', 'y'],
+    })
+    filename = tmp_path / 'particles.star'
+    starfile.write(df, filename)
+    groups = dict(starfile.iter_groups(filename, chunksize=3, contiguous=False))
+    assert groups['a']['rlnInt'].tolist() == [1, 3, 5, 7]
+    assert groups['b']['rlnMixed'].tolist() == [2, 4, 6, 'y']
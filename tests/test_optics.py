@@ -0,0 +1,55 @@
+import pandas as pd
+import pytest
+
+import starfile
+
+optics = pd.DataFrame({
+    'rlnOpticsGroup': [1, 2],
+    'rlnOpticsGroupName': ['opticsGroup1', 'opticsGroup2'],
+    'rlnVoltage': [300.0, 200.0],
+    'rlnImagePixelSize': [1.1, 0.85],
+})
+particles = pd.DataFrame({
+    'rlnCoordinateX': [1.0, 2.0, 3.0, 4.0],
+    'rlnOpticsGroup': [2, 1, 2, 1],
+})
+
+
+def test_join_optics_matches_merge():
+    data = {'optics': optics, 'particles': particles}
+    actual = starfile.join_optics(data, categorical=False)
+    expected = particles.merge(optics, on='rlnOpticsGroup', how='left')
+    pd.testing.assert_frame_equal(actual, expected)
+
+
+def test_join_optics_selected_columns_categorical():
+    data = {'optics': optics, 'particles': particles}
+    df = starfile.join_optics(data, columns=['rlnOpticsGroupName'])
+    assert list(df.columns) == [*particles.columns, 'rlnOpticsGroupName']
+    assert isinstance(df['rlnOpticsGroupName'].dtype, pd.CategoricalDtype)
+    assert list(df['rlnOpticsGroupName']) == ['opticsGroup2', 'opticsGroup1'] * 2
+    assert 'rlnOpticsGroupName' not in particles.columns
+
+
+def test_join_optics_missing_group():
+    data = {'optics': optics.iloc[:1], 'particles': particles}
+    df = starfile.join_optics(data, columns=['rlnVoltage'])
+    assert df['rlnVoltage'].isna().tolist() == [True, False, True, False]
+
+
+def test_split_optics_round_trip(tmp_path):
+    data = {'optics': optics, 'particles': particles}
+    flat = starfile.join_optics(data)
+    split = starfile.split_optics(flat, columns=list(optics.columns))
+
+    output_file = tmp_path / 'particles.star'
+    starfile.write(split, output_file)
+    actual = starfile.read(output_file)
+    pd.testing.assert_frame_equal(actual['optics'], optics)
+    pd.testing.assert_frame_equal(actual['particles'], particles)
+
+
+def test_split_optics_inconsistent_values():
+    df = particles.assign(rlnVoltage=[300.0, 300.0, 200.0, 300.0])
+    with pytest.raises(ValueError):
+        starfile.split_optics(df, columns=['rlnVoltage'])
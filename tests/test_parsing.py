@@ -5,7 +5,8 @@ import pandas as pd
 import numpy as np
 import pytest
 
-from starfile.parser import StarParser
+import starfile
+from starfile.parser import StarParser, parse_loop_data, parse_loop_data_parallel
 from .constants import (
     loop_simple,
     postprocess,
@@ -25,6 +26,7 @@ from .constants import (
     basic_double_quote,
     loop_single_quote,
     loop_double_quote,
+    loop_star_grammar,
 )
 from .utils import generate_large_star_file, remove_large_star_file, million_row_file
 
@@ -244,6 +246,18 @@ def test_empty_loop_block():
     assert len(parser.data_blocks) == 1
 
 
+def test_empty_loop_block_followed_by_block(tmp_path):
+    filename = tmp_path / 'empty_loop.star'
+    filename.write_text(
+        'data_empty\n\nloop_\n_rlnValue\n\n'
+        'data_next\n\nloop_\n_rlnValue\n1\n2\n'
+    )
+    data_blocks = StarParser(filename).data_blocks
+    assert list(data_blocks) == ['empty', 'next']
+    assert len(data_blocks['empty']) == 0
+    assert data_blocks['next']['rlnValue'].tolist() == [1, 2]
+
+
 @pytest.mark.parametrize("quote_character, filename", [("'", basic_single_quote),
                                                        ('"', basic_double_quote),
                                                        ])
@@ -301,3 +315,65 @@ def test_parse_na(tmpdir):
     starfile.write(data, tmpfile) 
     data = starfile.read(tmpfile)
     assert data["property2"].dtype == "float64"
+
+
+def test_star_grammar_loop():
+    """Apostrophes, '#' inside values, text fields and trailing comments."""
+    df = StarParser(loop_star_grammar).data_blocks['']
+    assert df['unquoted_apostrophe'].tolist() == ["O'Brien", 'x']
+    assert df['quoted_apostrophe'].tolist() == ["it's here", "say 'hi'"]
+    assert df['hash_in_value'].tolist() == ['a#b', '# not a comment']
+    assert df['text_field'].tolist() == ['first line\nsecond line', ';not_a_text_field']
+    assert df['number'].tolist() == [1.5, 2.5]
+
+
+@pytest.mark.parametrize('loop_data', [
+    "'1' '1.5' 'True' 'a' '<NA>'\n'2' 'nan' 'False' 'b' '3'\n",  # read_csv with quotes
+    "1 1.5 True a <NA> # comment\n2 nan False b 3\n",  # tokenized
+    "1 1.5 True 'a' <NA>\n;2\n;\nnan False \"b\" 3\n",  # tokenized, text field
+])
+def test_dtypes_do_not_depend_on_quoting(loop_data):
+    expected = parse_loop_data("1 1.5 True a <NA>\n2 nan False b 3\n", list('ifbsn'))
+    df = parse_loop_data(loop_data, list('ifbsn'))
+    pd.testing.assert_frame_equal(df, expected)
+    assert df.dtypes.tolist() == [np.int64, np.float64, bool, object, np.float64]
+
+
+@pytest.mark.parametrize('n_threads', [2, 3, 7])
+def test_parallel_parse_matches_serial(monkeypatch, n_threads):
+    monkeypatch.setattr(starfile.parser, 'MIN_BYTES_PER_THREAD', 1)
+    for filename in (postprocess, pipeline, rln31_style, loop_star_grammar):
+        expected = starfile.read(filename, always_dict=True)
+        actual = starfile.read(filename, always_dict=True, n_threads=n_threads)
+        for name, block in expected.items():
+            if isinstance(block, pd.DataFrame):
+                pd.testing.assert_frame_equal(actual[name], block)
+
+
+# pytest turns the warning into an error before the filter of starfile.parser
+@pytest.mark.filterwarnings('ignore::pandas.errors.DtypeWarning')
+def test_parallel_parse_matches_serial_on_mixed_column(monkeypatch, tmp_path):
+    # longer than the blocks of rows in which read_csv infers types
+    monkeypatch.setattr(starfile.parser, 'MIN_BYTES_PER_THREAD', 1)
+    rows = [f'{idx:03d}\t{idx}\n' for idx in range(300_000)]
+    rows[-10] = 'foo\t1\n'
+    filename = tmp_path / 'mixed.star'
+    filename.write_text('data_\n\nloop_\n_rlnA #1\n_rlnB #2\n' + ''.join(rows))
+    expected = starfile.read(filename, n_threads=1)
+    assert expected['rlnA'].map(type).eq(str).all()
+    assert expected['rlnA'].iloc[[0, -10]].tolist() == ['000', 'foo']
+    assert expected['rlnB'].dtype == np.int64
+    pd.testing.assert_frame_equal(starfile.read(filename, n_threads=2), expected)
+
+
+def test_parallel_parse_reconciles_dtypes(monkeypatch):
+    monkeypatch.setattr(starfile.parser, 'MIN_BYTES_PER_THREAD', 1)
+    loop_data = '1\ta\n2\tb\n3.5\tc\n4\td\n'
+    df = parse_loop_data_parallel(loop_data, ['x', 'y'], n_threads=2)
+    assert df['x'].dtype == float
+    assert df['x'].tolist() == [1.0, 2.0, 3.5, 4.0]
+
+    loop_data = '1\t1\n2\t2\nfoo\t3\n'
+    df = parse_loop_data_parallel(loop_data, ['x', 'y'], n_threads=3)
+    assert df['x'].tolist() == ['1', '2', 'foo']
+    assert df['y'].tolist() == [1, 2, 3]
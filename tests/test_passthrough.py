@@ -0,0 +1,77 @@
+import pandas as pd
+
+import starfile
+from starfile.passthrough import SourcedBlocks
+from starfile.streaming import scan_blocks
+
+from .constants import postprocess
+
+
+def block_bytes(filename):
+    data = filename.read_bytes()
+    return {
+        name: data[info.start:info.end]
+        for name, info in scan_blocks(filename).items()
+    }
+
+
+def test_unmodified_blocks_copied_verbatim(tmp_path):
+    star = starfile.read(postprocess, keep_source=True)
+    assert isinstance(star, SourcedBlocks)
+    star['fsc'] = star['fsc'].iloc[:10]
+
+    output_file = tmp_path / 'postprocess.star'
+    starfile.write(star, output_file)
+    original, written = block_bytes(postprocess), block_bytes(output_file)
+    assert written['general'] == original['general']
+    assert written['guinier'] == original['guinier']
+    assert written['fsc'] != original['fsc']
+    pd.testing.assert_frame_equal(starfile.read(output_file)['fsc'], star['fsc'])
+
+
+def test_read_modify_write_same_file(tmp_path):
+    filename = tmp_path / 'postprocess.star'
+    filename.write_bytes(postprocess.read_bytes())
+    star = starfile.read(filename, keep_source=True)
+    star['general']['rlnFinalResolution'] = 3.5
+    starfile.write(star, filename)
+
+    actual = starfile.read(filename)
+    assert actual['general']['rlnFinalResolution'] == 3.5
+    assert block_bytes(filename)['fsc'] == block_bytes(postprocess)['fsc']
+    expected = starfile.read(postprocess)['guinier']
+    pd.testing.assert_frame_equal(actual['guinier'], expected)
+
+
+def test_to_string_passthrough():
+    star = starfile.read(postprocess, keep_source=True)
+    text = starfile.to_string(star, header=None)
+    assert text == postprocess.read_text()[scan_blocks(postprocess)['general'].start:]
+
+
+def test_in_place_modification_is_reformatted(tmp_path):
+    star = starfile.read(postprocess, keep_source=True)
+    star['guinier'].loc[2, 'rlnLogAmplitudesOriginal'] += 1.0
+    output_file = tmp_path / 'postprocess.star'
+    starfile.write(star, output_file)
+    assert block_bytes(output_file)['guinier'] != block_bytes(postprocess)['guinier']
+    pd.testing.assert_frame_equal(
+        starfile.read(output_file)['guinier'],
+        star['guinier'],
+        check_exact=False,
+        atol=1e-6,
+    )
+
+
+def test_indented_block_headers(tmp_path):
+    filename = tmp_path / 'indented.star'
+    filename.write_text(
+        '  data_general\n\n_rlnFinalResolution   3.2\n\n'
+        ' data_values\n\nloop_\n_rlnValue\n1\n2\n'
+    )
+    star = starfile.read(filename, keep_source=True)
+    star['values']['rlnValue'] *= 10
+    output_file = tmp_path / 'output.star'
+    starfile.write(star, output_file, header=None)
+    assert block_bytes(output_file)['general'] == block_bytes(filename)['general']
+    assert starfile.read(output_file)['values']['rlnValue'].tolist() == [10, 20]
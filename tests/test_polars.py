@@ -0,0 +1,77 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+import starfile
+
+from .constants import postprocess
+
+pl = pytest.importorskip('polars')
+assert_polars_frame_equal = pytest.importorskip('polars.testing').assert_frame_equal
+
+
+def test_read_polars_backend():
+    expected = starfile.read(postprocess)
+    actual = starfile.read(postprocess, backend='polars')
+    assert actual['general'] == expected['general']
+    assert isinstance(actual['fsc'], pl.DataFrame)
+    pd.testing.assert_frame_equal(actual['fsc'].to_pandas(), expected['fsc'])
+
+
+def test_read_polars_parses_plain_loops_with_arrow(tmp_path, monkeypatch):
+    df = pd.DataFrame({
+        'i': [1, 2, 3],
+        'x': [1.5, np.nan, -0.25],
+        'j': [1, None, 3],
+        'b': [True, False, True],
+        's': ['a', None, 'c'],
+        'n': [np.nan, np.nan, np.nan],
+        'd': ['2020-01-01', '2020-01-02', '2020-01-03'],
+        'k': ['1', '2', '3'],
+    })
+    for sep in ('\t', ' '):
+        starfile.write({'block': df}, tmp_path / 'out.star', sep=sep)
+        expected = starfile.read(tmp_path / 'out.star', parse_as_string=['k'])
+        with monkeypatch.context() as m:
+            m.setattr(starfile.functions, 'parse_loop_data', None)  # must not be needed
+            actual = starfile.read(
+                tmp_path / 'out.star', parse_as_string=['k'], backend='polars'
+            )
+        assert_polars_frame_equal(actual, pl.from_pandas(expected))
+
+
+def test_read_polars_falls_back_to_pandas(tmp_path):
+    text = "data_\n\nloop_\n_a\n_b\n'x y'  1\n z    2 # comment\n"
+    (tmp_path / 'quoted.star').write_text(text)
+    expected = starfile.read(tmp_path / 'quoted.star')
+    actual = starfile.read(tmp_path / 'quoted.star', backend='polars')
+    assert_polars_frame_equal(actual, pl.from_pandas(expected))
+
+
+def test_write_polars_matches_pandas():
+    df = pd.DataFrame({
+        'x': [1.5, np.nan, -0.25],
+        'i': [1, 2, 3],
+        'b': [True, False, True],
+        's': ['a b', None, "it's"],
+        'c': pd.Categorical(['p', 'q', 'p']),
+        'e': [1e-10, 2.0, 3.0],
+    })
+    float_format = {'e': '%.3e'}
+    expected = starfile.to_string(df, header=None, float_format=float_format)
+    actual = starfile.to_string(
+        pl.from_pandas(df), header=None, float_format=float_format
+    )
+    assert actual == expected
+
+
+def test_write_polars_nulls(tmp_path):
+    df = pl.DataFrame({'i': [1, None], 's': ['x', None]})
+    starfile.write({'block': df}, tmp_path / 'out.star', header=None)
+    assert starfile.read(tmp_path / 'out.star')['s'].isna().tolist() == [False, True]
+    assert '<NA>\t<NA>' in (tmp_path / 'out.star').read_text()
+
+
+def test_invalid_backend():
+    with pytest.raises(ValueError):
+        starfile.read(postprocess, backend='arrow')
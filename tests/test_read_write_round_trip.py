@@ -52,3 +52,16 @@ def test_write_read_write_read(tmp_path):
 
     df_b_read = starfile.read(filename)
     pandas.testing.assert_frame_equal(df_b, df_b_read)
+
+
+def test_round_trip_strings_needing_quotes(tmp_path):
+    filename = tmp_path / 'tmp.star'
+    values = [
+        "it's", "it's here", 'say "hi" now', '_x', '#x', 'data_x', ';x', 'a b', ''
+    ]
+    df = pd.DataFrame({'a': values, 'b': range(len(values))})
+    starfile.write({'simple': {'a': "it's here"}, 'loop': df}, filename)
+
+    star = starfile.read(filename)
+    assert star['simple'] == {'a': "it's here"}
+    pandas.testing.assert_frame_equal(star['loop'], df)
@@ -0,0 +1,80 @@
+import pandas as pd
+import pytest
+
+import starfile
+from starfile.row_index import row_index_path
+
+from .constants import pipeline, postprocess
+
+
+@pytest.mark.parametrize('indexed', [False, True])
+def test_read_rows_matches_iloc(tmp_path, indexed):
+    filename = tmp_path / 'pipeline.star'
+    filename.write_bytes(pipeline.read_bytes())
+    if indexed:
+        assert starfile.build_row_index(filename, every=4) == row_index_path(filename)
+    expected = starfile.read(filename)['pipeline_nodes']
+    rows = [70, 0, 5, 5, -1, 13]
+    actual = starfile.read_rows(filename, 'pipeline_nodes', rows=rows)
+    pd.testing.assert_frame_equal(actual, expected.iloc[rows].reset_index(drop=True))
+
+
+def test_read_rows_with_index_does_not_scan_file(tmp_path, monkeypatch):
+    filename = tmp_path / 'postprocess.star'
+    filename.write_bytes(postprocess.read_bytes())
+    starfile.build_row_index(filename, every=4)
+    expected = starfile.read(filename)['fsc'].iloc[[3, 20]].reset_index(drop=True)
+
+    def scan_blocks(filename):
+        raise AssertionError('file scanned despite an up to date index')
+
+    monkeypatch.setattr('starfile.row_index.scan_blocks', scan_blocks)
+    actual = starfile.read_rows(filename, 'fsc', rows=[3, 20])
+    pd.testing.assert_frame_equal(actual, expected)
+    assert starfile.build_row_index(filename, every=4) == row_index_path(filename)
+
+
+def test_stale_row_index_is_ignored(tmp_path):
+    filename = tmp_path / 'postprocess.star'
+    filename.write_bytes(postprocess.read_bytes())
+    starfile.build_row_index(filename, every=2)
+    df = starfile.read(filename)
+    df['fsc'] = df['fsc'].iloc[10:].reset_index(drop=True)
+    starfile.write(df, filename)
+
+    actual = starfile.read_rows(filename, 'fsc', rows=[0, 1])
+    pd.testing.assert_frame_equal(actual, df['fsc'].iloc[[0, 1]].reset_index(drop=True))
+
+
+def test_read_rows_out_of_range():
+    with pytest.raises(IndexError):
+        starfile.read_rows(postprocess, 'guinier', rows=[10_000])
+
+
+def test_sample_is_reproducible_subset():
+    df = starfile.read(pipeline)['pipeline_nodes']
+    first = starfile.sample(pipeline, 'pipeline_nodes', n=10, seed=42)
+    second = starfile.sample(pipeline, 'pipeline_nodes', n=10, seed=42)
+    pd.testing.assert_frame_equal(first, second)
+    assert len(first) == 10
+    assert first['rlnPipeLineNodeName'].is_unique
+    assert first['rlnPipeLineNodeName'].isin(df['rlnPipeLineNodeName']).all()
+
+
+def test_sample_larger_than_block():
+    df = starfile.read(postprocess)['guinier']
+    pd.testing.assert_frame_equal(starfile.sample(postprocess, 'guinier', n=10_000), df)
+
+
+def test_sample_with_index_does_not_scan_file(tmp_path, monkeypatch):
+    filename = tmp_path / 'pipeline.star'
+    filename.write_bytes(pipeline.read_bytes())
+    expected = starfile.sample(filename, 'pipeline_nodes', n=10, seed=0)
+    starfile.build_row_index(filename, every=8)
+
+    def scan_blocks(filename):
+        raise AssertionError('file scanned despite an up to date index')
+
+    monkeypatch.setattr('starfile.row_index.scan_blocks', scan_blocks)
+    actual = starfile.sample(filename, 'pipeline_nodes', n=10, seed=0)
+    pd.testing.assert_frame_equal(actual, expected)
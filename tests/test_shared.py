@@ -0,0 +1,62 @@
+import pickle
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+import pandas as pd
+import pytest
+
+import starfile
+
+from .constants import postprocess
+
+
+def column_sum(table, column):
+    return table.to_pandas()[column].sum()
+
+
+def test_share_file_block_with_worker_process():
+    expected = starfile.read(postprocess)['fsc']
+    with starfile.share(postprocess, block='fsc') as table:
+        with ProcessPoolExecutor(1) as executor:
+            result = executor.submit(
+                column_sum, table, 'rlnFourierShellCorrelationCorrected'
+            )
+            assert result.result() == pytest.approx(
+                expected['rlnFourierShellCorrelationCorrected'].sum()
+            )
+        pd.testing.assert_frame_equal(table.to_pandas(), expected)
+
+
+def test_share_dataframe_is_read_only_view():
+    df = pd.DataFrame({'a': np.arange(5.0), 'b': list('abcde')})
+    table = starfile.share(df)
+    shared = pickle.loads(pickle.dumps(table)).to_pandas()
+    pd.testing.assert_frame_equal(shared, df)
+    assert not shared['a'].to_numpy().flags.writeable
+
+
+def test_release_frees_shared_memory():
+    table = starfile.share(pd.DataFrame({'a': [1, 2]}))
+    worker_handle = pickle.loads(pickle.dumps(table))
+    worker_handle.release()
+    assert table.path.exists()
+    table.release()
+    assert not table.path.exists()
+
+
+def test_share_in_chunks_matches_read(tmp_path):
+    filename = tmp_path / 'mixed.star'
+    filename.write_text(
+        'data_mixed\n\nloop_\n_rlnA #1\n_rlnB #2\n_rlnC #3\n'
+        '1 001 1\n2 002 2\n3.5 003 3\n4 abc 4\n5 005 5\n'
+    )
+    expected = starfile.read(filename)
+    with starfile.share(filename, chunksize=2) as table:
+        pd.testing.assert_frame_equal(table.to_pandas(), expected)
+
+
+def test_share_empty_loop_block(tmp_path):
+    filename = tmp_path / 'empty.star'
+    filename.write_text('data_empty\n\nloop_\n_rlnA #1\n_rlnB #2\n')
+    with starfile.share(filename) as table:
+        pd.testing.assert_frame_equal(table.to_pandas(), starfile.read(filename))
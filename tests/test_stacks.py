@@ -0,0 +1,72 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+import starfile
+from starfile.stacks import join_stack_columns, split_stack_columns
+
+particles = pd.DataFrame({
+    'rlnCoordinateX': [1.0, 2.0, 3.0],
+    'rlnImageName': [
+        '000001@Extract/job012/Movies/mic_0001.mrcs',
+        '000002@Extract/job012/Movies/mic_0001.mrcs',
+        '000001@Extract/job012/Movies/mic_0002.mrcs',
+    ],
+    'rlnMicrographName': ['mic_0001.mrc', 'mic_0001.mrc', 'mic_0002.mrc'],
+})
+
+
+def test_read_split_stacks(tmp_path):
+    filename = tmp_path / 'particles.star'
+    starfile.write({'optics': {'rlnVoltage': 300.0}, 'particles': particles}, filename)
+    df = starfile.read(filename, split_stacks=['rlnImageName'])['particles']
+    assert list(df.columns) == [
+        'rlnCoordinateX',
+        'rlnImageName@index',
+        'rlnImageName@stack',
+        'rlnMicrographName',
+    ]
+    assert df['rlnImageName@index'].tolist() == [1, 2, 1]
+    assert df['rlnImageName@index'].dtype == np.int64
+    assert isinstance(df['rlnImageName@stack'].dtype, pd.CategoricalDtype)
+    assert len(df['rlnImageName@stack'].cat.categories) == 2
+
+
+def test_split_stacks_round_trip_is_byte_identical(tmp_path):
+    filename = tmp_path / 'particles.star'
+    starfile.write(particles, filename, header=None)
+    df = starfile.read(filename, split_stacks=True)
+    assert 'rlnImageName@index' in df.columns
+    assert 'rlnMicrographName' in df.columns  # not index@stack references
+    actual = starfile.to_string(df[df['rlnCoordinateX'] > 0], header=None)
+    assert actual == filename.read_text()
+
+
+def test_join_stack_columns_keeps_unpadded_indices_and_nulls():
+    df = pd.DataFrame({'rlnImageName': ['1@a.mrcs', '12@a.mrcs', np.nan]})
+    joined = join_stack_columns(split_stack_columns(df))
+    assert joined['rlnImageName'].tolist()[:2] == ['1@a.mrcs', '12@a.mrcs']
+    assert pd.isna(joined['rlnImageName'].iloc[2])
+
+
+def test_split_stacks_rejects_other_columns():
+    with pytest.raises(ValueError):
+        split_stack_columns(particles, ['rlnMicrographName'])
+
+
+def test_write_leaves_unrecorded_stack_suffixes_alone():
+    df = pd.DataFrame({'a@index': [1], 'a@stack': ['x.mrcs']})
+    assert '_a@index' in starfile.to_string(df, header=None)
+    assert '000001@x.mrcs' in starfile.to_string(df, header=None, join_stacks=True)
+
+
+def test_split_stacks_round_trip_polars(tmp_path):
+    pl = pytest.importorskip('polars')
+    filename = tmp_path / 'particles.star'
+    starfile.write(particles, filename, header=None)
+    df = starfile.read(filename, split_stacks=True, backend='polars')
+    assert isinstance(df, pl.DataFrame)
+    assert df['rlnImageName@index'].to_list() == [1, 2, 1]
+    assert df['rlnImageName@stack'].dtype == pl.Categorical
+    actual = starfile.to_string(df, header=None, join_stacks=['rlnImageName'])
+    assert actual == filename.read_text()
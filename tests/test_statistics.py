@@ -0,0 +1,62 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+import starfile
+
+from .constants import pipeline, postprocess
+
+
+def test_describe_matches_pandas():
+    df = starfile.read(postprocess)['fsc']
+    statistics = starfile.describe(postprocess, 'fsc', chunksize=7)
+    expected = df.describe()
+    assert list(statistics.index) == list(df.columns)
+    np.testing.assert_allclose(statistics['count'], expected.loc['count'])
+    np.testing.assert_allclose(statistics['min'], expected.loc['min'])
+    np.testing.assert_allclose(statistics['max'], expected.loc['max'])
+    np.testing.assert_allclose(statistics['mean'], expected.loc['mean'])
+    np.testing.assert_allclose(statistics['var'], expected.loc['std'] ** 2)
+    # fewer values than the sample size, quantiles are exact
+    np.testing.assert_allclose(statistics['50%'], expected.loc['50%'])
+
+
+def test_describe_quantiles_from_sample(tmp_path):
+    filename = tmp_path / 'data.star'
+    values = np.random.default_rng(0).normal(size=20_000)
+    starfile.write(pd.DataFrame({'x': values}), filename)
+    statistics = starfile.describe(filename, sample_size=5_000, chunksize=3_000)
+    assert statistics.loc['x', '50%'] == pytest.approx(np.median(values), abs=0.05)
+    assert statistics.loc['x', 'count'] == 20_000
+
+
+def test_describe_string_columns_top_values():
+    df = starfile.read(pipeline)['pipeline_nodes']
+    statistics = starfile.describe(
+        pipeline,
+        'pipeline_nodes',
+        columns=['rlnPipeLineNodeName'],
+        top_k=3,
+        chunksize=10,
+    )
+    top = statistics.loc['rlnPipeLineNodeName', 'top']
+    assert len(top) == 3
+    counts = df['rlnPipeLineNodeName'].value_counts()
+    assert all(count <= counts[value] for value, count in top)
+    assert np.isnan(statistics.loc['rlnPipeLineNodeName', 'mean'])
+
+
+def test_describe_cli():
+    click_testing = pytest.importorskip('click.testing')
+    from starfile.__main__ import main
+
+    result = click_testing.CliRunner().invoke(
+        main,
+        [
+            'describe', str(postprocess),
+            '--block', 'guinier',
+            '--columns', 'rlnResolutionSquared',
+        ],
+    )
+    assert result.exit_code == 0
+    assert 'rlnResolutionSquared' in result.output
@@ -0,0 +1,115 @@
+import pandas as pd
+import pytest
+
+import starfile
+from starfile.streaming import scan_blocks
+
+from .constants import (
+    loop_simple,
+    loop_star_grammar,
+    pipeline,
+    postprocess,
+    rln31_style,
+)
+
+
+def test_scan_blocks():
+    blocks = scan_blocks(postprocess)
+    assert list(blocks) == ['general', 'fsc', 'guinier']
+    assert blocks['general'].is_loop is False
+    assert blocks['fsc'].is_loop is True
+    assert len(blocks['fsc'].column_names) == 7
+    assert blocks['fsc'].end == blocks['guinier'].start
+
+
+def test_scan_blocks_matches_parser(tmp_path):
+    filename = tmp_path / 'text_fields.star'
+    filename.write_text(
+        '  data_general\n\n_rlnFinalResolution 3.2\n\n'
+        'data_notes\n\nloop_\n_rlnNote\n_rlnValue\n'
+        ';\ndata_not_a_block\n;\n1\n'
+        'short 2\n\n'
+        ' data_last\n\nloop_\n_rlnValue\n3\n'
+    )
+    blocks = scan_blocks(filename)
+    star = starfile.read(filename)
+    assert list(blocks) == list(star) == ['general', 'notes', 'last']
+    assert blocks['notes'].column_names == ['rlnNote', 'rlnValue']
+    chunk = next(starfile.iter_chunks(filename, 'notes'))
+    pd.testing.assert_frame_equal(chunk, star['notes'])
+
+
+def test_iter_chunks_matches_read():
+    expected = starfile.read(pipeline)['pipeline_nodes']
+    chunks = list(starfile.iter_chunks(pipeline, 'pipeline_nodes', chunksize=10))
+    assert len(chunks) == 8
+    actual = pd.concat(chunks, ignore_index=True)
+    pd.testing.assert_frame_equal(actual, expected)
+
+
+def test_iter_chunks_requires_block_name_for_multiple_loops():
+    with pytest.raises(ValueError):
+        list(starfile.iter_chunks(postprocess))
+
+
+def test_iter_chunks_block_with_comments():
+    expected = starfile.read(rln31_style)['block_2']
+    actual = pd.concat(starfile.iter_chunks(rln31_style, 'block_2', chunksize=1))
+    pd.testing.assert_frame_equal(actual.reset_index(drop=True), expected)
+
+
+def test_transform_query(tmp_path):
+    output_file = tmp_path / 'filtered.star'
+    starfile.transform(
+        postprocess,
+        output_file,
+        block='fsc',
+        query='rlnSpectralIndex < 10',
+        chunksize=4,
+    )
+    expected = starfile.read(postprocess)
+    actual = starfile.read(output_file)
+    assert actual['general'] == expected['general']
+    pd.testing.assert_frame_equal(actual['guinier'], expected['guinier'])
+    pd.testing.assert_frame_equal(
+        actual['fsc'], expected['fsc'].query('rlnSpectralIndex < 10'), atol=1e-6
+    )
+
+
+def test_transform_passes_other_blocks_verbatim(tmp_path):
+    output_file = tmp_path / 'transformed.star'
+    starfile.transform(
+        postprocess, output_file, block='fsc', fn=lambda df: df.assign(extra=1)
+    )
+    src, dst = postprocess.read_bytes(), output_file.read_bytes()
+    blocks = scan_blocks(postprocess)
+    assert dst.startswith(src[:blocks['fsc'].start])
+    assert dst.endswith(src[blocks['guinier'].start:])
+    assert starfile.read(output_file)['fsc']['extra'].eq(1).all()
+
+
+def test_transform_all_rows_removed(tmp_path):
+    output_file = tmp_path / 'empty.star'
+    starfile.transform(loop_simple, output_file, query='rlnCoordinateX < -1e9')
+    df = starfile.read(output_file)
+    assert df.shape == (0, 12)
+
+
+def test_transform_in_place_error():
+    with pytest.raises(ValueError):
+        starfile.transform(loop_simple, loop_simple, fn=lambda df: df)
+
+
+@pytest.mark.parametrize('chunksize', [1, 2, 3])
+def test_iter_chunks_rows_with_text_fields(tmp_path, chunksize):
+    filename = tmp_path / 'text_fields.star'
+    filename.write_text(
+        loop_star_grammar.read_text()
+        + '\ndata_notes\n\nloop_\n_rlnValue\n_rlnNote\n'
+        '1\n;\nfirst\nsecond\n;\n2 short\n3\n;\n;\n4 last\n'
+    )
+    star = starfile.read(filename)
+    for block in star:
+        chunks = starfile.iter_chunks(filename, block, chunksize=chunksize)
+        actual = pd.concat(chunks, ignore_index=True)
+        pd.testing.assert_frame_equal(actual, star[block])
@@ -0,0 +1,94 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+import starfile
+from starfile.value_index import value_index_path
+
+from .constants import pipeline
+
+
+@pytest.fixture
+def particles_file(tmp_path):
+    rng = np.random.default_rng(0)
+    df = pd.DataFrame({
+        'rlnMicrographName': rng.choice(['mic1.mrc', 'mic2.mrc', 'mic3.mrc'], 50),
+        'rlnCoordinateX': rng.random(50),
+        'rlnOpticsGroup': rng.integers(1, 4, 50),
+    })
+    filename = tmp_path / 'particles.star'
+    starfile.write(df, filename)
+    return filename
+
+
+@pytest.mark.parametrize(
+    'column, values',
+    [('rlnMicrographName', ['mic3.mrc', 'mic1.mrc']), ('rlnOpticsGroup', [2])],
+)
+def test_lookup_matches_isin(particles_file, column, values):
+    df = starfile.read(particles_file)
+    actual = starfile.lookup(particles_file, column=column, values=values)
+    expected = df[df[column].isin(values)].reset_index(drop=True)
+    pd.testing.assert_frame_equal(actual, expected)
+    assert value_index_path(particles_file, '', column).exists()
+
+
+def test_lookup_rebuilds_stale_index(particles_file):
+    starfile.build_value_index(particles_file, column='rlnMicrographName', every=4)
+    df = starfile.read(particles_file).iloc[::2].reset_index(drop=True)
+    starfile.write(df, particles_file)
+    actual = starfile.lookup(
+        particles_file, column='rlnMicrographName', values=['mic2.mrc']
+    )
+    pd.testing.assert_frame_equal(
+        actual, df[df['rlnMicrographName'] == 'mic2.mrc'].reset_index(drop=True)
+    )
+
+
+def test_lookup_without_index(tmp_path):
+    filename = tmp_path / 'pipeline.star'
+    filename.write_bytes(pipeline.read_bytes())
+    with pytest.raises(FileNotFoundError):
+        starfile.lookup(
+            filename, 'pipeline_nodes', 'rlnPipeLineNodeName', ['x'], build_index=False
+        )
+    actual = starfile.lookup(filename, 'pipeline_nodes', 'rlnPipeLineNodeName', ['x'])
+    assert len(actual) == 0
+
+
+@pytest.mark.parametrize('block', [None, ''])
+def test_lookup_with_index_does_not_scan_file(particles_file, monkeypatch, block):
+    starfile.build_value_index(particles_file, column='rlnMicrographName')
+    df = starfile.read(particles_file)
+    expected = df[df['rlnMicrographName'] == 'mic2.mrc'].reset_index(drop=True)
+
+    def scan_blocks(filename):
+        raise AssertionError('file scanned despite up to date indices')
+
+    monkeypatch.setattr('starfile.row_index.scan_blocks', scan_blocks)
+    monkeypatch.setattr('starfile.value_index.scan_blocks', scan_blocks)
+    actual = starfile.lookup(
+        particles_file, block, values=['mic2.mrc'], build_index=False
+    )
+    pd.testing.assert_frame_equal(actual, expected)
+
+
+def test_lookup_zero_padded_keys(tmp_path):
+    filename = tmp_path / 'padded.star'
+    filename.write_text(
+        'data_\n\nloop_\n_rlnImageName #1\n_rlnCoordinateX #2\n'
+        '001 1.0\n001 2.0\n01 3.0\n1 4.0\n002 5.0\n'
+    )
+    starfile.build_value_index(filename, column='rlnImageName', chunksize=2)
+    actual = starfile.lookup(
+        filename,
+        column='rlnImageName',
+        values=['001'],
+        parse_as_string=['rlnImageName'],
+    )
+    assert actual['rlnImageName'].tolist() == ['001', '001']
+    assert actual['rlnCoordinateX'].tolist() == [1.0, 2.0]
+
+    df = starfile.read(filename)
+    actual = starfile.lookup(filename, column='rlnImageName', values=[1])
+    pd.testing.assert_frame_equal(actual, df[df['rlnImageName'] == 1])
@@ -1,6 +1,8 @@
+import os
+import stat
+import time
 from os.path import join as join_path
 from tempfile import TemporaryDirectory
-import time
 
 import pandas as pd
 import pytest
@@ -136,3 +138,101 @@ def test_string_quoting_simple_datablock(quote_character, quote_all_strings, num
 def test_no_filename_error():
     with pytest.raises(ValueError):
         StarWriter(test_df).write()
+
+
+def test_per_column_float_format(tmp_path):
+    df = pd.DataFrame({'rlnAngleRot': [12.3456789], 'rlnCoordinateX': [101.2345]})
+    filename = tmp_path / "test.star"
+    StarWriter(df, filename, float_format={'rlnCoordinateX': '%.2f'}).write()
+    with open(filename) as f:
+        assert '12.345679\t101.23\n' in f.read()
+
+
+def test_vectorised_formatting_matches_pandas():
+    from starfile.writer import loop_block_data, pandas_formatted_rows
+
+    df = pd.DataFrame({
+        'float': [1.5, -0.0, float('nan'), 5e-7, 0.0078125, 1e17, float('inf')],
+        'int': range(7),
+        'string': ['a', 'b c', '', None, 'd', 'e', 'f'],
+        'category': pd.Categorical(['x y', 'z', None, 'z', 'z', 'x y', 'z']),
+        'bool': [True, False] * 3 + [True],
+    })
+    for float_format in ('%.6f', '%.0f', '%.3e'):
+        expected = pandas_formatted_rows(df, float_format, quote_all_strings=True)
+        actual = '\n'.join(loop_block_data(df, float_format, quote_all_strings=True))
+        assert actual == '\n'.join(expected)
+
+
+def test_multithreaded_writing_is_identical():
+    s = StarParser(postprocess)
+    data = {**s.data_blocks, 'large': pd.concat([s.data_blocks['fsc']] * 5000)}
+
+    def data_lines(n_threads):
+        writer = StarWriter(data, n_threads=n_threads)
+        return list(writer.data_block_generator())
+
+    assert data_lines(n_threads=4) == data_lines(n_threads=1)
+
+
+@pytest.mark.parametrize("header", [None, 'static', lambda: 'job042\nrun by test'])
+def test_reproducible_header(header):
+    from starfile.writer import package_info
+
+    first = StarWriter(test_df, header=header).to_string()
+    second = StarWriter(test_df, header=header).to_string()
+    assert first == second
+    assert package_info() not in first
+    if header is None:
+        assert first.startswith('data_')
+    elif header == 'static':
+        assert first.startswith('# Created by the starfile Python package')
+    else:
+        assert first.startswith('# job042\n# run by test\n')
+
+
+def test_atomic_write(tmp_path):
+    filename = tmp_path / "test.star"
+    StarWriter(test_df, filename, atomic=True).write()
+    assert list(tmp_path.iterdir()) == [filename]
+    assert StarParser(filename).data_blocks[''].equals(test_df)
+
+
+@pytest.mark.skipif(os.name != 'posix', reason='POSIX permissions')
+def test_atomic_write_permissions(tmp_path):
+    filename = tmp_path / "test.star"
+    StarWriter(test_df, filename, atomic=True).write()
+    umask = os.umask(0o022)
+    os.umask(umask)
+    assert stat.S_IMODE(filename.stat().st_mode) == 0o666 & ~umask
+
+    # replacing a file keeps its permissions
+    filename.chmod(0o640)
+    StarWriter(test_df, filename, atomic=True).write()
+    assert stat.S_IMODE(filename.stat().st_mode) == 0o640
+
+
+def test_failed_atomic_write_keeps_original(tmp_path):
+    filename = tmp_path / "test.star"
+    StarWriter(test_df, filename).write()
+    original = filename.read_bytes()
+
+    def failing_header():
+        raise RuntimeError('killed')
+
+    with pytest.raises(RuntimeError):
+        writer = StarWriter(
+            test_df.iloc[:1], filename, header=failing_header, atomic=True
+        )
+        writer.write()
+    assert filename.read_bytes() == original
+    assert list(tmp_path.iterdir()) == [filename]
+
+
+def test_locked_write_and_read(tmp_path):
+    import starfile
+
+    filename = tmp_path / "test.star"
+    starfile.write(test_df, filename, atomic=True, lock=True)
+    assert (tmp_path / "test.star.lock").exists()
+    assert starfile.read(filename, lock=True).equals(test_df)